@@ -696,8 +696,7 @@ class TraceAnalysisBase(AnalysisHelpers):
             list(sig.parameters.keys())[0],
         }
 
-        @functools.wraps(f)
-        def wrapper(self, *args, **kwargs):
+        def get_pd_desc(self, *args, **kwargs):
             # Express the arguments as kwargs-only
             params = sig.bind(self, *args, **kwargs)
             params.apply_defaults()
@@ -718,8 +717,12 @@ class TraceAnalysisBase(AnalysisHelpers):
                     if k not in ignored_kwargs
                 }),
             )
-            pd_desc = PandasDataDesc(spec=spec)
+            return (PandasDataDesc(spec=spec), kwargs)
 
+        @functools.wraps(f)
+        def wrapper(self, *args, **kwargs):
+            pd_desc, kwargs = get_pd_desc(self, *args, **kwargs)
+            trace = self.trace
             cache = trace._cache
             write_swap = trace._write_swap
             try:
@@ -732,6 +735,9 @@ class TraceAnalysisBase(AnalysisHelpers):
 
             return df
 
+        # Allow looking up the cache without calling the method, see
+        # lisa.analysis.proxy.AnalysisProxy.run_batch()
+        wrapper._get_pd_desc = get_pd_desc
         return wrapper
 
     @classmethod
@@ -783,6 +789,24 @@ class TraceAnalysisBase(AnalysisHelpers):
         it and call the resulting bound method with ``meth_kwargs`` extra
         keyword arguments.
         """
+        subcls = cls.get_meth_analysis_class(meth)
+
+        # Create an analysis instance and bind the method to it
+        analysis = subcls(trace=trace)
+        meth = meth.__get__(analysis, type(analysis))
+
+        return meth(**meth_kwargs)
+
+    @classmethod
+    def get_meth_analysis_class(cls, meth):
+        """
+        Get the subclass defining the given method.
+
+        :param meth: Function (method) defined on a subclass.
+        :type meth: collections.abc.Callable
+
+        :raises ValueError: If the method is not defined on any subclass.
+        """
         for subcls in cls.get_analysis_classes().values():
             for name, f in inspect.getmembers(subcls):
                 if f is meth:
@@ -796,10 +820,6 @@ class TraceAnalysisBase(AnalysisHelpers):
                 cls.__qualname__,
             ))
 
-        # Create an analysis instance and bind the method to it
-        analysis = subcls(trace=trace)
-        meth = meth.__get__(analysis, type(analysis))
-
-        return meth(**meth_kwargs)
+        return subcls
 
 # vim :set tabstop=4 shiftwidth=4 expandtab textwidth=80
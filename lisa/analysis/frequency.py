@@ -29,7 +29,7 @@ import numpy as np
 from lisa.analysis.base import TraceAnalysisBase
 from lisa.utils import memoized
 from lisa.trace import requires_events, requires_one_event_of, CPU
-from lisa.datautils import series_integrate, df_refit_index, series_refit_index, series_deduplicate, df_add_delta, series_mean, df_window
+from lisa.datautils import df_split_signals, df_refit_index, series_refit_index, series_deduplicate, series_mean, df_window, StepSignal
 
 
 class FrequencyAnalysis(TraceAnalysisBase):
@@ -75,7 +75,9 @@ class FrequencyAnalysis(TraceAnalysisBase):
         # * the first value
         # * the 2nd value if that comes from cpufreq
         init_df = pd.concat([init_df, init_devlib_df])
-        init_df.sort_index(inplace=True)
+        # Use a stable sort, so that cpufreq values come before the devlib
+        # ones given at the same timestamp
+        init_df.sort_index(inplace=True, kind='mergesort')
         init_groups = init_df.groupby('cpu')
 
         first_df = init_groups.head(1)
@@ -157,59 +159,80 @@ class FrequencyAnalysis(TraceAnalysisBase):
     @TraceAnalysisBase.cache
     @df_cpus_frequency.used_events
     @requires_events('cpu_idle')
-    def _get_frequency_residency(self, cpus):
+    def _df_frequency_residency_all(self):
         """
-        Get a DataFrame with per cluster frequency residency, i.e. amount of
-        time spent at a given frequency in each cluster.
+        Same as :meth:`df_frequency_residency_all` without checking the
+        coherency of the frequency domains.
+        """
+        domains = self.trace.plat_info['freq-domains']
+        freq_df = self.df_cpus_frequency()
+        freqs = {
+            cols['cpu']: cpu_df['frequency']
+            for cols, cpu_df in df_split_signals(freq_df, ['cpu'], window=self.trace.window)
+        }
+        idle = self.trace.analysis.idle
+
+        def active_residency(freq, active):
+            # Both signals are held until the end of the last one.
+            end = max([freq.index[-1], *active.index[-1:]])
+            freq, active = StepSignal.from_series(freq, end=end).intersect(
+                StepSignal.from_series(active, end=end)
+            )
+            return freq.filter(active.value != 0).residency()
+
+        keys = []
+        dfs = []
+        for domain_id, domain in enumerate(domains):
+            domain_active = idle.signal_cluster_active(domain)
+            for cpu in domain:
+                try:
+                    freq = freqs[cpu]
+                except KeyError:
+                    continue
+
+                total_time = StepSignal.from_series(freq).residency()
+                df = pd.DataFrame(
+                    dict(
+                        total_time=total_time,
+                        active_time=active_residency(freq, idle.signal_cpu_active(cpu)),
+                        domain_active_time=active_residency(freq, domain_active),
+                    ),
+                    columns=['total_time', 'active_time', 'domain_active_time'],
+                )
+                df = df.reindex(total_time.index).fillna(0)
+                keys.append((domain_id, cpu))
+                dfs.append(df)
+
+        return pd.concat(dfs, keys=keys, names=['domain', 'cpu', 'frequency'])
 
-        :param cpus: A tuple of CPU IDs
-        :type cpus: tuple(int)
+    @_df_frequency_residency_all.used_events
+    def df_frequency_residency_all(self):
+        """
+        Get the frequency residency of all CPUs and frequency domains, i.e.
+        amount of time spent at a given frequency.
 
         :returns: A :class:`pandas.DataFrame` with:
 
+          * A ``domain`` index level (the index of the frequency domain in the
+            ``freq-domains`` platform info key)
+          * A ``cpu`` index level (the CPU ID)
+          * A ``frequency`` index level
           * A ``total_time`` column (the total time spent at a frequency)
-          * A ``active_time`` column (the non-idle time spent at a frequency)
+          * A ``active_time`` column (the time the CPU was non-idle at a
+            frequency)
+          * A ``domain_active_time`` column (the time at least one CPU of the
+            domain was non-idle at a frequency)
+
+        All the frequency domains are checked for coherency, and the
+        residencies are computed from the transitions of the frequency and
+        idle signals without any per-frequency processing.
         """
-        freq_df = self.df_cpus_frequency()
         # Assumption: all CPUs in a cluster run at the same frequency, i.e. the
-        # frequency is scaled per-cluster not per-CPU. Hence, we can limit the
-        # cluster frequencies data to a single CPU.
-        self._check_freq_domain_coherency(cpus)
-
-        cluster_freqs = freq_df[freq_df.cpu == cpus[0]]
-
-        # Compute TOTAL Time
-        cluster_freqs = df_add_delta(cluster_freqs, col="total_time", window=self.trace.window)
-        time_df = cluster_freqs[["total_time", "frequency"]].groupby(["frequency"]).sum()
-
-        # Compute ACTIVE Time
-        cluster_active = self.trace.analysis.idle.signal_cluster_active(cpus)
-
-        # In order to compute the active time spent at each frequency we
-        # multiply 2 square waves:
-        # - cluster_active, a square wave of the form:
-        #     cluster_active[t] == 1 if at least one CPU is reported to be
-        #                            non-idle by CPUFreq at time t
-        #     cluster_active[t] == 0 otherwise
-        # - freq_active, square wave of the form:
-        #     freq_active[t] == 1 if at time t the frequency is f
-        #     freq_active[t] == 0 otherwise
-        available_freqs = sorted(cluster_freqs.frequency.unique())
-        cluster_freqs = cluster_freqs.join(
-            cluster_active.to_frame(name='active'), how='outer')
-        cluster_freqs.fillna(method='ffill', inplace=True)
-        nonidle_time = []
-        for freq in available_freqs:
-            freq_active = cluster_freqs.frequency.apply(lambda x: 1 if x == freq else 0)
-            active_t = cluster_freqs.active * freq_active
-            # Compute total time by integrating the square wave
-            nonidle_time.append(series_integrate(active_t))
-
-        time_df["active_time"] = pd.DataFrame(index=available_freqs, data=nonidle_time)
-        return time_df
-
-
-    @_get_frequency_residency.used_events
+        # frequency is scaled per-cluster not per-CPU.
+        self._check_freq_domain_coherency()
+        return self._df_frequency_residency_all()
+
+    @_df_frequency_residency_all.used_events
     def df_cpu_frequency_residency(self, cpu):
         """
         Get per-CPU frequency residency, i.e. amount of
@@ -226,9 +249,13 @@ class FrequencyAnalysis(TraceAnalysisBase):
         if not isinstance(cpu, int):
             raise TypeError('Input CPU parameter must be an integer')
 
-        return self._get_frequency_residency((cpu,))
+        # Only a single CPU is considered, other CPUs may have garbage data
+        # but the caller is not going to look at it anyway.
+        df = self._df_frequency_residency_all()
+        df = df.xs(cpu, level='cpu').reset_index(level='domain', drop=True)
+        return df[['total_time', 'active_time']]
 
-    @_get_frequency_residency.used_events
+    @_df_frequency_residency_all.used_events
     def df_domain_frequency_residency(self, cpu):
         """
         Get per-frequency-domain frequency residency, i.e. amount of time each
@@ -245,7 +272,13 @@ class FrequencyAnalysis(TraceAnalysisBase):
         domains = self.trace.plat_info['freq-domains']
         for domain in domains:
             if cpu in domain:
-                return self._get_frequency_residency(tuple(domain))
+                # Only check the domain we care about, other ones may have
+                # garbage data
+                self._check_freq_domain_coherency(domain)
+                df = self._df_frequency_residency_all()
+                df = df.xs(domain[0], level='cpu').reset_index(level='domain', drop=True)
+                df = df[['total_time', 'domain_active_time']]
+                return df.rename(columns={'domain_active_time': 'active_time'})
 
     @TraceAnalysisBase.cache
     @df_cpu_frequency.used_events
@@ -21,7 +21,7 @@ import operator
 import pandas as pd
 import numpy as np
 
-from lisa.datautils import series_integrate, df_split_signals, series_combine, df_add_delta, df_refit_index
+from lisa.datautils import series_integrate, df_split_signals, series_combine, df_add_delta, df_refit_index, StepSignal
 from lisa.analysis.base import TraceAnalysisBase
 from lisa.trace import requires_events, CPU
 from lisa.conf import TypedList
@@ -72,27 +72,34 @@ class IdleAnalysis(TraceAnalysisBase):
         :returns: A :class:`pandas.Series` that equals 1 at timestamps where at
           least one CPU is reported to be non-idle, 0 otherwise
         """
-        active = self.signal_cpu_active(cluster[0]).to_frame(name=cluster[0])
-        for cpu in cluster[1:]:
-            active = active.join(
-                self.signal_cpu_active(cpu).to_frame(name=cpu),
-                how='outer'
-            )
-
-        active.fillna(method='ffill', inplace=True)
-        # There might be NaNs in the signal where we got data from some CPUs
-        # before others. That will break the .astype(int) below, so drop rows
-        # with NaN in them.
-        active.dropna(inplace=True)
+        signals = [self.signal_cpu_active(cpu) for cpu in cluster]
+        # Each CPU keeps its last state until the end of the last signal
+        end = max(
+            (signal.index[-1] for signal in signals if not signal.empty),
+            default=0,
+        )
 
-        # Cluster active is the OR between the actives on each CPU
-        # belonging to that specific cluster
+        # Cluster active is the OR between the actives on each CPU belonging
+        # to that specific cluster. The result starts when all CPUs have
+        # reported their state.
         cluster_active = reduce(
             operator.or_,
-            [cpu_active.astype(int) for _, cpu_active in
-             active.items()]
+            (
+                StepSignal.from_series(signal, end=end)
+                for signal in signals
+            )
         )
 
+        cluster_active = cluster_active.to_series().astype(int)
+        # The intervals of the signal end with the last transition, whose
+        # value is kept as the final state of the cluster.
+        if not cluster_active.empty:
+            cluster_active.iloc[-1] = int(any(
+                signal.iloc[-1]
+                for signal in signals
+                if not signal.empty
+            ))
+        cluster_active.index.name = signals[0].index.name
         return cluster_active
 
     @TraceAnalysisBase.cache
@@ -123,41 +123,26 @@ class LatencyAnalysis(TraceAnalysisBase):
         """
         df = self.trace.analysis.tasks.df_task_states(task)
 
-        runtimes = []
-        spurious_wkp = False
-
-        # Using df.apply() is risky for counting (can be called more than once
-        # on the same row), so use a loop instead
-        for index, row in df.iterrows():
-            runtime = runtimes[-1] if len(runtimes) else 0
-
-            if row.curr_state == TaskState.TASK_WAKING:
-                # This is required to capture strange trace sequences where
-                # a switch_in event is followed by a wakeup_event.
-                # This sequence is not expected, but we found it in some traces.
-                # Possible reasons could be:
-                # - misplaced sched_wakeup events
-                # - trace buffer artifacts
-                # TO BE BETTER investigated in kernel space.
-                # For the time being, we account this interval as RUNNING time,
-                # which is what kernelshark does.
-                if spurious_wkp:
-                    runtime += row.delta
-                    spurious_wkp = False
-                else:
-                    # This is a new activation, reset the runtime counter
-                    runtime = 0
-
-            elif row.curr_state == TaskState.TASK_ACTIVE:
-                # This is the spurious wakeup thing mentionned above
-                if row.next_state == TaskState.TASK_WAKING:
-                    spurious_wkp = True
-
-                runtime += row.delta
-
-            runtimes.append(runtime)
-
-        df["running_time"] = runtimes
+        curr_state = df['curr_state']
+        waking = curr_state == TaskState.TASK_WAKING
+        active = curr_state == TaskState.TASK_ACTIVE
+
+        # A wakeup right after a switch in is a strange trace sequence, that
+        # is not expected but was found in some traces.
+        # Possible reasons could be:
+        # - misplaced sched_wakeup events
+        # - trace buffer artifacts
+        # TO BE BETTER investigated in kernel space.
+        # For the time being, we account this interval as RUNNING time,
+        # which is what kernelshark does.
+        spurious_wkp = waking & (curr_state.shift(1) == TaskState.TASK_ACTIVE)
+
+        # Any other wakeup is a new activation, which resets the runtime
+        # counter. Each activation is then a group in which the running time
+        # is accumulated.
+        activation = (waking & ~spurious_wkp).cumsum()
+        runtime = df['delta'].where(active | spurious_wkp, 0)
+        df = df.assign(running_time=runtime.groupby(activation.values).cumsum())
 
         # The runtime column is not entirely correct - at a task's first
         # TASK_ACTIVE occurence, the running_time will be non-zero, even
@@ -171,6 +156,127 @@ class LatencyAnalysis(TraceAnalysisBase):
             TaskState.TASK_WAKING
         ])][["curr_state", "running_time"]]
 
+    @TraceAnalysisBase.cache
+    @TasksAnalysis.df_tasks_states.used_events
+    def df_latency_all(self):
+        """
+        DataFrame of the wakeup and preemption latencies of all tasks
+
+        :returns: a :class:`pandas.DataFrame` with:
+
+          * A ``pid`` column (the PID of the task)
+          * A ``comm`` column (the name of the task)
+          * A ``wakeup_latency`` column (the wakeup latency at that timestamp,
+            ``NaN`` for preemption latencies).
+          * A ``preempt_latency`` column (the preemption latency at that
+            timestamp, ``NaN`` for wakeup latencies).
+
+        .. note:: This is computed in one pass over
+            :meth:`lisa.analysis.tasks.TasksAnalysis.df_tasks_states`, which
+            is much faster than calling :meth:`df_latency_wakeup` and
+            :meth:`df_latency_preemption` for each task. The timestamps are the
+            ones of that dataframe, and may therefore be slightly different
+            from the ones of the per-task dataframes.
+        """
+        df = self.trace.analysis.tasks.df_tasks_states()
+
+        activated = df['next_state'] == TaskState.TASK_ACTIVE
+        wakeup = activated & (df['curr_state'] == TaskState.TASK_WAKING)
+        preempt = activated & (df['curr_state'] == TaskState.TASK_RUNNING)
+
+        df = df[wakeup | preempt]
+        return pd.DataFrame(
+            dict(
+                pid=df['pid'],
+                comm=df['comm'],
+                wakeup_latency=df['delta'].where(wakeup),
+                preempt_latency=df['delta'].where(preempt),
+            ),
+            columns=['pid', 'comm', 'wakeup_latency', 'preempt_latency'],
+        )
+
+    def _get_latency_all_col(self, kind):
+        cols = {
+            'wakeup': 'wakeup_latency',
+            'preempt': 'preempt_latency',
+        }
+        try:
+            col = cols[kind]
+        except KeyError:
+            raise ValueError('Unknown latency kind "{}", must be one of: {}'.format(
+                kind, ', '.join(sorted(cols.keys()))))
+
+        df = self.df_latency_all()
+        return df[['pid', 'comm', col]].dropna(subset=[col]), col
+
+    @TraceAnalysisBase.cache
+    @df_latency_all.used_events
+    def df_latency_stats(self, kind='wakeup', quantiles=(0.5, 0.9, 0.99)):
+        """
+        Statistics of the latencies of each task
+
+        :param kind: Kind of latency, either ``wakeup`` or ``preempt``.
+        :type kind: str
+
+        :param quantiles: Quantiles to compute, in ``[0, 1]``.
+        :type quantiles: list(float)
+
+        :returns: a :class:`pandas.DataFrame` with:
+
+          * Task PIDs as index
+          * A ``comm`` column (the last name of the task)
+          * A ``count`` column (the number of latencies)
+          * ``mean`` and ``max`` columns
+          * A ``pN`` column for each quantile (e.g. ``p99`` for ``0.99``)
+        """
+        df, col = self._get_latency_all_col(kind)
+        grouped = df.groupby('pid', sort=True)
+        latency = grouped[col]
+
+        stats = latency.agg(['count', 'mean', 'max'])
+        for q in quantiles:
+            stats['p{:g}'.format(q * 100)] = latency.quantile(q)
+
+        stats.insert(0, 'comm', grouped['comm'].last())
+        return stats
+
+    @TraceAnalysisBase.cache
+    @df_latency_all.used_events
+    def df_latency_histogram(self, kind='wakeup', bins=(0, 1e-4, 1e-3, 1e-2, 1e-1, 1)):
+        """
+        Histogram of the latencies of each task
+
+        :param kind: Kind of latency, either ``wakeup`` or ``preempt``.
+        :type kind: str
+
+        :param bins: Edges of the bins, in seconds. Latencies outside of
+            the first and last edges are not counted.
+        :type bins: list(float)
+
+        :returns: a :class:`pandas.DataFrame` with:
+
+          * Task PIDs as index
+          * A column for each bin, labelled with the lower edge of the bin in
+            seconds, with the number of latencies in that bin.
+        """
+        df, col = self._get_latency_all_col(kind)
+        bins = np.asarray(bins, dtype=np.float64)
+
+        # Index of the bin of each latency, with latencies outside the edges
+        # discarded
+        bin_idxs = np.searchsorted(bins, df[col].values, side='right') - 1
+        inside = (bin_idxs >= 0) & (bin_idxs < len(bins) - 1)
+
+        pids, pid_idxs = np.unique(df['pid'].values[inside], return_inverse=True)
+        counts = np.zeros((len(pids), len(bins) - 1), dtype=np.int64)
+        np.add.at(counts, (pid_idxs, bin_idxs[inside]), 1)
+
+        return pd.DataFrame(
+            counts,
+            index=pd.Index(pids, name='pid'),
+            columns=bins[:-1],
+        )
+
 ###############################################################################
 # Plotting Methods
 ###############################################################################
@@ -23,9 +23,32 @@ import sys
 import logging
 import inspect
 import itertools
+import multiprocessing
 
 from lisa.analysis.base import TraceAnalysisBase
-from lisa.utils import Loggable
+from lisa.utils import Loggable, measure_time
+
+
+_BATCH_TRACE = None
+"""
+Trace used by the worker processes of :meth:`AnalysisProxy.run_batch`.
+"""
+
+
+def _init_batch_worker(trace):
+    global _BATCH_TRACE
+    # The swap area is managed by the parent process, which receives the
+    # results
+    base_trace = getattr(trace, 'base_trace', trace)
+    base_trace._write_swap = False
+    _BATCH_TRACE = trace
+
+
+def _run_batch_call(call):
+    meth, kwargs = call
+    with measure_time() as measure:
+        res = TraceAnalysisBase.call_on_trace(meth, _BATCH_TRACE, kwargs)
+    return (res, measure.exclusive_delta)
 
 
 class AnalysisProxy(Loggable):
@@ -53,6 +76,103 @@ class AnalysisProxy(Loggable):
             for cls in TraceAnalysisBase.get_analysis_classes().values()
         ))
 
+    def run_batch(self, calls, jobs=None):
+        """
+        Run a batch of analysis methods using a pool of worker processes.
+
+        :param calls: Methods to call. Each item is either a method defined
+            on an analysis class, such as
+            ``TasksAnalysis.df_tasks_runtime``, or a tuple of such a method
+            and a dictionary of keyword arguments to pass to it.
+        :type calls: list(collections.abc.Callable or tuple(collections.abc.Callable, dict))
+
+        :param jobs: Number of worker processes. If ``None``, the number of
+            CPUs is used.
+        :type jobs: int or None
+
+        :returns: The list of the values returned by each call.
+
+        The events used by all the methods are parsed at once by the current
+        process and written to the swap area, so that the worker processes
+        can share them. Results already in the cache of the trace are not
+        computed again, and the results of methods decorated with
+        :meth:`lisa.analysis.base.TraceAnalysisBase.cache` are inserted in
+        it, as if they had been called directly.
+
+        **Example**::
+
+            from lisa.analysis.tasks import TasksAnalysis
+            from lisa.analysis.cpus import CpusAnalysis
+
+            runtime_df, ctx_sw_df = trace.analysis.run_batch([
+                TasksAnalysis.df_tasks_runtime,
+                (CpusAnalysis.df_context_switches, {}),
+            ], jobs=2)
+
+        .. note:: The worker processes are forked from the current process,
+            and the keyword arguments and results of the methods are pickled.
+        """
+        trace = self.trace
+        cache = trace._cache
+        jobs = jobs or os.cpu_count() or 1
+
+        calls = [
+            call if isinstance(call, tuple) else (call, {})
+            for call in calls
+        ]
+
+        results = [None] * len(calls)
+        pending = []
+        events = set()
+        for i, (meth, kwargs) in enumerate(calls):
+            analysis_cls = TraceAnalysisBase.get_meth_analysis_class(meth)
+            pd_desc = None
+            get_pd_desc = getattr(meth, '_get_pd_desc', None)
+            if get_pd_desc is not None:
+                analysis = getattr(self, analysis_cls.name)
+                pd_desc, _ = get_pd_desc(analysis, **kwargs)
+                try:
+                    results[i] = cache.fetch(pd_desc)
+                except KeyError:
+                    pass
+                else:
+                    continue
+
+            with contextlib.suppress(AttributeError):
+                events.update(meth.used_events.get_all_events())
+            pending.append((i, pd_desc, (meth, kwargs)))
+
+        if len(pending) <= 1 or jobs <= 1:
+            for i, pd_desc, (meth, kwargs) in pending:
+                results[i] = TraceAnalysisBase.call_on_trace(meth, trace, kwargs)
+            return results
+
+        # Parse all the events at once and make them available in the swap
+        # area before forking
+        trace._load_raw_df_map(sorted(events), write_swap=True, allow_missing_events=True)
+        cache.sync()
+
+        ctx = multiprocessing.get_context('fork')
+        with ctx.Pool(
+            processes=min(jobs, len(pending)),
+            initializer=_init_batch_worker,
+            initargs=(trace,),
+        ) as pool:
+            outputs = pool.map(
+                _run_batch_call,
+                [call for i, pd_desc, call in pending],
+                chunksize=1,
+            )
+
+        write_swap = trace._write_swap
+        for (i, pd_desc, call), (res, compute_cost) in zip(pending, outputs):
+            results[i] = res
+            if pd_desc is not None:
+                cache.insert(pd_desc, res, compute_cost=compute_cost, write_swap=write_swap)
+
+        cache.to_swap_dir()
+        return results
+
     def __dir__(self):
         """Provide better completion support for interactive notebook usage"""
         return itertools.chain(super().__dir__(), self._class_map.keys())
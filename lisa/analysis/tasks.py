@@ -24,7 +24,7 @@ import pandas as pd
 
 from lisa.analysis.base import TraceAnalysisBase
 from lisa.utils import memoized
-from lisa.datautils import df_filter_task_ids, series_rolling_apply, series_refit_index, df_refit_index, df_deduplicate, df_split_signals, df_add_delta, df_window, df_update_duplicates
+from lisa.datautils import df_filter_task_ids, series_rolling_apply, series_refit_index, df_refit_index, df_deduplicate, df_split_signals, df_add_delta, df_window, df_update_duplicates, ResidencyAccumulator, LastAccumulator
 from lisa.trace import requires_events, TaskID, CPU
 from lisa.pelt import PELT_SCALE
 from lisa.conf import TypedList
@@ -318,44 +318,103 @@ class TasksAnalysis(TraceAnalysisBase):
             # amount possible.
             df = df_update_duplicates(df, col='Time', inplace=True)
 
-            grouped = df.groupby('pid', sort=False)
-            new_columns = dict(
-                next_state=grouped['curr_state'].shift(-1, fill_value=TaskState.TASK_UNKNOWN),
-                # GroupBy.transform() will run the function on each group, and
-                # concatenate the resulting series to create a new column.
-                # Note: We actually need transform() to chain 2 operations on
-                # the group, otherwise the first operation returns a final
-                # Series, and the 2nd is not applied on groups
-                delta=grouped['Time'].transform(lambda time: time.diff().shift(-1)),
-            )
-            df = df.assign(**new_columns)
+            df = self._add_states_intervals(df, df['Time'])
             df.set_index('Time', inplace=True)
 
             return df
 
         # Return a generator yielding (TaskID, task_df) tuples
         else:
-            def make_pid_df(pid_df):
-                # Even though the initial dataframe contains duplicated indices due to
-                # using both prev_pid and next_pid in sched_switch event, we should
-                # never end up with prev_pid == next_pid, so task-specific dataframes
-                # are expected to be free from duplicated timestamps.
-                # assert not df.index.duplicated().any()
-
-                # Copy the df to add new columns
-                pid_df = pid_df.copy(deep=False)
-
-                # For each PID, add the time it spent in each state
-                pid_df['delta'] = pid_df.index.to_series().diff().shift(-1)
-                pid_df['next_state'] = pid_df['curr_state'].shift(-1, fill_value=TaskState.TASK_UNKNOWN)
-                return pid_df
+            # Compute the intervals once for all tasks rather than for each
+            # task's dataframe, and then split the result.
+            df = self._add_states_intervals(df, df.index)
 
             signals = df_split_signals(df, ['pid'])
             return (
-                (TaskID(pid=col['pid'], comm=None), make_pid_df(pid_df))
+                (TaskID(pid=col['pid'], comm=None), pid_df)
                 for col, pid_df in signals
             )
 
+    @staticmethod
+    def _states_intervals(pid, time, state):
+        """
+        Compute the intervals spent by each task in each state.
+
+        :param pid: PID of the task updated by each event.
+        :type pid: numpy.ndarray
+
+        :param time: Timestamp of each event, in chronological order.
+        :type time: numpy.ndarray
+
+        :param state: State the task enters at each event.
+        :type state: numpy.ndarray
+
+        :returns: A tuple ``(end, next_state)`` of arrays aligned with the
+            inputs. ``end`` is the timestamp at which the task leaves the state
+            (``NaN`` for the last event of each task), and ``next_state`` is
+            the state it enters then (:attr:`TaskState.TASK_UNKNOWN` for the
+            last event of each task).
+
+        Events are grouped by PID with a stable sort, which preserves the
+        chronological order of the events of each task, so that the next
+        event of a task is the next item in sorted order if it has the same
+        PID. This avoids running any Python code for each task, which
+        matters on traces containing thousands of PIDs.
+        """
+        pid = np.asarray(pid)
+        time = np.asarray(time, dtype=np.float64)
+        state = np.asarray(state)
+
+        # mergesort is the stable one
+        order = np.argsort(pid, kind='mergesort')
+        sorted_pid = pid[order]
+        sorted_time = time[order]
+        sorted_state = state[order]
+
+        # Whether the next item in sorted order belongs to the same task
+        has_next = np.zeros(len(order), dtype=bool)
+        has_next[:-1] = sorted_pid[1:] == sorted_pid[:-1]
+
+        sorted_end = np.full(len(order), np.NaN)
+        sorted_end[:-1] = sorted_time[1:]
+        sorted_end[~has_next] = np.NaN
+
+        sorted_next_state = np.full(len(order), int(TaskState.TASK_UNKNOWN), dtype=np.int64)
+        sorted_next_state[:-1] = sorted_state[1:]
+        sorted_next_state[~has_next] = TaskState.TASK_UNKNOWN
+
+        # Scatter back to the original order
+        end = np.empty_like(sorted_end)
+        end[order] = sorted_end
+        next_state = np.empty_like(sorted_next_state)
+        next_state[order] = sorted_next_state
+
+        return (end, next_state)
+
+    @classmethod
+    def _add_states_intervals(cls, df, time):
+        """
+        Add the ``next_state`` and ``delta`` columns computed by
+        :meth:`_states_intervals` to a dataframe of tasks states updates.
+
+        :param df: Dataframe with ``pid`` and ``curr_state`` columns, in
+            chronological order.
+        :type df: pandas.DataFrame
+
+        :param time: Timestamps of the rows of ``df``.
+        :type time: pandas.Series or pandas.Index
+        """
+        time = np.asarray(time, dtype=np.float64)
+        end, next_state = cls._states_intervals(
+            pid=df['pid'].values,
+            time=time,
+            state=df['curr_state'].values,
+        )
+        return df.assign(
+            next_state=next_state,
+            delta=end - time,
+        )
+
     @staticmethod
     def _reorder_tasks_states_columns(df):
         """
@@ -424,8 +483,7 @@ class TasksAnalysis(TraceAnalysisBase):
           * A ``delta`` column (the duration for which the task will remain in
             this state)
         """
-        tasks_df = list(self._df_tasks_states(tasks=[task]))
-        task_id, task_df = tasks_df[0]
+        task_id, task_df = next(self._df_tasks_states(tasks=[task]))
         task_df = task_df.drop(columns=["pid", "comm"])
 
         if stringify:
@@ -475,7 +533,53 @@ class TasksAnalysis(TraceAnalysisBase):
         return df
 
     @TraceAnalysisBase.cache
-    @_df_tasks_states.used_events
+    @requires_events('sched_switch')
+    def df_tasks_cpu_residency(self):
+        """
+        DataFrame of the time each task spent running on each CPU
+
+        :returns: a :class:`pandas.DataFrame` with:
+
+          * PIDs and CPU IDs as index
+          * A ``comm`` column (the last name of the task)
+          * A ``runtime`` column (the time the task spent running on that CPU)
+
+        Only the CPUs where the task ran inside the window are reported.
+
+        .. note:: The idle tasks of all CPUs share PID 0, but each of them has
+            its own name (e.g. ``swapper/1``) and only runs on its own CPU. The
+            ``comm`` column of PID 0 is therefore the name of the idle task of
+            that CPU.
+        """
+        start, end = self.trace.window
+        # Fuse all aggregations in a single pass over sched_switch. The
+        # events before the window tell what was running at its beginning.
+        residency, comms, cpu_comms = self.trace.accumulate(
+            [
+                ResidencyAccumulator('sched_switch', 'next_pid', by='__cpu', window=(start, end)),
+                LastAccumulator('sched_switch', 'next_comm', by='next_pid'),
+                LastAccumulator('sched_switch', 'next_comm', by=['__cpu', 'next_pid']),
+            ],
+            window=(None, end),
+        )
+
+        residency = residency[residency > 0]
+        residency.index.names = ['cpu', 'pid']
+        df = residency.to_frame('runtime').reorder_levels(['pid', 'cpu'])
+        df.sort_index(inplace=True)
+        pids = df.index.get_level_values('pid')
+        cpus = df.index.get_level_values('cpu')
+        comm = np.where(
+            pids == 0,
+            np.asarray(cpu_comms.reindex(list(zip(cpus, pids))), dtype=object),
+            np.asarray(comms.reindex(pids), dtype=object),
+        )
+        df.insert(0, 'comm', comm)
+
+        return df
+
+    @TraceAnalysisBase.cache
+    @df_tasks_cpu_residency.used_events
     def df_tasks_runtime(self):
         """
         DataFrame of the time each task spent in TASK_ACTIVE (:class:`TaskState`)
@@ -485,30 +589,25 @@ class TasksAnalysis(TraceAnalysisBase):
           * PIDs as index
           * A ``comm`` column (the name of the task)
           * A ``runtime`` column (the time that task spent running)
-        """
-
-        runtimes = {}
-        for task, pid_df in self._df_tasks_states():
-            pid = task.pid
-            # Make sure to only look at the relevant portion of the dataframe
-            # with the window, since we are going to make a time-based sum
-            pid_df = df_refit_index(pid_df, window=self.trace.window)
-            pid_df = df_add_delta(pid_df)
-            # Resolve the comm to the last name of the PID in that window
-            comms = pid_df['comm'].unique()
-            comm = comms[-1]
-            pid_df = pid_df[pid_df['curr_state'] == TaskState.TASK_ACTIVE]
-            runtimes[pid] = (pid_df['delta'].sum(skipna=True), comm)
-
-        df = pd.DataFrame.from_dict(runtimes, orient="index", columns=["runtime", 'comm'])
 
+        .. note:: There is one row for the idle task of each CPU, all of them
+            with PID 0.
+        """
+        residency_df = self.df_tasks_cpu_residency()
+        by_task = residency_df.groupby(self._get_residency_keys(residency_df), sort=True)
+        df = pd.DataFrame({
+            'runtime': by_task['runtime'].sum(),
+            'comm': by_task['comm'].last(),
+        }, columns=['runtime', 'comm'])
+
+        df.index = df.index.get_level_values(0)
         df.index.name = "pid"
-        df.sort_values(by="runtime", ascending=False, inplace=True)
+        df.sort_values(by="runtime", ascending=False, inplace=True, kind='mergesort')
 
         return df
 
     @TraceAnalysisBase.cache
-    @df_task_states.used_events
+    @df_tasks_cpu_residency.used_events
     def df_task_total_residency(self, task):
         """
         DataFrame of a task's execution time on each CPU
@@ -521,24 +620,62 @@ class TasksAnalysis(TraceAnalysisBase):
           * CPU IDs as index
           * A ``runtime`` column (the time the task spent being active)
         """
-        cpus = set(range(self.trace.cpus_count))
-
-        df = self.df_task_states(task)
-        # Get the correct delta for the window we want.
-        df = df_add_delta(df, window=self.trace.window)
-        df = df[df.curr_state == TaskState.TASK_ACTIVE]
-
-        residency_df = pd.DataFrame(df.groupby("cpu")["delta"].sum())
-        residency_df.rename(columns={"delta": "runtime"}, inplace=True)
-
-        cpus_present = set(residency_df.index.unique())
+        # The residency is per-PID, so renamed tasks are not ambiguous
+        task_ids = self.trace.get_task_ids(task)
+        keys = set(map(self._get_task_id_key, task_ids))
+        if len(keys) > 1:
+            raise ValueError('More than one task matching: {}'.format(
+                ', '.join(map(str, task_ids))
+            ))
+        task_id = task_ids[0]
+        df = self._df_task_ids_total_residency([task_id]).T
+        df.columns = ['runtime']
+        return df
 
-        for cpu in cpus.difference(cpus_present):
-            residency_df.loc[cpu] = 0.
+    @staticmethod
+    def _get_task_id_key(task_id):
+        # The idle tasks of all CPUs share PID 0, so they are told apart by
+        # their name. The other tasks are identified by their PID, so renamed
+        # tasks are not ambiguous.
+        return (task_id.pid, task_id.comm if task_id.pid == 0 else '')
 
-        residency_df.sort_index(inplace=True)
+    @staticmethod
+    def _get_residency_keys(residency_df):
+        """
+        Keys matching :meth:`_get_task_id_key` for each row of
+        :meth:`df_tasks_cpu_residency`.
+        """
+        pids = residency_df.index.get_level_values('pid')
+        names = np.where(pids == 0, residency_df['comm'].astype(str), '')
+        return [pids, names]
 
-        return residency_df
+    def _df_task_ids_total_residency(self, task_ids):
+        """
+        DataFrame of the execution time of the given tasks on each CPU, with
+        one row per task and one column per CPU.
+        """
+        cpus = list(range(self.trace.cpus_count))
+        residency_df = self.df_tasks_cpu_residency()
+        runtime = pd.Series(
+            residency_df['runtime'].values,
+            index=pd.MultiIndex.from_arrays(
+                self._get_residency_keys(residency_df) + [residency_df.index.get_level_values('cpu')],
+                names=['pid', 'name', 'cpu'],
+            ),
+        )
+        df = runtime.unstack(level='cpu', fill_value=0)
+
+        keys = list(map(self._get_task_id_key, task_ids))
+        index = pd.MultiIndex.from_arrays(
+            [
+                [pid for pid, name in keys],
+                [name for pid, name in keys],
+            ],
+            names=['pid', 'name'],
+        )
+        df = df.reindex(index=index, columns=cpus, fill_value=0).astype(np.float64)
+        df.columns.name = 'cpu'
+        return df
 
     @df_task_total_residency.used_events
     def df_tasks_total_residency(self, tasks=None, ascending=False, count=None):
@@ -563,16 +700,10 @@ class TasksAnalysis(TraceAnalysisBase):
                 for task in tasks
             )
 
-        res_df = pd.DataFrame()
-        for task_id in task_ids:
-            mapping = {'runtime': str(task_id)}
-            try:
-                _df = self.trace.analysis.tasks.df_task_total_residency(task_id).T.rename(index=mapping)
-            # Not all tasks may be available, e.g. tasks outside the TraceView
-            # window
-            except Exception:
-                continue
-            res_df = res_df.append(_df)
+        task_ids = list(task_ids)
+        res_df = self._df_task_ids_total_residency(task_ids)
+        res_df.index = [str(task_id) for task_id in task_ids]
+        res_df.columns.name = None
 
         res_df['Total'] = res_df.iloc[:, :].sum(axis=1)
         res_df.sort_values(by='Total', ascending=ascending, inplace=True)
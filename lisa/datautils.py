@@ -16,6 +16,7 @@
 #
 
 import re
+import abc
 import functools
 import operator
 import math
@@ -1233,6 +1234,91 @@ def df_add_delta(df, col='delta', src_col=None, window=None, inplace=False):
     return df
 
 
+@DataFrameAccessor.register_accessor
+def df_compact(df, max_category_ratio=0.5, downcast=False, min_int_bits=32, category_columns=None):
+    """
+    Convert the columns of a dataframe to more compact dtypes.
+
+    :param df: The dataframe to act on.
+    :type df: pandas.DataFrame
+
+    :param max_category_ratio: String columns with a number of unique values
+        lower than that ratio of the number of rows are converted to
+        :class:`pandas.CategoricalDtype`, so that each value is only stored
+        once.
+    :type max_category_ratio: float
+
+    :param category_columns: If not ``None``, only these columns can be
+        converted to :class:`pandas.CategoricalDtype`.
+    :type category_columns: list(str) or None
+
+    :param downcast: If ``True``, numeric columns are also downcast. Integer
+        columns are converted to the smallest integer type that can hold all
+        their values, and floating point columns to ``float32`` if that does
+        not change any value. This changes the result of arithmetic done on
+        these columns, such as sums overflowing or loosing precision.
+    :type downcast: bool
+
+    :param min_int_bits: When downcasting, integer columns are given at least
+        that number of bits. Very small integer types are avoided since
+        arithmetic on them can easily overflow.
+    :type min_int_bits: int
+
+    The index is left untouched.
+    """
+    def compact(series):
+        dtype = series.dtype
+        if pd.api.types.is_categorical_dtype(dtype):
+            return series
+        elif dtype.kind in 'iuf' and not downcast:
+            return series
+        elif dtype.kind in 'iu':
+            if not len(series):
+                return series
+            # Only consider signed types, to avoid surprises with
+            # subtractions
+            mini = series.min()
+            maxi = series.max()
+            for bits in (8, 16, 32, 64):
+                if bits < min_int_bits:
+                    continue
+                info = np.iinfo('int{}'.format(bits))
+                if info.min <= mini and maxi <= info.max:
+                    return series.astype(info.dtype)
+            return series
+        elif dtype.kind == 'f' and dtype.itemsize > 4:
+            converted = series.astype(np.float32)
+            values = series.values
+            if ((converted.values == values) | np.isnan(values)).all():
+                return converted
+            else:
+                return series
+        elif dtype.kind == 'O':
+            if category_columns is not None and series.name not in category_columns:
+                return series
+
+            nr_unique = series.nunique(dropna=False)
+            if nr_unique > len(series) * max_category_ratio:
+                return series
+            # Only strings are turned into categories, since that is the
+            # most common case and comparing them keeps working as expected
+            elif all(isinstance(x, str) for x in series.dropna().unique()):
+                return series.astype('category')
+            else:
+                return series
+        else:
+            return series
+
+    return pd.DataFrame(
+        {
+            col: compact(df[col])
+            for col in df.columns
+        },
+        index=df.index,
+        columns=df.columns,
+    )
+
+
 def series_combine(series_list, func, fill_value=None):
     """
     Same as :meth:`pandas.Series.combine` on a list of series rather than just
@@ -1257,6 +1343,667 @@ def _data_combine(datas, func, fill_value=None):
     return state
 
 
+class StepSignal:
+    """
+    Square wave signal, represented as a table of intervals.
+
+    :param start: Start of each interval.
+    :type start: numpy.ndarray
+
+    :param end: End of each interval (excluded).
+    :type end: numpy.ndarray
+
+    :param value: Value of the signal in each interval.
+    :type value: numpy.ndarray
+
+    The intervals are expected to be sorted and to not overlap. There can be
+    gaps between them, where the signal is undefined.
+
+    Unlike a :class:`pandas.Series` of the transitions that would be joined
+    and forward-filled with other signals, operations on intervals tables only
+    need the transitions of the signals involved, which is a lot cheaper on
+    long traces. The operators ``&``, ``|`` and ``~`` are supported and
+    return a boolean signal.
+
+    **Example**::
+
+        active = StepSignal.from_series(cpu0_active) | StepSignal.from_series(cpu1_active)
+        active_time = active.integrate()
+    """
+
+    def __init__(self, start, end, value):
+        self.start = np.asarray(start, dtype=np.float64)
+        self.end = np.asarray(end, dtype=np.float64)
+        self.value = np.asarray(value)
+
+        if not (len(self.start) == len(self.end) == len(self.value)):
+            raise ValueError('start, end and value must have the same length')
+
+    @classmethod
+    def from_series(cls, series, end=None):
+        """
+        Build a signal from a series of transitions, as found in trace
+        dataframes.
+
+        :param series: Series with the value of the signal starting at each
+            index.
+        :type series: pandas.Series
+
+        :param end: End of the last interval. If ``None``, the last index of
+            the series is used, so that its value is ignored.
+        :type end: float or None
+
+        Intervals of null duration, such as transitions happening at the same
+        timestamp, are removed.
+        """
+        start = series.index.values.astype(np.float64)
+        if end is None:
+            end = start[-1] if len(start) else 0
+
+        end_ = np.empty_like(start)
+        end_[:-1] = start[1:]
+        end_[-1:] = end
+
+        keep = end_ > start
+        return cls(start[keep], end_[keep], series.values[keep])
+
+    def __len__(self):
+        return len(self.start)
+
+    def __repr__(self):
+        return '{}(start={}, end={}, value={})'.format(
+            self.__class__.__qualname__, self.start, self.end, self.value)
+
+    @property
+    def duration(self):
+        """
+        Duration of each interval.
+        """
+        return self.end - self.start
+
+    def to_series(self):
+        """
+        Convert the signal to a :class:`pandas.Series` of transitions.
+
+        The end of the last interval is represented by a repetition of the
+        last value. Gaps are represented by a ``NaN`` value at the end of the
+        interval that precedes them.
+        """
+        if not len(self):
+            return pd.Series([], dtype=self.value.dtype)
+
+        # Intervals followed by a gap
+        gap = np.append(self.end[:-1] != self.start[1:], False)
+        index = np.concatenate([self.start, self.end[gap], self.end[-1:]])
+        value = np.concatenate([
+            self.value,
+            np.full(gap.sum(), np.NaN) if gap.any() else self.value[:0],
+            self.value[-1:],
+        ])
+        # Stable sort so that the gaps come after the value they terminate
+        order = np.argsort(index, kind='mergesort')
+        return pd.Series(value[order], index=index[order])
+
+    def to_df(self, value_col='value', duration_col='duration'):
+        """
+        Convert the signal to a :class:`pandas.DataFrame` indexed by the start
+        of each interval.
+
+        :param value_col: Name of the column with the value of the signal.
+        :type value_col: str
+
+        :param duration_col: Name of the column with the duration of the
+            intervals.
+        :type duration_col: str
+        """
+        return pd.DataFrame(
+            {
+                duration_col: self.duration,
+                value_col: self.value,
+            },
+            index=self.start,
+        )
+
+    def simplify(self):
+        """
+        Merge contiguous intervals that have the same value.
+        """
+        if not len(self):
+            return self
+
+        same = (self.value[1:] == self.value[:-1]) & (self.start[1:] == self.end[:-1])
+        first = np.append(True, ~same)
+        last = np.append(~same, True)
+        return self.__class__(
+            start=self.start[first],
+            end=self.end[last],
+            value=self.value[first],
+        )
+
+    def filter(self, mask):
+        """
+        Only keep the intervals selected by the boolean ``mask`` array.
+        """
+        mask = np.asarray(mask, dtype=bool)
+        return self.__class__(
+            start=self.start[mask],
+            end=self.end[mask],
+            value=self.value[mask],
+        )
+
+    def _locate(self, x):
+        """
+        Index of the interval containing each item of ``x``, or ``-1``.
+        """
+        idx = np.searchsorted(self.start, x, side='right') - 1
+        inside = idx >= 0
+        inside[inside] = x[inside] < self.end[idx[inside]]
+        return np.where(inside, idx, -1)
+
+    def intersect(self, *others):
+        """
+        Align the signal with other signals on their intersection.
+
+        :param others: Other signals.
+        :type others: StepSignal
+
+        :returns: A list of signals, one for ``self`` followed by one for each
+            of ``others``, sharing the same intervals. Each interval is a
+            maximal span of time where all the signals are defined and none of
+            them changes value.
+        """
+        signals = [self] + list(others)
+        bounds = np.unique(np.concatenate([
+            array
+            for signal in signals
+            for array in (signal.start, signal.end)
+        ]))
+        start = bounds[:-1]
+        end = bounds[1:]
+
+        locs = [signal._locate(start) for signal in signals]
+        covered = functools.reduce(
+            operator.and_,
+            (loc >= 0 for loc in locs),
+            np.ones(len(start), dtype=bool),
+        )
+        start = start[covered]
+        end = end[covered]
+
+        return [
+            self.__class__(start, end, signal.value[loc[covered]])
+            for signal, loc in zip(signals, locs)
+        ]
+
+    def combine(self, other, func):
+        """
+        Combine two signals with a vectorized function on the intersection of
+        their domain.
+
+        :param other: Other signal.
+        :type other: StepSignal
+
+        :param func: Function taking the array of values of ``self`` and of
+            ``other``, and returning the values of the new signal.
+        :type func: collections.abc.Callable
+        """
+        signal, other = self.intersect(other)
+        return self.__class__(
+            signal.start,
+            signal.end,
+            func(signal.value, other.value),
+        )
+
+    def __and__(self, other):
+        return self.combine(other, np.logical_and)
+
+    def __or__(self, other):
+        return self.combine(other, np.logical_or)
+
+    def __invert__(self):
+        return self.__class__(self.start, self.end, np.logical_not(self.value))
+
+    def resample(self, x):
+        """
+        Sample the signal at the given points.
+
+        :param x: Points at which to sample the signal.
+        :type x: numpy.ndarray
+
+        :returns: A :class:`pandas.Series` indexed by ``x``, with ``NaN`` at
+            points where the signal is not defined.
+        """
+        x = np.asarray(x, dtype=np.float64)
+        loc = self._locate(x)
+        value = self.value
+        if not np.issubdtype(value.dtype, np.floating):
+            value = value.astype(np.float64)
+        value = np.append(value, np.NaN)
+        return pd.Series(value[loc], index=x)
+
+    def integrate(self):
+        """
+        Integral of the signal over its domain, ignoring ``NaN`` values.
+        """
+        return np.nansum(self.value * self.duration)
+
+    def residency(self):
+        """
+        Total time spent by the signal at each value.
+
+        :returns: A :class:`pandas.Series` indexed by the values of the
+            signal.
+        """
+        return pd.Series(self.duration).groupby(self.value).sum()
+
+
+class Accumulator(abc.ABC):
+    """
+    Aggregation of the rows of an event, updated one chunk at a time.
+
+    :param event: Name of the event to consume.
+    :type event: str
+
+    :param by: Columns to group the rows by. If ``None``, all the rows are
+        aggregated together.
+    :type by: str or list(str) or None
+
+    Accumulators only keep the aggregated state, so that traces can be
+    processed in chunks (see :meth:`lisa.trace.Trace.iter_events`) without
+    materializing the dataframe of the event. Several accumulators can share
+    the same pass over the trace using :func:`accumulate`.
+    """
+
+    def __init__(self, event, by=None):
+        self.event = event
+        if by is None:
+            by = []
+        elif isinstance(by, str):
+            by = [by]
+        self.by = list(by)
+
+    def _group(self, data, df):
+        """
+        Group ``data`` by the ``by`` columns of ``df``.
+        """
+        keys = [df[col].values for col in self.by]
+        return data.groupby(keys[0] if len(keys) == 1 else keys)
+
+    def _name_index(self, data):
+        if len(self.by) == 1:
+            data.index.name = self.by[0]
+        elif self.by:
+            data.index.names = self.by
+        return data
+
+    @staticmethod
+    def _add(state, data):
+        if state is None:
+            return data
+        elif isinstance(data, pd.Series):
+            return state.add(data, fill_value=0)
+        else:
+            return state + data
+
+    @abc.abstractmethod
+    def update(self, df):
+        """
+        Update the state of the accumulator with a chunk of rows.
+
+        :param df: Rows of the event, later than the rows of the previous
+            chunks.
+        :type df: pandas.DataFrame
+        """
+        pass
+
+    @abc.abstractmethod
+    def result(self):
+        """
+        Result of the aggregation of all the rows consumed so far.
+        """
+        pass
+
+    def consume(self, chunks):
+        """
+        Update the accumulator with all the given chunks and return the
+        result.
+
+        :param chunks: Iterable of mappings of event names to
+            :class:`pandas.DataFrame`, as yielded by
+            :meth:`lisa.trace.Trace.iter_events`.
+        :type chunks: collections.abc.Iterable
+        """
+        return accumulate(chunks, [self])[0]
+
+
+class CountAccumulator(Accumulator):
+    """
+    Count the rows of an event.
+
+    :Variable keyword arguments: Forwarded to :class:`Accumulator`.
+
+    The result is an ``int``, or a :class:`pandas.Series` of counts for each
+    group if ``by`` is specified.
+    """
+
+    def __init__(self, event, **kwargs):
+        super().__init__(event, **kwargs)
+        self._count = None
+
+    def update(self, df):
+        if self.by:
+            count = self._group(pd.Series(np.ones(len(df), dtype=np.int64)), df).sum()
+        else:
+            count = len(df)
+        self._count = self._add(self._count, count)
+
+    def result(self):
+        count = self._count
+        if self.by:
+            if count is None:
+                count = pd.Series([], dtype=np.int64)
+            return self._name_index(count.astype(np.int64))
+        else:
+            return count or 0
+
+
+class SumAccumulator(Accumulator):
+    """
+    Sum the values of a column of an event.
+
+    :param col: Column to sum.
+    :type col: str
+
+    :Variable keyword arguments: Forwarded to :class:`Accumulator`.
+
+    The result is a number, or a :class:`pandas.Series` of sums for each
+    group if ``by`` is specified.
+    """
+
+    def __init__(self, event, col, **kwargs):
+        super().__init__(event, **kwargs)
+        self.col = col
+        self._sum = None
+
+    def update(self, df):
+        data = df[self.col].reset_index(drop=True)
+        if self.by:
+            total = self._group(data, df).sum()
+        else:
+            total = data.sum()
+        self._sum = self._add(self._sum, total)
+
+    def result(self):
+        total = self._sum
+        if self.by:
+            if total is None:
+                total = pd.Series([], dtype=np.float64)
+            total = self._name_index(total.copy())
+            total.name = self.col
+            return total
+        else:
+            return total if total is not None else 0
+
+
+class LastAccumulator(Accumulator):
+    """
+    Last value of a column of an event.
+
+    :param col: Column to look at.
+    :type col: str
+
+    :Variable keyword arguments: Forwarded to :class:`Accumulator`.
+
+    The result is the last value, or a :class:`pandas.Series` of last values
+    for each group if ``by`` is specified. ``NaN`` values are ignored.
+    """
+
+    def __init__(self, event, col, **kwargs):
+        super().__init__(event, **kwargs)
+        self.col = col
+        self._last = None
+
+    def update(self, df):
+        data = df[self.col].reset_index(drop=True)
+        if self.by:
+            last = self._group(data, df).last()
+            if self._last is not None:
+                last = last.combine_first(self._last)
+            self._last = last
+        else:
+            data = data.dropna()
+            if not data.empty:
+                self._last = data.iloc[-1]
+
+    def result(self):
+        last = self._last
+        if self.by:
+            if last is None:
+                last = pd.Series([], dtype=np.float64)
+            last = self._name_index(last.copy())
+            last.name = self.col
+            return last
+        else:
+            return last
+
+
+class ResidencyAccumulator(Accumulator):
+    """
+    Time spent by a column of an event at each of its values.
+
+    :param col: Column to look at. Each row sets the value until the next
+        row of the same group.
+    :type col: str
+
+    :param window: Only account for the time inside that window. The end of
+        the window also closes the last interval of each group, which is
+        otherwise ignored.
+    :type window: tuple(float, float) or None
+
+    :Variable keyword arguments: Forwarded to :class:`Accumulator`.
+
+    The result is a :class:`pandas.Series` of durations indexed by the values
+    of ``col``, preceded by the ``by`` columns if specified.
+
+    .. note:: In order to account for the value of the signal at the
+        beginning of ``window``, the rows before the window need to be
+        consumed as well.
+    """
+
+    _TIME_COL = '__time'
+
+    def __init__(self, event, col, window=None, **kwargs):
+        super().__init__(event, **kwargs)
+        self.col = col
+        start, end = window if window is not None else (None, None)
+        self.window = (
+            -math.inf if start is None else start,
+            math.inf if end is None else end,
+        )
+        # Last row of each group, which will be closed by the next chunks
+        self._last = None
+        self._residency = None
+
+    def _residency_of(self, data, duration):
+        keys = [data[col].values for col in self.by + [self.col]]
+        return duration.groupby(keys[0] if len(keys) == 1 else keys).sum()
+
+    def update(self, df):
+        start, end = self.window
+        data = df[self.by + [self.col]].reset_index(drop=True)
+        data[self._TIME_COL] = df.index.values
+        if self._last is not None:
+            data = pd.concat([self._last, data], ignore_index=True, sort=False)
+
+        time = data[self._TIME_COL]
+        if self.by:
+            # Sorting is stable, so rows stay time-ordered in each group
+            data = data.sort_values(self.by, kind='mergesort')
+            time = data[self._TIME_COL]
+            next_time = time.groupby([data[col] for col in self.by]).shift(-1)
+        else:
+            next_time = time.shift(-1)
+
+        is_last = next_time.isnull().values
+        self._last = data[is_last]
+
+        closed = ~is_last
+        data = data[closed]
+        duration = (
+            next_time[closed].clip(start, end)
+            - time[closed].clip(start, end)
+        )
+        self._residency = self._add(
+            self._residency,
+            self._residency_of(data, duration),
+        )
+
+    def result(self):
+        start, end = self.window
+        residency = self._residency
+        last = self._last
+        if last is not None and end != math.inf:
+            duration = end - last[self._TIME_COL].clip(start, end)
+            residency = self._add(residency, self._residency_of(last, duration))
+
+        names = self.by + [self.col]
+        if residency is None:
+            if len(names) == 1:
+                index = pd.Index([], name=names[0])
+            else:
+                index = pd.MultiIndex.from_arrays([[]] * len(names), names=names)
+            residency = pd.Series([], index=index, dtype=np.float64)
+        else:
+            residency = residency.copy()
+            residency.index.names = names
+
+        residency.name = 'residency'
+        return residency
+
+
+class QuantileAccumulator(Accumulator):
+    """
+    Estimate the quantiles of a column of an event using a sketch.
+
+    :param col: Column to look at.
+    :type col: str
+
+    :param quantiles: Quantiles to estimate, between 0 and 1.
+    :type quantiles: list(float)
+
+    :param relative_accuracy: Maximum relative error of the estimated
+        quantiles.
+    :type relative_accuracy: float
+
+    :Variable keyword arguments: Forwarded to :class:`Accumulator`.
+
+    The values are counted in logarithmically-sized buckets, so that the
+    memory usage only depends on the range of the values and not on the
+    number of rows. Values are expected to be positive, such as durations:
+    values lower than or equal to 0 are counted as 0.
+
+    The result is a :class:`pandas.Series` indexed by the quantiles, or a
+    :class:`pandas.DataFrame` with one column per quantile and one row per
+    group if ``by`` is specified.
+    """
+
+    def __init__(self, event, col, quantiles=(0.5, 0.9, 0.99), relative_accuracy=0.01, **kwargs):
+        super().__init__(event, **kwargs)
+        if not 0 < relative_accuracy < 1:
+            raise ValueError('The relative accuracy must be between 0 and 1: {}'.format(relative_accuracy))
+
+        self.col = col
+        self.quantiles = list(quantiles)
+        self.relative_accuracy = relative_accuracy
+        self._gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self._counts = None
+
+    def _bucket(self, x):
+        x = np.asarray(x, dtype=np.float64)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            bucket = np.ceil(np.log(x) / np.log(self._gamma))
+        # Bucket of the values lower than or equal to 0
+        bucket[~(x > 0)] = -np.inf
+        return bucket
+
+    def _bucket_value(self, bucket):
+        # Middle of the bucket in terms of relative error
+        with np.errstate(over='ignore'):
+            value = 2 * self._gamma ** bucket / (self._gamma + 1)
+        return np.where(np.isneginf(bucket), 0, value)
+
+    def update(self, df):
+        data = df[self.col]
+        valid = data.notnull().values
+        data = data[valid]
+        ones = pd.Series(np.ones(len(data), dtype=np.int64))
+        keys = [df[col].values[valid] for col in self.by]
+        keys.append(self._bucket(data.values))
+        counts = ones.groupby(keys[0] if len(keys) == 1 else keys).sum()
+        self._counts = self._add(self._counts, counts)
+
+    def _estimate(self, bucket, count):
+        cumcount = np.cumsum(count)
+        rank = np.floor(np.asarray(self.quantiles) * (cumcount[-1] - 1))
+        return self._bucket_value(bucket[np.searchsorted(cumcount, rank, side='right')])
+
+    def result(self):
+        counts = self._counts
+        if counts is None or counts.empty:
+            if self.by:
+                return self._name_index(pd.DataFrame(columns=self.quantiles))
+            else:
+                return pd.Series(np.NaN, index=self.quantiles, name=self.col)
+
+        counts = counts.sort_index()
+        if self.by:
+            levels = list(range(len(self.by)))
+            groups = []
+            estimates = []
+            for group, group_counts in counts.groupby(level=levels):
+                groups.append(group)
+                estimates.append(self._estimate(
+                    group_counts.index.get_level_values(-1).values,
+                    group_counts.values,
+                ))
+
+            if len(self.by) == 1:
+                index = pd.Index(groups, name=self.by[0])
+            else:
+                index = pd.MultiIndex.from_tuples(groups, names=self.by)
+            return pd.DataFrame(estimates, index=index, columns=self.quantiles)
+        else:
+            return pd.Series(
+                self._estimate(counts.index.values, counts.values),
+                index=self.quantiles,
+                name=self.col,
+            )
+
+
+def accumulate(chunks, accumulators):
+    """
+    Update all the accumulators in a single pass over the chunks.
+
+    :param chunks: Iterable of mappings of event names to
+        :class:`pandas.DataFrame`, as yielded by
+        :meth:`lisa.trace.Trace.iter_events`.
+    :type chunks: collections.abc.Iterable
+
+    :param accumulators: Accumulators to update.
+    :type accumulators: list(Accumulator)
+
+    :returns: The list of the results of the accumulators.
+    """
+    accumulators = list(accumulators)
+    for chunk in chunks:
+        for acc in accumulators:
+            df = chunk.get(acc.event)
+            if df is not None and not df.empty:
+                acc.update(df)
+
+    return [acc.result() for acc in accumulators]
+
+
 class SignalDesc:
     """
     Define a signal to be used by various signal-oriented APIs.
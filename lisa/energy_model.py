@@ -16,7 +16,8 @@
 #
 
 from collections import namedtuple, OrderedDict, defaultdict
-from itertools import product
+import itertools
+from itertools import product, permutations
 import logging
 import operator
 import warnings
@@ -684,7 +685,63 @@ class EnergyModel(Serializable, Loggable):
         return self._estimate_from_active_time(cpu_active_time,
                                                freqs, idle_states, combine=True)
 
-    def get_optimal_placements(self, capacities, capacity_margin_pct=0):
+    @property
+    @memoized
+    def symmetric_cpu_groups(self):
+        """
+        List of lists of CPUs that can be swapped without changing the
+        estimated energy.
+
+        Such CPUs are in the same frequency domain, have the same energy data
+        and the same parents in both the :class:`EnergyModelNode` and the
+        :class:`PowerDomain` trees.
+        """
+        def key(cpu):
+            node = self.cpu_nodes[cpu]
+            pd = self.cpu_pds[cpu]
+            [freq_domain] = [
+                i
+                for i, domain in enumerate(self.freq_domains)
+                if cpu in domain
+            ]
+            return (
+                freq_domain,
+                id(node.parent),
+                sorted(node.active_states.items()),
+                sorted((node.idle_states or {}).items()),
+                id(pd.parent),
+                list(pd.idle_states),
+            )
+
+        groups = []
+        for cpu in self.cpus:
+            for group in groups:
+                if key(group[0]) == key(cpu):
+                    group.append(cpu)
+                    break
+            else:
+                groups.append([cpu])
+
+        return groups
+
+    def _symmetric_utils(self, cpu_utils):
+        """
+        Iterate over the ``cpu_utils`` obtained by swapping the utilizations
+        of CPUs in the same :attr:`symmetric_cpu_groups`.
+        """
+        groups = self.symmetric_cpu_groups
+        groups_utils = [
+            set(permutations([cpu_utils[cpu] for cpu in group]))
+            for group in groups
+        ]
+        for utils in product(*groups_utils):
+            ret = list(cpu_utils)
+            for group, group_utils in zip(groups, utils):
+                for cpu, util in zip(group, group_utils):
+                    ret[cpu] = util
+            yield tuple(ret)
+
+    def get_optimal_placements(self, capacities, capacity_margin_pct=0, brute_force=False):
         """Find the optimal distribution of work for a set of tasks
 
         Find a list of candidates which are estimated to be optimal in terms of
@@ -705,8 +762,11 @@ class EnergyModel(Serializable, Loggable):
         states for CPUs.
 
         .. note::
-            This is a brute force search taking time exponential wrt. the number
-            of tasks.
+            The search enumerates the distinct utilization distributions rather
+            than the task placements. CPUs in the same
+            :attr:`symmetric_cpu_groups` are considered interchangeable, and
+            placements that over-utilize a CPU are pruned as soon as the task
+            causing it is placed, since utilization can only grow.
 
         :param capacities: Dict mapping tasks to expected utilization
                            values. These tasks are assumed not to change; they
@@ -714,12 +774,53 @@ class EnergyModel(Serializable, Loggable):
                            single-phase periodic RT-App tasks is an example of a
                            suitable workload for this model.
         :param capacity_margin_pct: Capacity margin before overutilizing a CPU
+        :param brute_force: If ``True``, try all the task placements. This takes
+            time exponential wrt. the number of tasks, and is only useful as a
+            reference to validate the default search.
+        :type brute_force: bool
         :returns: List of ``cpu_utils`` items representing distributions of work
                   under optimal task placements, see
                   :ref:`cpu_utils <cpu-utils>`. Multiple task placements
                   that result in the same CPU utilizations are considered
                   equivalent.
         """
+        logger = self.get_logger()
+        if brute_force:
+            candidates = self._brute_force_placements(capacities, capacity_margin_pct)
+        else:
+            candidates = self._search_placements(capacities, capacity_margin_pct)
+
+        if not candidates:
+            # The system can't provide full throughput to this workload.
+            raise EnergyModelCapacityError(
+                "Can't handle workload: total capacity = {}".format(
+                    sum(capacities.values())))
+
+        # Whittle down to those that give the lowest energy estimate
+        min_power = min(p for p in iter(candidates.values()))
+        ret = [u for u, p in candidates.items() if p == min_power]
+
+        if not brute_force:
+            ret = sorted(set(itertools.chain.from_iterable(
+                map(self._symmetric_utils, ret)
+            )))
+
+        logger.debug('done')
+        return ret
+
+    def _placement_power(self, util, capacity_margin_pct):
+        freqs, overutilized = self._guess_freqs(util, capacity_margin_pct)
+        if overutilized:
+            return None
+        else:
+            power = self.estimate_from_cpu_util(util, freqs=freqs)
+            return sum(power.values())
+
+    def _brute_force_placements(self, capacities, capacity_margin_pct):
+        """
+        Compute the power of all the ``cpu_utils`` resulting from all task
+        placements, except the ones over-utilizing a CPU.
+        """
         tasks = list(capacities.keys())
 
         num_candidates = len(self.cpus) ** len(tasks)
@@ -731,7 +832,7 @@ class EnergyModel(Serializable, Loggable):
         ))
 
         candidates = {}
-        excluded = []
+        excluded = set()
         for cpus in product(self.cpus, repeat=len(tasks)):
             placement = {task: cpu for task, cpu in zip(tasks, cpus)}
 
@@ -746,26 +847,76 @@ class EnergyModel(Serializable, Loggable):
                 continue
 
             if util not in candidates:
-                freqs, overutilized = self._guess_freqs(util, capacity_margin_pct)
-                if overutilized:
+                power = self._placement_power(util, capacity_margin_pct)
+                if power is None:
                     # This isn't a valid placement
-                    excluded.append(util)
+                    excluded.add(util)
                 else:
-                    power = self.estimate_from_cpu_util(util, freqs=freqs)
-                    candidates[util] = sum(power.values())
-
-        if not candidates:
-            # The system can't provide full throughput to this workload.
-            raise EnergyModelCapacityError(
-                "Can't handle workload: total capacity = {}".format(
-                    sum(capacities.values())))
+                    candidates[util] = power
 
-        # Whittle down to those that give the lowest energy estimate
-        min_power = min(p for p in iter(candidates.values()))
-        ret = [u for u, p in candidates.items() if p == min_power]
+        return candidates
 
-        logger.debug('done')
-        return ret
+    def _search_placements(self, capacities, capacity_margin_pct):
+        """
+        Same as :meth:`_brute_force_placements`, but only for one ``cpu_utils``
+        of each set of utilizations that are equivalent by symmetry.
+        """
+        logger = self.get_logger()
+        groups = self.symmetric_cpu_groups
+        group_of = {
+            cpu: i
+            for i, group in enumerate(groups)
+            for cpu in group
+        }
+        margin = 100 / (100 - capacity_margin_pct)
+        max_caps = [node.max_capacity for node in self.cpu_nodes]
+
+        def canonical(util):
+            util = list(util)
+            for group in groups:
+                group_utils = sorted((util[cpu] for cpu in group), reverse=True)
+                for cpu, cpu_util in zip(group, group_utils):
+                    util[cpu] = cpu_util
+            return tuple(util)
+
+        # Place the biggest tasks first, so that over-utilized placements are
+        # pruned as early as possible
+        states = {canonical(0 for _ in self.cpus)}
+        for task_util in sorted(capacities.values(), reverse=True):
+            new_states = set()
+            for util in states:
+                tried = set()
+                for cpu in self.cpus:
+                    # All the CPUs of a group with the same utilization lead
+                    # to the same canonical utilization
+                    key = (group_of[cpu], util[cpu])
+                    if key in tried:
+                        continue
+                    tried.add(key)
+
+                    cpu_util = util[cpu] + task_util
+                    # Same conditions as in _guess_freqs(). Utilization can
+                    # only grow, so there is no point in placing the remaining
+                    # tasks.
+                    if cpu_util > self.capacity_scale or cpu_util * margin > max_caps[cpu]:
+                        continue
+
+                    new_util = list(util)
+                    new_util[cpu] = cpu_util
+                    new_states.add(canonical(new_util))
+
+            states = new_states
+
+        logger.debug('Computing the power of {} distinct utilization distributions...'.format(len(states)))
+        candidates = {
+            util: self._placement_power(util, capacity_margin_pct)
+            for util in states
+        }
+        return {
+            util: power
+            for util, power in candidates.items()
+            if power is not None
+        }
 
     @classmethod
     def probe_target(cls, target):
@@ -880,47 +1031,137 @@ class EnergyModel(Serializable, Loggable):
         inputs = inputs.astype(int)
         inputs = df_deduplicate(inputs, keep='first', consecutives=True)
 
-        memo_cache = {}
+        # The energy is only computed once for each distinct state of the
+        # system, and then gathered for the whole trace.
+        states, inverse = np.unique(inputs.values, axis=0, return_inverse=True)
+        inverse = inverse.reshape(-1)
+        nr_cpus = len(self.cpus)
+        nrg = self._estimate_from_states(
+            idle=states[:, :nr_cpus],
+            freqs=states[:, nr_cpus:],
+        )
 
-        def f(input_row):
-            # The code in this module is slow. Try not to call it too much.
-            memo_key = tuple(input_row)
-            if memo_key in memo_cache:
-                return memo_cache[memo_key]
+        # Tuples don't play nicely as pandas column labels because parts of
+        # its API treat that as nested indexing (i.e. df[(0, 1)] sometimes
+        # means df[0][1]). So we'll give them awkward names.
+        nrg = OrderedDict(
+            ('-'.join(str(c) for c in cpus), power[inverse])
+            for cpus, power in nrg.items()
+        )
+        return pd.DataFrame(nrg, index=inputs.index, columns=list(nrg.keys()))
 
-            # cpuidle doesn't understand shared resources so it will claim to
-            # put a CPU into e.g. 'cluster sleep' while its cluster siblings are
-            # active. Rectify those false claims.
-            cpus_active = input_row['idle'] == -1
-            deepest_possible = self._deepest_idle_idxs(cpus_active)
-            idle_idxs = [min(i, j) for i, j in zip(deepest_possible,
-                                                   input_row['idle'])]
+    @staticmethod
+    def _states_idxs(states, values):
+        """
+        Get the index of each of ``values`` in the list ``states``.
 
-            # Convert indexes to state names
-            idle_states = [n.idle_state_by_idx(max(i, 0))
-                           for n, i in zip(self.cpu_nodes, idle_idxs)]
+        :raises KeyError: If a value is not in ``states``.
+        """
+        states = np.asarray(states)
+        sorter = np.argsort(states, kind='mergesort')
+        idxs = np.searchsorted(states, values, sorter=sorter)
+        idxs = sorter[np.clip(idxs, 0, len(states) - 1)]
 
-            # We don't use tracked load, we just treat a CPU as active or idle,
-            # so set util to 0 or 100%.
-            utils = cpus_active * self.capacity_scale
+        unknown = states[idxs] != values
+        if unknown.any():
+            raise KeyError('Unknown states: {}'.format(sorted(set(values[unknown]))))
 
-            nrg = self.estimate_from_cpu_util(cpu_utils=utils,
-                                              idle_states=idle_states,
-                                              freqs=input_row['freq'])
+        return idxs
 
-            # nrg is a dict mapping CPU group tuples to energy values.
-            # Unfortunately tuples don't play nicely as pandas column labels
-            # because parts of its API treat that as nested indexing
-            # (i.e. df[(0, 1)] sometimes means df[0][1]). So we'll give them
-            # awkward names.
+    def _estimate_from_states(self, idle, freqs):
+        """
+        Batch version of :meth:`estimate_from_cpu_util` for the idle and
+        frequency states reported in a trace.
 
-            nrg = {'-'.join(str(c) for c in k): v for k, v in iter(nrg.items())}
+        :param idle: 2D array with one row per system state and one column per
+            CPU, containing the index of the idle state reported by cpuidle,
+            or -1 if the CPU is active.
+        :type idle: numpy.ndarray
 
-            ret = pd.Series(nrg)
-            memo_cache[memo_key] = ret
-            return ret
+        :param freqs: 2D array of frequencies, with the same layout as
+            ``idle``.
+        :type freqs: numpy.ndarray
 
-        return inputs.apply(f, axis=1)
+        :returns: Dict mapping the CPUs of each node to an array of power
+            values, one for each row of the inputs.
+
+        Powers are looked up in tables indexed by the frequency index and idle
+        state index, so that all the states are processed at once.
+        """
+        cpus_active = idle == -1
+
+        # cpuidle doesn't understand shared resources so it will claim to put
+        # a CPU into e.g. 'cluster sleep' while its cluster siblings are
+        # active. Rectify those false claims, like _deepest_idle_idxs().
+        def find_deepest(pd):
+            if pd is None:
+                return np.full(len(idle), -1)
+
+            pd_active = cpus_active[:, list(pd.cpus)].any(axis=1)
+            return np.where(
+                pd_active,
+                -1,
+                find_deepest(pd.parent) + len(pd.idle_states),
+            )
+
+        deepest_possible = np.stack(
+            [find_deepest(pd) for pd in self.cpu_pds],
+            axis=1,
+        )
+        idle_idxs = np.maximum(np.minimum(deepest_possible, idle), 0)
+
+        # We don't use tracked load, we just treat a CPU as active or idle, so
+        # set util to 0 or 100%.
+        cpu_active_time = np.empty(idle.shape)
+        for cpu, node in enumerate(self.cpu_nodes):
+            freq_idxs = self._states_idxs(list(node.active_states.keys()), freqs[:, cpu])
+            caps = np.array([s.capacity for s in node.active_states.values()])
+            cpu_active_time[:, cpu] = np.minimum(
+                cpus_active[:, cpu] * self.capacity_scale / caps[freq_idxs],
+                1.0,
+            )
+
+            nr_idle_states = len(node.idle_states or [])
+            if (idle_idxs[:, cpu] >= nr_idle_states).any():
+                raise KeyError('No idle state with index {} for CPU {}'.format(
+                    idle_idxs[:, cpu].max(), cpu))
+
+        ret = OrderedDict()
+        for node in self.root.iter_nodes():
+            # Some nodes might not have energy model data, they could just be
+            # used to group other nodes (likely the root node, for example).
+            if not node.active_states or not node.idle_states:
+                continue
+
+            cpus = list(node.cpus)
+            # For now we assume topology nodes with energy models do not overlap
+            # with frequency domains
+            freq_idxs = self._states_idxs(list(node.active_states.keys()), freqs[:, cpus[0]])
+            active_powers = np.array([s.power for s in node.active_states.values()])
+
+            active_time = cpu_active_time[:, cpus].max(axis=1)
+            active_power = active_powers[freq_idxs] * active_time
+
+            # Power of the node in the idle state of each CPU, indexed by the
+            # index of the idle state of the CPU
+            idle_power = np.stack(
+                [
+                    np.array([
+                        node.idle_states.get(name, np.NaN)
+                        for name in self.cpu_nodes[cpu].idle_states.keys()
+                    ])[idle_idxs[:, cpu]]
+                    for cpu in cpus
+                ],
+                axis=1,
+            )
+            if np.isnan(idle_power).any():
+                raise KeyError('Node {} does not have all the idle states of its CPUs'.format(node.name or node.cpus))
+
+            idle_power = idle_power.max(axis=1) * (1 - active_time)
+
+            ret[tuple(cpus)] = active_power + idle_power
+
+        return ret
 
     @classmethod
     def _get_idle_states_name(cls, target, cpu):
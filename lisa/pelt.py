@@ -70,6 +70,9 @@ def simulate_pelt(activations, init=0, index=None, clock=None, window=PELT_WINDO
         Also note that the kernel uses integer arithmetic with a different way
         of computing the signal. This means that the simulation cannot
         perfectly match the kernel's signal.
+
+    .. note:: The signal is computed with vectorized operations, and the only
+        sequential part is compiled with :mod:`numba` if it is installed.
     """
     if index is not None:
         activations = activations.reindex(index, method='ffill')
@@ -88,70 +91,114 @@ def simulate_pelt(activations, init=0, index=None, clock=None, window=PELT_WINDO
     # some NaN at the beginning of the dataframe as well
     df.dropna(inplace=True)
 
-    def make_pelt_sim(init, scale, window, half_life):
-        decay = (1 / 2)**(1 / half_life)
-        # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
-        alpha = 1 - decay
-
-        # Accumulator of running time within a PELT window
-        acc = 0
-        # Output signal
-        signal = init / scale
-        output = signal
-
-        def pelt(row):
-            nonlocal acc, signal, output
-
-            # 1=running 0=sleeping
-            running = row['activations']
-            clock = row['clock']
-            delta = row['delta']
-            windows = row['crossed_windows'].astype('int')
-
-            # We crossed one or more windows boundaries
-            if windows:
-                # Handle last piece of the window in which this activation started
-                first_window_fraction = window - ((clock - delta) % window)
-                first_window_fraction /= window
-
-                acc += running * first_window_fraction
-                signal = alpha * acc + (1 - alpha) * signal
-
-                # Handle the windows we fully crossed
-                for _ in range(windows - 1):
-                    signal = alpha * running + (1 - alpha) * signal
-
-                # Handle the current incomplete window
-                last_window_fraction = (clock % window) / window
-
-                # Extrapolate the signal as it would look with the same
-                # `running` state at the end of the current window
-                extrapolated = running * alpha + (1 - alpha) * signal
-                # Take an value between signal and extrapolated based on the
-                # current completion of the window. This implements the same
-                # idea as introduced by kernel commit:
-                #  sched/cfs: Make util/load_avg more stable 625ed2bf049d5a352c1bcca962d6e133454eaaff
-                output = signal + last_window_fraction * (extrapolated - signal)
-
-                signal += alpha * running * last_window_fraction
-                acc = 0
-            # If we are still in the same window, just accumulate the running
-            # time
-            else:
-                acc += running * delta / window
-
-            return output * scale
-
-        return pelt
-
-    sim = make_pelt_sim(
-        init=init,
-        window=window,
-        half_life=half_life,
-        scale=scale,
+    decay = (1 / 2)**(1 / half_life)
+    # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
+    alpha = 1 - decay
+
+    # 1=running 0=sleeping
+    running = df['activations'].values.astype(np.float64)
+    clock = df['clock'].values.astype(np.float64)
+    delta = df['delta'].values.astype(np.float64)
+    windows = df['crossed_windows'].values.astype(np.float64)
+
+    # Rows where we crossed one or more windows boundaries. The signal is only
+    # updated on these rows, otherwise the running time is just accumulated.
+    crossing = windows != 0
+    windows = windows[crossing]
+    crossing_running = running[crossing]
+
+    # Running time accumulated since the last crossed boundary, as a fraction
+    # of the window
+    acc = np.where(crossing, 0, running * delta / window).cumsum()[crossing]
+    acc[1:] -= acc[:-1].copy()
+
+    # Handle last piece of the window in which this activation started
+    clock_ = clock[crossing]
+    delta_ = delta[crossing]
+    first_window_fraction = (window - ((clock_ - delta_) % window)) / window
+    acc += crossing_running * first_window_fraction
+
+    # Fraction of the current incomplete window
+    last_window_fraction = (clock_ % window) / window
+
+    # Each row updates the signal with:
+    #   signal = decay ** windows * signal + b
+    # which accounts for:
+    # * the end of the window in which the activation started
+    # * the windows fully crossed, since each window applies
+    #   signal = alpha * running + decay * signal
+    # * the beginning of the current incomplete window
+    full_decay = decay ** (windows - 1)
+    b = (
+        full_decay * alpha * acc
+        + crossing_running * (1 - full_decay)
+        + alpha * crossing_running * last_window_fraction
     )
-    df['pelt'] = df.apply(sim, axis=1)
-    return df['pelt']
+    signal = _pelt_scan(init / scale, windows, b, decay)
+
+    # Signal at the end of the last fully crossed window
+    signal -= alpha * crossing_running * last_window_fraction
+    # Extrapolate the signal as it would look with the same `running` state
+    # at the end of the current window, and take a value between signal and
+    # extrapolated based on the current completion of the window. This
+    # implements the same idea as introduced by kernel commit:
+    #  sched/cfs: Make util/load_avg more stable 625ed2bf049d5a352c1bcca962d6e133454eaaff
+    output = signal + last_window_fraction * alpha * (crossing_running - signal)
+
+    # Rows that did not cross a window boundary keep the last output
+    last_crossing = np.cumsum(crossing) - 1
+    output = np.append(output, init / scale)[last_crossing]
+
+    return pd.Series(output * scale, index=df.index, name='pelt')
+
+
+def _pelt_scan_python(init, windows, b, decay):
+    """
+    Compute the recurrence ``signal = decay ** windows * signal + b``, one
+    element at a time. This is compiled with :mod:`numba` when available.
+    """
+    signal = init
+    out = np.empty_like(b)
+    for i in range(len(b)):
+        signal = decay ** windows[i] * signal + b[i]
+        out[i] = signal
+    return out
+
+
+def _pelt_scan_numpy(init, windows, b, decay):
+    """
+    Same as :func:`_pelt_scan_python` with vectorized operations.
+
+    The closed form of the recurrence involves ``decay ** -sum(windows)``,
+    so it is computed on blocks that are small enough to not overflow.
+    """
+    out = np.empty_like(b)
+    exponent = np.cumsum(windows)
+    # Largest exponent such as decay ** -max_exponent <= 2 ** 500
+    max_exponent = 500 * math.log(2) / -math.log(decay)
+
+    signal = init
+    first = 0
+    while first < len(b):
+        end = np.searchsorted(exponent, exponent[first] + max_exponent, side='right')
+        rel_exponent = exponent[first:end] - exponent[first]
+
+        terms = b[first:end] * decay ** -rel_exponent
+        terms[0] = decay ** windows[first] * signal + b[first]
+        out[first:end] = decay ** rel_exponent * np.cumsum(terms)
+
+        signal = out[end - 1]
+        first = end
+
+    return out
+
+
+try:
+    import numba
+except ImportError:
+    _pelt_scan = _pelt_scan_numpy
+else:
+    _pelt_scan = numba.njit(cache=True)(_pelt_scan_python)
 
 
 def pelt_settling_time(margin=1, init=0, final=PELT_SCALE, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
@@ -30,13 +30,23 @@ import os
 import os.path
 import json
 import warnings
+import logging
 import inspect
 import shlex
 import contextlib
 import tempfile
+import itertools
+import subprocess
+import mmap
+import struct
+import functools
+import hashlib
+import fcntl
+import threading
 from functools import reduce, wraps
 from collections.abc import Iterable, Set, Mapping, Sequence
 from collections import namedtuple
+import operator
 from operator import itemgetter
 from numbers import Number, Integral, Real
 import multiprocessing
@@ -44,7 +54,10 @@ import textwrap
 
 import numpy as np
 import pandas as pd
+import pyarrow
+import pyarrow.ipc
 import pyarrow.lib
+import pyarrow.parquet
 
 import trappy
 import devlib
@@ -53,7 +66,7 @@ from devlib.target import KernelVersion
 import lisa.utils
 from lisa.utils import Loggable, HideExekallID, memoized, deduplicate, deprecate, nullcontext, measure_time, checksum, newtype
 from lisa.conf import SimpleMultiSrcConf, KeyDesc, TopLevelKeyDesc, TypedList, Configurable
-from lisa.datautils import df_split_signals, df_window, df_window_signals, SignalDesc, df_add_delta
+from lisa.datautils import df_split_signals, df_window, df_window_signals, SignalDesc, df_add_delta, df_compact, accumulate
 from lisa.version import VERSION_TOKEN
 from lisa.typeclass import FromString, IntListFromStringInstance
 
@@ -203,6 +216,32 @@ class TraceBase(abc.ABC):
         """
         pass
 
+    def accumulate(self, accumulators, **kwargs):
+        """
+        Update the given accumulators in a single pass over the trace.
+
+        :param accumulators: Accumulators to update.
+        :type accumulators: list(lisa.datautils.Accumulator)
+
+        :Variable keyword arguments: Forwarded to :meth:`iter_events`.
+
+        :returns: The list of the results of the accumulators.
+
+        Since the events are processed in chunks, computing several
+        aggregations this way does not require to load the whole dataframes
+        in memory, and the trace is only read once::
+
+            from lisa.datautils import CountAccumulator
+
+            nr_switches, nr_wakeups = trace.accumulate([
+                CountAccumulator('sched_switch', by='__cpu'),
+                CountAccumulator('sched_wakeup', by='target_cpu'),
+            ])
+        """
+        accumulators = list(accumulators)
+        events = {acc.event for acc in accumulators}
+        return accumulate(self.iter_events(events, **kwargs), accumulators)
+
     def __getitem__(self, window):
         if not isinstance(window, slice):
             raise TypeError("Cropping window must be an instance of slice")
@@ -376,6 +415,25 @@ class TraceView(Loggable, TraceBase):
 
         return self.base_trace.df_events(event, **kwargs)
 
+    def iter_events(self, events, **kwargs):
+        """
+        Iterate over time-ordered chunks of the specified trace events in the
+        sliced trace.
+
+        :param events: Trace events names.
+        :type events: list(str)
+
+        :Variable keyword arguments: Forwarded to
+            :meth:`lisa.trace.Trace.iter_events`.
+        """
+        try:
+            window = kwargs['window']
+        except KeyError:
+            window = (self.start, self.end)
+        kwargs['window'] = window
+
+        return self.base_trace.iter_events(events, **kwargs)
+
     def get_view(self, window, **kwargs):
         start = self.start
         end = self.end
@@ -599,6 +657,11 @@ class PandasDataSwapEntry:
     :param name: Name of the entry. If ``None``, a random UUID will be
         generated.
     :type name: str or None
+
+    :param fmt: Format of the data file, see
+        :attr:`TraceCache.DATAFRAME_SWAP_FORMAT`. If ``None``, the default
+        format of :class:`TraceCache` is used.
+    :type fmt: str or None
     """
 
     META_EXTENSION = '.meta'
@@ -606,9 +669,10 @@ class PandasDataSwapEntry:
     Extension used by the metadata file of the swap entry in the swap.
     """
 
-    def __init__(self, pd_desc_nf, name=None):
+    def __init__(self, pd_desc_nf, name=None, fmt=None):
         self.pd_desc_nf = pd_desc_nf
         self.name = name or uuid.uuid4().hex
+        self.fmt = fmt or TraceCache.DATAFRAME_SWAP_FORMAT
 
     @property
     def meta_filename(self):
@@ -622,7 +686,7 @@ class PandasDataSwapEntry:
         """
         Filename of the pandas data file in the swap.
         """
-        return '{}{}'.format(self.name, TraceCache.DATAFRAME_SWAP_EXTENSION)
+        return '{}.{}'.format(self.name, self.fmt)
 
     def to_json_map(self):
         """
@@ -631,6 +695,7 @@ class PandasDataSwapEntry:
         return {
             'version-token': VERSION_TOKEN,
             'name': self.name,
+            'format': self.fmt,
             'desc': self.pd_desc_nf.to_json_map(),
         }
 
@@ -644,7 +709,8 @@ class PandasDataSwapEntry:
 
         pd_desc_nf = PandasDataDescNF.from_json_map(mapping['desc'])
         name = mapping['name']
-        return cls(pd_desc_nf=pd_desc_nf, name=name)
+        fmt = mapping['format']
+        return cls(pd_desc_nf=pd_desc_nf, name=name, fmt=fmt)
 
     def to_path(self, path):
         """
@@ -674,7 +740,192 @@ class TraceCacheSwapVersionError(ValueError):
     pass
 
 
-class TraceCache:
+class SharedSwapStore:
+    """
+    Host-wide swap area shared by the :class:`TraceCache` of all the traces.
+
+    :param path: Folder of the store. It can be shared between users, in
+        which case the permissions of that folder control who can use it.
+    :type path: str
+
+    :param max_size: Maximum size of the store in bytes. When exceeded, the
+        least recently used files are discarded. If ``None``, the size is not
+        limited.
+    :type max_size: int or None
+
+    The files are content addressed: their name is a hash of the MD5 of the
+    trace file and of the descriptor of the data. Copies of the same trace
+    located in different folders therefore share the same entries.
+
+    Files are added to the store atomically, so they can be read without any
+    locking. Adding files and discarding the least recently used ones is done
+    while holding an exclusive lock on the store, so that multiple processes
+    can use it concurrently.
+
+    The size of the store is scanned once, and then updated as files are
+    added by this instance. The store is only scanned again to discard files
+    when that size exceeds ``max_size``. Files added by other processes are
+    therefore only accounted for at the next scan.
+    """
+
+    LOCK_FILENAME = '.lock'
+    """
+    Name of the lock file in the store folder.
+    """
+
+    TMP_EXTENSION = '.tmp'
+    """
+    Extension of the files being added to the store.
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = os.path.abspath(path)
+        self.max_size = max_size if max_size is not None else math.inf
+        os.makedirs(self.path, exist_ok=True)
+        # Size of the store, as seen by this instance
+        self._size = None
+
+    @contextlib.contextmanager
+    def _lock(self):
+        path = os.path.join(self.path, self.LOCK_FILENAME)
+        with open(path, 'a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    @staticmethod
+    def make_key(trace_md5, pd_desc_nf, fmt):
+        """
+        Make the key of an entry of the store.
+
+        :param trace_md5: MD5 checksum of the trace file.
+        :type trace_md5: str
+
+        :param pd_desc_nf: Normal form of the descriptor of the data.
+        :type pd_desc_nf: PandasDataDescNF
+
+        :param fmt: Data storage format, see
+            :attr:`TraceCache.DATAFRAME_SWAP_FORMAT`.
+        :type fmt: str
+        """
+        mapping = {
+            'version-token': VERSION_TOKEN,
+            'trace-md5': trace_md5,
+            'desc': pd_desc_nf.to_json_map(),
+            'format': fmt,
+        }
+        data = json.dumps(mapping, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    def _path_of(self, key, fmt):
+        # Spread the files in sub-folders to keep the folders small
+        return os.path.join(self.path, key[:2], '{}.{}'.format(key, fmt))
+
+    def get_path(self, key, fmt):
+        """
+        Get the path of the data file of the given key, and mark it as
+        recently used.
+
+        :raises KeyError: If there is no such entry in the store.
+        """
+        path = self._path_of(key, fmt)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            raise KeyError(key)
+        # Files created by other users can only be used as-is
+        except PermissionError:
+            pass
+
+        return path
+
+    def add(self, key, fmt, src):
+        """
+        Add a data file to the store. The file is hard linked if possible,
+        otherwise copied.
+
+        :param key: Key of the entry, see :meth:`make_key`.
+        :type key: str
+
+        :param fmt: Data storage format.
+        :type fmt: str
+
+        :param src: Path to the data file to add.
+        :type src: str
+        """
+        try:
+            self.get_path(key, fmt)
+        except KeyError:
+            pass
+        else:
+            return
+
+        path = self._path_of(key, fmt)
+        tmp_path = '{}.{}{}'.format(path, uuid.uuid4().hex, self.TMP_EXTENSION)
+        with self._lock():
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            try:
+                os.link(src, tmp_path)
+            except OSError:
+                shutil.copyfile(src, tmp_path)
+            os.replace(tmp_path, path)
+
+        if self._size is not None:
+            self._size += os.stat(path).st_size
+
+    def _get_stats(self):
+        return {
+            dir_entry.path: dir_entry.stat()
+            for subdir in os.scandir(self.path)
+            if subdir.is_dir()
+            for dir_entry in os.scandir(subdir.path)
+            if not dir_entry.name.endswith(self.TMP_EXTENSION)
+        }
+
+    def scrub(self):
+        """
+        Discard the least recently used files until the size of the store is
+        below ``max_size``.
+
+        This is a no-op until the size of the store exceeds ``max_size``.
+        """
+        if self.max_size == math.inf:
+            return
+
+        if self._size is None:
+            self._size = sum(
+                stat.st_size
+                for stat in self._get_stats().values()
+            )
+
+        if self._size <= self.max_size:
+            return
+
+        with self._lock():
+            stats = self._get_stats()
+
+            def by_mtime(path_stat):
+                path, stat = path_stat
+                return stat.st_mtime
+
+            total_size = sum(stat.st_size for stat in stats.values())
+            for path, stat in sorted(stats.items(), key=by_mtime):
+                if total_size <= self.max_size:
+                    break
+
+                # Processes that already opened the file are not impacted
+                try:
+                    os.unlink(path)
+                except FileNotFoundError:
+                    pass
+                total_size -= stat.st_size
+
+            self._size = total_size
+
+
+class TraceCache(Loggable):
     """
     Cache of a :class:`Trace`.
 
@@ -699,12 +950,22 @@ class TraceCache:
         if the file changed.
     :type trace_md5: str or None
 
+    :param trace_id: Cheap identifier of the trace file content, as returned
+        by :meth:`get_trace_id`. It allows validating the swap area without
+        reading the whole trace file.
+    :type trace_id: dict or None
+
     :param metadata: Metadata mapping to store in the swap area.
     :type metadata: dict or None
 
     :param swap_content: Initial content of the swap area.
     :type swap_content: dict(PandasDataDescNF, PandasDataSwapEntry) or None
 
+    :param shared_swap: Host-wide swap area shared with other traces. Data
+        written to the swap area are also added to it, and it is looked up
+        when some data cannot be found in the swap area.
+    :type shared_swap: SharedSwapStore or None
+
     The cache manages both the :class:`pandas.DataFrame` and
     :class:`pandas.Series` generated in memory and a swap area used to evict
     them, and to reload them quickly.
@@ -725,20 +986,47 @@ class TraceCache:
 
     DATAFRAME_SWAP_FORMAT = 'parquet'
     """
-    Data storage format used to swap.
+    Data storage format used to swap, among:
+
+        * ``parquet``: Snappy-compressed Parquet files. This is the default.
+        * ``feather``: Uncompressed Arrow IPC files (Feather V2). They are
+          loaded using :func:`pyarrow.memory_map`, so the column buffers that
+          can be used as-is by :mod:`pandas` are shared through the page cache
+          between all the processes using the same swap area. Loading is
+          therefore almost free, but the dataframes reloaded from the swap are
+          read-only: assigning to them raises a :exc:`ValueError`. This format
+          must therefore be opted-in by subclassing :class:`TraceCache` or
+          setting this attribute, and only when the dataframes are not
+          modified in place.
+
+    The format is also used as file extension.
+    """
+
+    TRACE_ID_SAMPLES = 8
+    """
+    Number of blocks sampled in the middle of the trace file by
+    :meth:`get_trace_id`, in addition to the first and last blocks.
+    """
+
+    TRACE_ID_BLOCK_SIZE = 64 * 1024
+    """
+    Size of the blocks sampled by :meth:`get_trace_id`.
     """
 
-    DATAFRAME_SWAP_EXTENSION = '.{}'.format(DATAFRAME_SWAP_FORMAT)
+    PARQUET_ROW_GROUP_SIZE = 64 * 1024
     """
-    File extension of the data swap format.
+    Number of rows in each row group of Parquet swap files. The statistics of
+    the index stored for each group allow only reading the groups overlapping
+    with a given window.
     """
 
-    def __init__(self, max_mem_size=None, trace_path=None, trace_md5=None, swap_dir=None, max_swap_size=None, swap_content=None, metadata=None):
+    def __init__(self, max_mem_size=None, trace_path=None, trace_md5=None, swap_dir=None, max_swap_size=None, swap_content=None, metadata=None, shared_swap=None, trace_id=None):
         self._cache = {}
         self._data_cost = {}
         self._swap_content = swap_content or {}
         self._pd_desc_swap_filename = {}
         self.swap_cost = self.INIT_SWAP_COST
+        self._swap_cost_from_load = False
         self.swap_dir = swap_dir
         self.max_swap_size = max_swap_size if max_swap_size is not None else math.inf
         self._swap_size = self._get_swap_size()
@@ -749,6 +1037,10 @@ class TraceCache:
 
         self.trace_path = os.path.abspath(trace_path)
         self._trace_md5 = trace_md5
+        self._trace_id = trace_id
+        self._md5_thread = None
+        self._computed_md5 = None
+        self.shared_swap = shared_swap
 
     @property
     @memoized
@@ -797,14 +1089,129 @@ class TraceCache:
 
     @property
     def trace_md5(self):
+        """
+        MD5 checksum of the trace file.
+
+        .. note:: If the swap area was validated using :meth:`get_trace_id`,
+            this is the checksum recorded in the swap area until the checksum
+            computed in the background is available.
+        """
+        self._check_trace_md5()
         md5 = self._trace_md5
         if md5 is None:
-            with open(self.trace_path, 'rb') as f:
-                md5 = checksum(f, 'md5')
-            self._trace_md5 = md5
+            thread = self._md5_thread
+            if thread is None:
+                with open(self.trace_path, 'rb') as f:
+                    md5 = checksum(f, 'md5')
+                self._trace_md5 = md5
+            else:
+                thread.join()
+                self._check_trace_md5()
+                md5 = self._trace_md5
 
         return md5
 
+    @property
+    def trace_id(self):
+        """
+        Cheap identifier of the trace file content, see :meth:`get_trace_id`.
+        """
+        trace_id = self._trace_id
+        if trace_id is None:
+            trace_id = self.get_trace_id(self.trace_path)
+            self._trace_id = trace_id
+
+        return trace_id
+
+    @classmethod
+    def get_trace_id(cls, path):
+        """
+        Get a cheap identifier of the content of a trace file.
+
+        It is made of the size, modification time and inode number of the file,
+        along with the MD5 checksum of its first and last blocks and of
+        :attr:`TRACE_ID_SAMPLES` blocks evenly spread in the file.
+
+        :param path: Path to the trace file.
+        :type path: str
+        """
+        stat = os.stat(path)
+        size = stat.st_size
+        block_size = cls.TRACE_ID_BLOCK_SIZE
+        nr_samples = cls.TRACE_ID_SAMPLES
+
+        offsets = {0, max(size - block_size, 0)}
+        offsets.update(
+            size * i // (nr_samples + 1)
+            for i in range(1, nr_samples + 1)
+        )
+
+        h = hashlib.md5()
+        with open(path, 'rb') as f:
+            for offset in sorted(offsets):
+                f.seek(offset)
+                h.update(f.read(block_size))
+
+        return {
+            'size': size,
+            'mtime-ns': stat.st_mtime_ns,
+            'inode': stat.st_ino,
+            'sampled-md5': h.hexdigest(),
+        }
+
+    def _start_md5_check(self):
+        """
+        Compute the MD5 checksum of the trace file in a background thread.
+        :meth:`_check_trace_md5` will then invalidate the cache if it does not
+        match :attr:`trace_md5`.
+        """
+        def compute():
+            try:
+                with open(self.trace_path, 'rb') as f:
+                    self._computed_md5 = checksum(f, 'md5')
+            except OSError:
+                pass
+
+        thread = threading.Thread(target=compute, daemon=True)
+        thread.start()
+        self._md5_thread = thread
+
+    def _check_trace_md5(self):
+        """
+        Once the background computation of the MD5 checksum of the trace is
+        over, invalidate the cache if it does not match the one recorded in
+        the swap area.
+        """
+        thread = self._md5_thread
+        if thread is None or thread.is_alive():
+            return
+
+        self._md5_thread = None
+        md5 = self._computed_md5
+        if md5 is None:
+            return
+
+        if self._trace_md5 is not None and md5 != self._trace_md5:
+            self.get_logger().warning('Trace file changed since its swap area was created, invalidating the cache: {}'.format(self.trace_path))
+            self._invalidate()
+
+        self._trace_md5 = md5
+        self.to_swap_dir()
+
+    def _invalidate(self):
+        """
+        Discard all the data in memory and in the swap area.
+        """
+        self._cache.clear()
+        self._data_cost.clear()
+        self._swap_content.clear()
+        self._metadata.clear()
+        self._trace_id = None
+        if self.swap_dir:
+            shutil.rmtree(self.swap_dir)
+            os.makedirs(self.swap_dir)
+        self._swap_size = 0
+
     def update_metadata(self, metadata):
         """
         Update the metadata mapping with the given ``metadata`` mapping and
@@ -833,7 +1240,10 @@ class TraceCache:
             'version-token': VERSION_TOKEN,
             'metadata': self._metadata,
             'trace-path': trace_path,
-            'trace-md5': self.trace_md5,
+            # Do not force computing the MD5 checksum, the trace ID is enough to
+            # validate the swap area.
+            'trace-md5': self._trace_md5,
+            'trace-id': self.trace_id,
         }
 
     def to_path(self, path):
@@ -846,7 +1256,7 @@ class TraceCache:
             f.write('\n')
 
     @classmethod
-    def _from_swap_dir(cls, swap_dir, trace_path=None, metadata=None, **kwargs):
+    def _from_swap_dir(cls, swap_dir, trace_path=None, metadata=None, fast_validation=True, **kwargs):
         metapath = os.path.join(swap_dir, cls.TRACE_META_FILENAME)
 
         with open(metapath) as f:
@@ -860,20 +1270,29 @@ class TraceCache:
 
         metadata = metadata or {}
 
+        old_md5 = mapping['trace-md5']
         try:
-            with open(swap_trace_path, 'rb') as f:
-                new_md5 = checksum(f, 'md5')
+            new_id = cls.get_trace_id(swap_trace_path)
         except FileNotFoundError:
-            new_md5 = None
+            new_id = None
 
-        if trace_path and not os.path.samefile(swap_trace_path, trace_path):
+        check_md5 = False
+        if new_id is None:
             invalid_swap = True
+            new_md5 = None
+        elif trace_path and not os.path.samefile(swap_trace_path, trace_path):
+            invalid_swap = True
+            new_md5 = None
+        # If the file looks the same, trust the recorded checksum until
+        # the actual one is computed in the background
+        elif fast_validation and mapping.get('trace-id') == new_id:
+            invalid_swap = False
+            new_md5 = old_md5
+            check_md5 = True
         else:
-            if new_md5 is None:
-                invalid_swap = True
-            else:
-                old_md5 = mapping['trace-md5']
-                invalid_swap = (old_md5 != new_md5)
+            with open(swap_trace_path, 'rb') as f:
+                new_md5 = checksum(f, 'md5')
+            invalid_swap = (old_md5 != new_md5)
 
         if invalid_swap:
             # Remove the invalid swap and create a fresh directory
@@ -896,14 +1315,19 @@ class TraceCache:
                     except Exception:
                         continue
                     else:
-                        yield (swap_entry.pd_desc_nf, swap_entry)
+                        # Entries written in another format cannot be read
+                        if swap_entry.fmt == cls.DATAFRAME_SWAP_FORMAT:
+                            yield (swap_entry.pd_desc_nf, swap_entry)
 
             swap_content = dict(load_swap_content(swap_dir))
 
             metadata_ = mapping['metadata']
             metadata = {**metadata_, **metadata}
 
-        return cls(swap_content=swap_content, swap_dir=swap_dir, metadata=metadata, trace_path=trace_path, trace_md5=new_md5, **kwargs)
+        cache = cls(swap_content=swap_content, swap_dir=swap_dir, metadata=metadata, trace_path=trace_path, trace_md5=new_md5, trace_id=new_id, **kwargs)
+        if check_md5 or new_md5 is None:
+            cache._start_md5_check()
+        return cache
 
     def to_swap_dir(self):
         """
@@ -913,20 +1337,44 @@ class TraceCache:
             path = os.path.join(self.swap_dir, self.TRACE_META_FILENAME)
             self.to_path(path)
 
+    def sync(self):
+        """
+        Wait for the background check of the trace file and write the
+        persistent state to the swap area, so that other processes can use
+        it.
+        """
+        thread = self._md5_thread
+        if thread is not None:
+            thread.join()
+        self._check_trace_md5()
+        self.to_swap_dir()
+
     @classmethod
-    def from_swap_dir(cls, swap_dir, **kwargs):
+    def from_swap_dir(cls, swap_dir, fast_validation=True, **kwargs):
         """
         Reload the persistent state from the given ``swap_dir``.
 
+        :param fast_validation: If ``True``, the swap area is considered valid
+            if the trace file has the same :meth:`get_trace_id` identifier as
+            when the swap area was written. The MD5 checksum of the trace file
+            is then computed in a background thread, and the cache is
+            invalidated if it does not match. Otherwise, the checksum is
+            computed upfront, which requires reading the whole trace file.
+        :type fast_validation: bool
+
         :Variable keyword arguments: Forwarded to :class:`TraceCache`.
         """
         if swap_dir:
             try:
-                return cls._from_swap_dir(swap_dir=swap_dir, **kwargs)
+                return cls._from_swap_dir(swap_dir=swap_dir, fast_validation=fast_validation, **kwargs)
             except (FileNotFoundError, TraceCacheSwapVersionError, json.decoder.JSONDecodeError):
                 pass
 
-        return cls(swap_dir=swap_dir, **kwargs)
+        cache = cls(swap_dir=swap_dir, **kwargs)
+        # Record the checksum in the swap area once it is available
+        if swap_dir and cache._trace_md5 is None:
+            cache._start_md5_check()
+        return cache
 
     def _estimate_data_swap_cost(self, data):
         return self._estimate_data_swap_size(data) * self.swap_cost
@@ -974,8 +1422,37 @@ class TraceCache:
         else:
             raise ValueError('Swap dir is not setup')
 
-    def _update_swap_cost(self, data, swap_cost, mem_usage, swap_size):
+    def _shared_swap_key(self, pd_desc):
+        return self.shared_swap.make_key(
+            self.trace_md5,
+            pd_desc.normal_form,
+            self.DATAFRAME_SWAP_FORMAT,
+        )
+
+    def _shared_swap_path_of(self, pd_desc):
+        if self.shared_swap is None:
+            raise KeyError(pd_desc)
+        else:
+            key = self._shared_swap_key(pd_desc)
+            return self.shared_swap.get_path(key, self.DATAFRAME_SWAP_FORMAT)
+
+    def _update_swap_cost(self, data, swap_cost, mem_usage, swap_size, load=False):
+        """
+        Update the estimated cost of reloading data from the swap.
+
+        :param load: ``True`` if ``swap_cost`` is the time spent loading the
+            data, ``False`` if it is the time spent writing it. Write costs are
+            only used until the first load is measured.
+        :type load: bool
+        """
+        if self._swap_cost_from_load and not load:
+            return
+
         unbiased_swap_size = self._unbias_swap_size(data, swap_size)
+        # If size <= 0, the dataframe is so small that it's basically just noise
+        if unbiased_swap_size <= 0:
+            return
+
         # Take out from the swap cost the time it took to write the overhead
         # that comes with the file format, assuming the cost is
         # proportional to amount of data written in the swap.
@@ -983,7 +1460,11 @@ class TraceCache:
 
         new_cost = swap_cost / mem_usage
 
-        override = self.swap_cost == self.INIT_SWAP_COST
+        override = (
+            self.swap_cost == self.INIT_SWAP_COST or
+            (load and not self._swap_cost_from_load)
+        )
+        self._swap_cost_from_load |= load
         # EWMA to keep a relatively stable cost
         self._update_ewma('swap_cost', new_cost, override=override)
 
@@ -993,11 +1474,161 @@ class TraceCache:
     @classmethod
     def _write_data(cls, data, path):
         if cls.DATAFRAME_SWAP_FORMAT == 'parquet':
-            # Snappy compression seems very fast
-            data.to_parquet(path, compression='snappy', index=True)
+            # Snappy compression seems very fast. Small row groups allow
+            # reading only a part of the file when a window is asked for.
+            data.to_parquet(
+                path,
+                compression='snappy',
+                index=True,
+                row_group_size=cls.PARQUET_ROW_GROUP_SIZE,
+            )
+        elif cls.DATAFRAME_SWAP_FORMAT == 'feather':
+            # No compression, so that the file can be memory mapped
+            table = pyarrow.Table.from_pandas(data, preserve_index=True)
+            with pyarrow.ipc.new_file(path, table.schema) as writer:
+                writer.write_table(table)
+        else:
+            raise ValueError('Dataframe swap format "{}" not handled'.format(cls.DATAFRAME_SWAP_FORMAT))
+
+    @classmethod
+    def _read_data(cls, path, window=None, columns=None):
+        """
+        Read data from the swap.
+
+        :param window: If not ``None``, only the rows selected by
+            ``df_window(data, window, method='pre')`` are returned, and only
+            the part of the file needed to get them is read.
+        :type window: tuple(float, float) or None
+
+        :param columns: If not ``None``, only these columns are read, along
+            with the index.
+        :type columns: list(str) or None
+        """
+        if cls.DATAFRAME_SWAP_FORMAT == 'parquet':
+            if window is None and columns is None:
+                return pd.read_parquet(path, memory_map=True)
+            else:
+                table = cls._read_parquet_table(path, window, columns)
+        elif cls.DATAFRAME_SWAP_FORMAT == 'feather':
+            # The Arrow buffers keep the mapping alive, and split_blocks allows
+            # pandas to use them without any copy when possible.
+            table = pyarrow.ipc.open_file(pyarrow.memory_map(path)).read_all()
+            index_col = cls._get_index_column(table.schema.metadata)
+
+            # Slicing a table does not copy anything, so this only costs the
+            # binary search on the memory mapped index.
+            if window is not None and index_col is not None:
+                index = table.column(index_col).to_numpy()
+                start, stop = cls._get_window_bounds(index, window)
+                table = table.slice(start, stop - start)
+
+            if columns is not None:
+                keep = set(columns) | {index_col}
+                fields = [
+                    field
+                    for field in table.schema
+                    if field.name in keep
+                ]
+                table = pyarrow.Table.from_arrays(
+                    [table.column(field.name) for field in fields],
+                    # Keep the pandas metadata so the index is restored
+                    schema=pyarrow.schema(fields, metadata=table.schema.metadata),
+                )
         else:
             raise ValueError('Dataframe swap format "{}" not handled'.format(cls.DATAFRAME_SWAP_FORMAT))
 
+        data = table.to_pandas(split_blocks=True)
+        if window is not None:
+            data = df_window(data, window, method='pre')
+        return data
+
+    @classmethod
+    def _read_parquet_table(cls, path, window, columns):
+        """
+        Read the row groups of a Parquet file that can contain rows selected by
+        ``df_window(data, window, method='pre')``, based on the statistics of
+        the index column.
+        """
+        parquet_file = pyarrow.parquet.ParquetFile(path, memory_map=True)
+        metadata = parquet_file.metadata
+        row_groups = list(range(metadata.num_row_groups))
+        index_col = cls._get_index_column(metadata.metadata)
+
+        def get_min(row_group):
+            for i in range(row_group.num_columns):
+                col = row_group.column(i)
+                if col.path_in_schema == index_col:
+                    stats = col.statistics
+                    if stats is not None and stats.has_min_max:
+                        return stats.min
+                    else:
+                        return None
+            return None
+
+        if window is not None and index_col is not None and row_groups:
+            mins = [
+                get_min(metadata.row_group(i))
+                for i in row_groups
+            ]
+            if None not in mins:
+                start, stop = cls._get_window_bounds(np.array(mins), window)
+                row_groups = row_groups[start:stop]
+
+        return parquet_file.read_row_groups(
+            row_groups,
+            columns=columns,
+            use_pandas_metadata=True,
+        )
+
+    @staticmethod
+    def _get_index_column(metadata):
+        """
+        Get the name of the column holding the index of a
+        :class:`pandas.DataFrame` stored by :mod:`pyarrow`, or ``None`` if the
+        index is not stored as a single column.
+
+        :param metadata: Metadata of the Arrow schema or Parquet file.
+        :type metadata: dict(bytes, bytes)
+        """
+        try:
+            pandas_meta = json.loads(metadata[b'pandas'].decode('utf-8'))
+        except (KeyError, TypeError, ValueError):
+            return None
+
+        index_cols = pandas_meta.get('index_columns', [])
+        if len(index_cols) == 1 and isinstance(index_cols[0], str):
+            return index_cols[0]
+        else:
+            return None
+
+    @staticmethod
+    def _get_window_bounds(index, window):
+        """
+        Get the ``(start, stop)`` bounds of the positions in the sorted
+        ``index`` containing the rows selected by ``df_window(data, window,
+        method='pre')``.
+
+        .. note:: ``index`` can also be the first index value of consecutive
+            chunks of data, in which case the bounds select the chunks.
+        """
+        start, end = window
+        size = len(index)
+
+        if start is None:
+            first = 0
+        else:
+            # Last row at or before the start of the window
+            first = max(np.searchsorted(index, start, side='right') - 1, 0)
+
+        if end is None:
+            stop = size
+        else:
+            stop = np.searchsorted(index, end, side='right')
+
+        # df_window() clips the window, so that at least one row is selected
+        stop = min(max(stop, first + 1), size)
+        return (int(first), int(stop))
+
     def _write_swap(self, pd_desc, data):
         if not self.swap_dir:
             return
@@ -1006,7 +1637,7 @@ class TraceCache:
                 return
 
             pd_desc_nf = pd_desc.normal_form
-            swap_entry = PandasDataSwapEntry(pd_desc_nf)
+            swap_entry = PandasDataSwapEntry(pd_desc_nf, fmt=self.DATAFRAME_SWAP_FORMAT)
 
             df_path = os.path.join(self.swap_dir, swap_entry.data_filename)
 
@@ -1014,7 +1645,7 @@ class TraceCache:
             if self._estimate_data_swap_size(data) + self._swap_size > self.max_swap_size:
                 self.scrub_swap()
 
-            # Write the Parquet file and update the write speed
+            # Write the data file and update the write speed
             with measure_time() as measure:
                 self._write_data(data, df_path)
 
@@ -1023,9 +1654,13 @@ class TraceCache:
             swap_entry.to_path(swap_entry_path)
             self._swap_content[swap_entry.pd_desc_nf] = swap_entry
 
-            # Assume that reading from the swap will take as much time as
-            # writing to it. We cannot do better anyway, but that should
-            # mostly bias to keeping things in memory if possible.
+            if self.shared_swap is not None:
+                key = self._shared_swap_key(pd_desc)
+                self.shared_swap.add(key, self.DATAFRAME_SWAP_FORMAT, df_path)
+
+            # Until some data is actually reloaded from the swap, assume that
+            # reading from the swap will take as much time as writing to it.
+            # That should mostly bias to keeping things in memory if possible.
             swap_cost = measure.exclusive_delta
             data_swapped_size = os.stat(df_path).st_size
 
@@ -1047,7 +1682,8 @@ class TraceCache:
 
     def scrub_swap(self):
         """
-        Scrub the swap area to remove old files if the storage size limit is exceeded.
+        Scrub the swap area to remove old files if the storage size limit is
+        exceeded. The shared swap area is scrubbed as well.
         """
         # TODO: Load the file information from __init__ by discovering the swap
         # area's content to avoid doing it each time here
@@ -1107,7 +1743,10 @@ class TraceCache:
                 for swap_entry in self._swap_content.values()
             )
 
-    def fetch(self, pd_desc, insert=True):
+        if self.shared_swap is not None:
+            self.shared_swap.scrub()
+
+    def fetch(self, pd_desc, insert=True, window=None, columns=None):
         """
         Fetch an entry from the cache or the swap.
 
@@ -1117,31 +1756,61 @@ class TraceCache:
         :param insert: If ``True`` and if the fetch succeeds by loading the
             swap, the data is inserted in the cache.
         :type insert: bool
+
+        :param window: If not ``None``, only return the rows selected by
+            ``df_window(data, window, method='pre')``. When loading from the
+            swap, only the relevant part of the file is read.
+        :type window: tuple(float, float) or None
+
+        :param columns: If not ``None``, only return these columns. When
+            loading from the swap, only these columns are read.
+        :type columns: list(str) or None
+
+        .. note:: Data restricted using ``window`` or ``columns`` are never
+            inserted in the cache, since they do not match ``pd_desc``.
         """
+        self._check_trace_md5()
+        partial = window is not None or columns is not None
         try:
-            return self._cache[pd_desc]
+            data = self._cache[pd_desc]
         except KeyError as e:
             try:
                 path = self._swap_path_of(pd_desc)
-            # If there is no swap, bail out
             except (ValueError, KeyError):
-                raise e
-            else:
-                # Try to load the dataframe from that path
                 try:
-                    if self.DATAFRAME_SWAP_FORMAT == 'parquet':
-                        data = pd.read_parquet(path, memory_map=True)
-                    else:
-                        raise ValueError('Dataframe swap format "{}" not handled'.format(self.DATAFRAME_SWAP_FORMAT))
-                except (OSError, pyarrow.lib.ArrowIOError):
+                    path = self._shared_swap_path_of(pd_desc)
+                # If there is no swap, bail out
+                except KeyError:
                     raise e
-                else:
+
+            # Try to load the dataframe from that path
+            try:
+                with measure_time() as measure:
+                    data = self._read_data(path, window=window, columns=columns)
+                swap_size = os.stat(path).st_size
+            except (OSError, pyarrow.lib.ArrowIOError):
+                raise e
+            else:
+                if not partial:
+                    # Refine the swap cost estimation, which was initially
+                    # based on the write cost. Reading can be much cheaper,
+                    # especially for memory mapped formats.
+                    mem_usage = self._data_mem_usage(data)
+                    if mem_usage:
+                        self._update_swap_cost(data, measure.exclusive_delta, mem_usage, swap_size, load=True)
+
                     if insert:
                         # We have no idea of the cost of something coming from
                         # the cache
                         self.insert(pd_desc, data, write_swap=False, compute_cost=None)
 
-                    return data
+                return data
+        else:
+            if columns is not None:
+                data = data[list(columns)]
+            if window is not None:
+                data = df_window(data, window, method='pre')
+            return data
 
     def insert(self, pd_desc, data, compute_cost=None, write_swap=False, force_write_swap=False):
         """
@@ -1166,6 +1835,7 @@ class TraceCache:
             cost comparison.
         :type force_write_swap: bool
         """
+        self._check_trace_md5()
         self._cache[pd_desc] = data
         if compute_cost is not None:
             self._data_cost[pd_desc] = compute_cost
@@ -1316,44 +1986,1724 @@ class TraceCache:
         }
 
 
-class Trace(Loggable, TraceBase):
+class TraceParserBase(abc.ABC, Loggable):
     """
-    The Trace object is the LISA trace events parser.
+    Abstract Base Class for trace parsers.
 
-    :param trace_path: File containing the trace
-    :type trace_path: str
+    :param path: Path to the trace file.
+    :type path: str
 
-    :param events: events to be parsed. Since events can be loaded on-demand,
-        that is optional but still recommended to improve trace parsing speed.
-    :type events: list(str) or None
+    :param events: Iterable of events to parse. An empty iterable can be
+        passed, in which case only the metadata will be available.
+    :type events: collections.abc.Iterable(str)
 
-    :param strict_events: When ``True``, all the events specified in ``events``
-        have to be present, and any other events will be assumed to not be
-        present. This allows early failure and avoid the cost of lazy detection
-        of events in very large traces.
-    :type strict_events: bool
+    .. note:: :class:`Trace` creates a new parser every time some events need
+        to be loaded, so parsers are expected to parse all the requested
+        events in one go.
+    """
 
-    :param plat_info: Platform info describing the target that this trace was
-        collected on.
-    :type plat_info: lisa.platforms.platinfo.PlatformInfo
+    METADATA_KEYS = ['time-range', 'events-index']
+    """
+    Metadata keys that can be queried with :meth:`get_metadata`.
+    """
 
-    :param normalize_time: Make the first timestamp in the trace 0 instead
-        of the system timestamp that was captured when tracing.
-    :type normalize_time: bool
+    def __init__(self, path, events):
+        self.path = path
+        self.events = set(events)
 
-    :param trace_format: format of the trace. Possible values are:
-        - FTrace
-        - SysTrace
-    :type trace_format: str or None
+    @abc.abstractmethod
+    def parse_event(self, event):
+        """
+        Parse the given event from the trace and return a
+        :class:`pandas.DataFrame` with the following columns:
 
-    :param plots_dir: directory where to save plots
-    :type plots_dir: str
+            * ``Time`` index: floating point absolute timestamp in seconds.
+            * ``__cpu``: CPU on which the event was emitted.
+            * ``__pid``: PID of the current process on the emitting CPU.
+            * ``__comm``: name of the current process on the emitting CPU.
+            * ``__line``: line number of the event in the textual trace.
+            * One column per event field.
 
+        :raises MissingTraceEventError: If the event cannot be found in the
+            trace.
+        """
 
-    :param max_mem_size: Maximum memory usage to be used for dataframe cache.
-        Note that the peak memory usage can exceed that, as the cache can not
-        forcefully evict an object from memory (it can only drop references to it).
-        When ``None``, use illimited amount of memory.
+    @abc.abstractmethod
+    def get_metadata(self, key):
+        """
+        Return the metadata value.
+
+        :param key: Name of the metadata, among :attr:`METADATA_KEYS`:
+
+            * ``time-range``: tuple ``(start, end)`` of the timestamps in the
+              trace. ``start`` is the first timestamp found in the trace,
+              regardless of the events that were asked for, and ``end`` the
+              last one.
+            * ``events-index``: Parser-specific object serializable to JSON,
+              describing where each event is located in the trace file. It
+              can be given back to another parser of the same file using
+              :meth:`set_metadata`.
+        :type key: str
+
+        :raises KeyError: If the metadata is not supported by the parser.
+        """
+
+    def set_metadata(self, key, value):
+        """
+        Provide a metadata value obtained with :meth:`get_metadata` from
+        another parser of the same trace file, so that some work can be
+        avoided. It must be called before any event is parsed.
+
+        Parsers are free to ignore it, which is what the default
+        implementation does.
+
+        :param key: Name of the metadata, among :attr:`METADATA_KEYS`.
+        :type key: str
+
+        :param value: Value of the metadata.
+        :type value: object
+        """
+        pass
+
+    def parse_events(self, events):
+        """
+        Same as :meth:`parse_event` but returns a mapping of event names to
+        dataframes. Events that cannot be found in the trace are ignored.
+
+        :param events: Events to parse.
+        :type events: list(str)
+        """
+        mapping = {}
+        for event in events:
+            try:
+                mapping[event] = self.parse_event(event)
+            except MissingTraceEventError:
+                continue
+
+        return mapping
+
+    def iter_events_chunks(self, chunk_size):
+        """
+        Parse the events in time-ordered chunks.
+
+        :param chunk_size: Maximum number of rows of each event in a chunk.
+        :type chunk_size: int
+
+        :returns: An iterator of mappings of event names to
+            :class:`pandas.DataFrame` like the ones returned by
+            :meth:`parse_event`. All the rows of a chunk are later than the
+            rows of the previous chunk. Events that cannot be found in the
+            trace are ignored.
+
+        The default implementation parses all the events at once and splits
+        the resulting dataframes, so only parsers able to stream the trace
+        file keep the memory usage bounded.
+        """
+        df_map = self.parse_events(sorted(self.events))
+        yield from _split_df_map(df_map, chunk_size)
+
+
+def _get_chunks_bounds(indices, chunk_size):
+    """
+    Get the start timestamp of time-ordered chunks so that each chunk contains
+    at most ``chunk_size`` rows of each of the given sorted ``indices``.
+
+    Each chunk spans from its start timestamp (included) to the start of the
+    next chunk (excluded).
+    """
+    indices = [
+        np.asarray(index)[::chunk_size]
+        for index in indices
+    ]
+    if indices:
+        return np.unique(np.concatenate(indices))
+    else:
+        return np.array([], dtype=np.float64)
+
+
+def _split_df_map(df_map, chunk_size):
+    """
+    Split a mapping of event names to dataframes in time-ordered chunks, as
+    described by :func:`_get_chunks_bounds`.
+    """
+    bounds = _get_chunks_bounds(
+        [df.index for df in df_map.values()],
+        chunk_size,
+    )
+    positions = {
+        event: np.append(np.searchsorted(df.index, bounds, side='left'), len(df))
+        for event, df in df_map.items()
+    }
+
+    for i in range(len(bounds)):
+        chunk = {}
+        for event, df in df_map.items():
+            start, stop = positions[event][i:i + 2]
+            if stop > start:
+                chunk[event] = df.iloc[start:stop]
+        yield chunk
+
+
+class TrappyTraceParser(TraceParserBase):
+    """
+    Trace parser based on :mod:`trappy`.
+
+    :param trace_format: format of the trace. Possible values are:
+        - FTrace
+        - SysTrace
+    :type trace_format: str or None
+
+    :Variable keyword arguments: Forwarded to :class:`TraceParserBase`.
+    """
+
+    def __init__(self, path, events, trace_format=None):
+        super().__init__(path=path, events=events)
+        logger = self.get_logger()
+        events = set(self.events)
+
+        if trace_format is None:
+            if path.endswith('html'):
+                trace_format = 'SySTrace'
+            else:
+                trace_format = 'FTrace'
+
+        # Trappy chokes on some events for some reason, so make the user aware
+        # of it and carry on
+        mishandled_events = {'thermal_power_cpu_limit'}
+        mishandled_events &= events
+        if mishandled_events:
+            logger.debug('A bug in Trappy prevents from loading these events: {}'.format(sorted(mishandled_events)))
+            events -= mishandled_events
+
+
+        logger.debug('Parsing {} events from {}: {}'.format(trace_format, path, sorted(events)))
+        if trace_format == 'Systems':
+            trace_class = trappy.SysTrace
+        elif trace_format == 'FTrace':
+            trace_class = trappy.FTrace
+        else:
+            raise ValueError('Unknown trace format: {}'.format(trace_format))
+
+        # Since we handle the cache in lisa.trace.Trace, we do not need to duplicate it
+        trace_class.disable_cache = True
+        internal_trace = trace_class(
+            path,
+            scope="custom",
+            events=sorted(events),
+            normalize_time=False,
+        )
+
+        # trappy sometimes decides to be "clever" and overrules the path to be
+        # used, even though it was specifically asked for a given file path
+        assert path == internal_trace.trace_path
+        self._trace = internal_trace
+
+    def get_metadata(self, key):
+        if key == 'time-range':
+            return (self._trace.basetime, self._trace.endtime)
+        else:
+            raise KeyError(key)
+
+    def parse_event(self, event):
+        internal_trace = self._trace
+        try:
+            df = getattr(internal_trace, event).data_frame
+        # If some events could not be parsed
+        except AttributeError:
+            raise MissingTraceEventError([event])
+        else:
+            # The dataframe cache will service future requests as needed, so we
+            # can release the memory here
+            delattr(internal_trace, event)
+
+            # If the dataframe is empty, that event may not even exist at
+            # all
+            if df.empty:
+                raise MissingTraceEventError([event])
+            else:
+                return df
+
+
+class TxtTraceParser(TraceParserBase):
+    """
+    Vectorized parser for the textual format of ftrace, as printed by
+    ``trace-cmd report``.
+
+    :param block_size: Size in bytes of the blocks of the trace file
+        processed at once. Larger blocks amortize the per-block overhead, at
+        the expense of memory usage.
+    :type block_size: int
+
+    :param jobs: Number of worker processes used to parse the blocks of
+        textual trace files. If ``None``, :func:`os.cpu_count` is used. By
+        default, the trace is parsed in the current process.
+    :type jobs: int or None
+
+    :Variable keyword arguments: Forwarded to :class:`TraceParserBase`.
+
+    Rather than matching every line against a regex and splitting its fields
+    into a dictionary, the file is read in large blocks. The common fields of
+    all the lines of a block are extracted with a single regex pass and
+    converted to :mod:`numpy` arrays. The fields of each event are then
+    extracted in one pass using a regex built from the first occurrence of
+    that event, only the lines not following that template being parsed
+    one-by-one.
+
+    The resulting dataframes are identical to the ones created by
+    :class:`TrappyTraceParser`, including the fixup of duplicated timestamps
+    and the event-specific quirks of :mod:`trappy`.
+
+    When the textual trace spans multiple blocks, the file is split in byte
+    ranges ending at line boundaries that are parsed by a pool of worker
+    processes when ``jobs`` is not 1. The columns parsed by the workers are
+    sent back as Arrow IPC streams. The parent process then stitches the
+    results in order, so the fixup of duplicated timestamps and the line
+    numbers are computed across the ranges boundaries as if the file was
+    parsed serially.
+
+    While parsing a textual trace file, an index of the events found in each
+    byte range is built, along with the line number and timestamp at the
+    beginning of the range. It is available as the ``events-index`` metadata,
+    and allows later parsers to only read the ranges containing the events
+    they are asked for.
+
+    .. note:: ``trace.dat`` files are converted to text on the fly using
+        ``trace-cmd report``, with the same options as :mod:`trappy`. That
+        output is parsed serially and is not indexed.
+
+    .. note:: Events for which :mod:`trappy` has a dedicated grammar that is
+        not based on ``field=value`` pairs are delegated to
+        :class:`TrappyTraceParser`.
+    """
+
+    DEFAULT_BLOCK_SIZE = 16 * 1024 * 1024
+    """
+    Default value for the ``block_size`` parameter.
+    """
+
+    _HEADER_REGEX = re.compile(
+        r'^[^\S\n]*(?:'
+            r'(?P<comm>.*?)-(?P<pid>\d+)(?:[^\S\n]+\(.*\))?[^\S\n]+\[(?P<cpu>\d+)\](?:[^\S\n]+....)?'
+            r'[^\S\n]+(?P<timestamp>[0-9]+(?P<us>\.[0-9]+)?): '
+            r'(?P<event>\w+):[^\S\n]+(?P<extra>(?:\w+:[^\S\n]+)*)(?P<data>.*\S)'
+        r'|.*)[^\S\n]*$',
+        re.MULTILINE,
+    )
+
+    _INT_COLUMN_REGEX = re.compile(r'[-+]?(?:0|[1-9][0-9]{0,17})(?:\n[-+]?(?:0|[1-9][0-9]{0,17}))*')
+    _MAYBE_INT_REGEX = re.compile(r'\s*[-+]?\s*\d')
+    _EMPTY_ARRAY_REGEX = re.compile(r'[A-Za-z0-9_]+=\{\} ')
+    _ARRAY_REGEX = re.compile(r'([A-Za-z0-9_]+)={([^}]+)}')
+    _EXPLODE_ARRAY_REGEX = re.compile(r'[^ ]+={[^}]+}')
+
+    _RAW_EVENTS = [
+        'sched_switch',
+        'sched_wakeup',
+        'sched_wakeup_new',
+        'function',
+        'funcgraph_entry',
+        'funcgraph_exit',
+    ]
+    """
+    Events printed in raw format by ``trace-cmd report``.
+    """
+
+    _DELEGATED_EVENTS = {
+        'sys_enter',
+        'sys_exit',
+        'ext4_da_write_begin',
+        'ext4_da_write_end',
+        'ext4_sync_file_enter',
+        'ext4_sync_file_exit',
+        'f2fs_write_begin',
+        'f2fs_write_end',
+        'f2fs_sync_file_enter',
+        'f2fs_sync_file_exit',
+        'thermal_power_cpu_limit',
+    }
+    """
+    Events parsed by :class:`TrappyTraceParser`.
+    """
+
+    _FALLBACK_EVENTS = {'tracing_mark_write'}
+    """
+    Events only used when no other requested event matches a line. Their
+    content is stored as-is in a ``string`` column.
+    """
+
+    _CLK_EVENTS = {'clock_enable', 'clock_disable', 'clock_set_rate'}
+    """
+    Events starting with the name of the clock before the fields.
+    """
+
+    _EVENT_RENAMES = {
+        'cpu_frequency': {'cpu_id': 'cpu', 'state': 'frequency'},
+        'cpu_capacity': {'cpu_id': 'cpu', 'state': 'capacity'},
+        'clock_set_rate': {'state': 'rate'},
+    }
+
+    def __init__(self, path, events, block_size=DEFAULT_BLOCK_SIZE, jobs=1):
+        super().__init__(path=path, events=events)
+        self.block_size = block_size
+        self.jobs = os.cpu_count() if jobs is None else jobs
+        self._delegate = None
+        self._event_columns = None
+        self._time_range = None
+        self._events_index = None
+
+    def _parse_all(self):
+        """
+        Parse all the events at once, unless that was already done.
+
+        Parsing is delayed until first use so that
+        :meth:`iter_events_chunks` can stream the trace instead.
+        """
+        if self._event_columns is None:
+            delegated = self.events & self._DELEGATED_EVENTS
+            if delegated:
+                self._delegate = TrappyTraceParser(self.path, delegated)
+
+            self._parse(sorted(self.events - delegated))
+
+    def get_metadata(self, key):
+        if key == 'time-range':
+            self._parse_all()
+            return self._time_range
+        elif key == 'events-index':
+            self._parse_all()
+            if self._events_index is None:
+                raise KeyError(key)
+            else:
+                return self._events_index
+        else:
+            raise KeyError(key)
+
+    def set_metadata(self, key, value):
+        if key == 'events-index' and not self.path.endswith('.dat'):
+            self._events_index = value
+
+    def parse_event(self, event):
+        self._parse_all()
+        if event in self._DELEGATED_EVENTS:
+            return self._delegate.parse_event(event)
+
+        try:
+            columns = self._event_columns.pop(event)
+        except KeyError:
+            raise MissingTraceEventError([event])
+        else:
+            return self._make_df(event, **columns)
+
+    def iter_events_chunks(self, chunk_size):
+        # Events delegated to trappy cannot be streamed
+        if self.events & self._DELEGATED_EVENTS:
+            yield from super().iter_events_chunks(chunk_size)
+            return
+
+        events = self._get_candidate_events(sorted(self.events))
+        for chunk in self._iter_chunks(events):
+            df_map = {
+                event: self._make_df(event, **columns)
+                for event, columns in chunk.items()
+            }
+            yield from _split_df_map(df_map, chunk_size)
+
+    @contextlib.contextmanager
+    def _open_trace(self):
+        path = self.path
+        if path.endswith('.dat'):
+            cmd = ['trace-cmd', 'report', '-t']
+            for event in self._RAW_EVENTS:
+                cmd.extend(['-r', event])
+            cmd.append(path)
+
+            with subprocess.Popen(cmd, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL) as p:
+                yield p.stdout
+                # Consume the rest of the output so that the process can exit
+                p.stdout.read()
+
+            if p.returncode:
+                raise subprocess.CalledProcessError(p.returncode, cmd)
+        else:
+            with open(path, 'rb') as f:
+                yield f
+
+    def _iter_blocks(self):
+        """
+        Yield blocks of text from the trace, ending at line boundaries.
+        """
+        with self._open_trace() as f:
+            remainder = b''
+            while True:
+                data = f.read(self.block_size)
+                if not data:
+                    break
+
+                data = remainder + data
+                end = data.rfind(b'\n')
+                if end == -1:
+                    remainder = data
+                else:
+                    remainder = data[end + 1:]
+                    yield data[:end].decode('utf-8')
+
+            if remainder:
+                yield remainder.decode('utf-8')
+
+    def _get_ranges(self):
+        """
+        Split the trace file in byte ranges of about ``block_size`` bytes,
+        ending right after a newline.
+        """
+        size = os.path.getsize(self.path)
+        ranges = []
+        with open(self.path, 'rb') as f:
+            start = 0
+            while start < size:
+                f.seek(start + self.block_size)
+                # Extend the range up to the end of the current line
+                f.readline()
+                end = min(f.tell(), size)
+                ranges.append((start, end))
+                start = end
+
+        return ranges
+
+    @classmethod
+    def _parse_range(cls, path, events, range_, pack=True):
+        """
+        Parse a range of a trace file, possibly in a worker process.
+
+        If ``pack=True``, the columns of each event are serialized as an Arrow
+        IPC stream, which is much cheaper to send back to the parent process
+        than pickling arrays of objects. They can be unpacked with
+        :meth:`_unpack_columns`.
+        """
+        start, end = range_
+        with open(path, 'rb') as f:
+            f.seek(start)
+            block = f.read(end - start)
+
+        if block.endswith(b'\n'):
+            block = block[:-1]
+
+        parsed = cls._parse_block(block.decode('utf-8'), events)
+        if pack:
+            parsed['events'] = {
+                event: cls._pack_columns(cols)
+                for event, cols in parsed['events'].items()
+            }
+
+        return parsed
+
+    @staticmethod
+    def _pack_columns(cols):
+        """
+        Serialize a dictionary of columns as an Arrow IPC stream.
+        """
+        batch = pyarrow.RecordBatch.from_arrays(
+            [pyarrow.array(col) for col in cols.values()],
+            list(cols.keys()),
+        )
+        sink = pyarrow.BufferOutputStream()
+        writer = pyarrow.RecordBatchStreamWriter(sink, batch.schema)
+        writer.write_batch(batch)
+        writer.close()
+        return sink.getvalue().to_pybytes()
+
+    @staticmethod
+    def _unpack_columns(bytes_):
+        """
+        Deserialize a dictionary of columns packed by :meth:`_pack_columns`.
+        """
+        batch = pyarrow.ipc.open_stream(bytes_).read_next_batch()
+        return {
+            name: col.to_numpy(zero_copy_only=False)
+            for name, col in zip(batch.schema.names, batch.columns)
+        }
+
+    def _iter_parsed_blocks(self, events, ranges=None):
+        """
+        Parse the blocks of the trace in order, using worker processes when
+        possible.
+
+        :param ranges: Byte ranges of a textual trace file to parse, as
+            returned by :meth:`_get_ranges`. If ``None``, the whole trace is
+            parsed.
+        :type ranges: list(tuple(int, int)) or None
+
+        :returns: An iterator of tuples ``(range, parsed)``, where ``range``
+            is ``None`` for ``trace.dat`` files.
+        """
+        if self.path.endswith('.dat'):
+            for block in self._iter_blocks():
+                yield (None, self._parse_block(block, events))
+            return
+
+        if ranges is None:
+            ranges = self._get_ranges()
+
+        if self.jobs <= 1 or len(ranges) <= 1:
+            for range_ in ranges:
+                yield (range_, self._parse_range(self.path, events, range_, pack=False))
+            return
+
+        parse = functools.partial(self._parse_range, self.path, events)
+        with multiprocessing.Pool(processes=min(self.jobs, len(ranges))) as pool:
+            for range_, parsed in zip(ranges, pool.imap(parse, ranges)):
+                parsed['events'] = {
+                    event: self._unpack_columns(cols)
+                    for event, cols in parsed['events'].items()
+                }
+                yield (range_, parsed)
+
+    @classmethod
+    def _get_candidate_events(cls, events):
+        # trappy favors non-fallback events, in the order in which events were
+        # asked for
+        return [
+            event
+            for event in events
+            if event not in cls._FALLBACK_EVENTS
+        ] + [
+            event
+            for event in events
+            if event in cls._FALLBACK_EVENTS
+        ]
+
+    @classmethod
+    def _parse_block(cls, block, events):
+        """
+        Parse a block of text made of whole lines.
+
+        :param block: Text to parse.
+        :type block: str
+
+        :param events: Events to extract, in order of preference for lines
+            that could belong to multiple events.
+        :type events: list(str)
+
+        :returns: A dictionary with the following keys:
+
+            * ``nr_lines``: Number of lines in the block.
+            * ``line``: Line number in the block of each event line.
+            * ``ts``: Timestamp of each event line, before fixup of the
+              duplicates.
+            * ``events``: Mapping of event names to a dictionary of columns.
+              The ``idx`` column gives the index of the line in ``line`` and
+              ``ts``.
+            * ``names``: Names of all the events that could be found in the
+              block, whether they were asked for or not.
+        """
+        matches = cls._HEADER_REGEX.findall(block)
+        nr_lines = len(matches)
+        empty = dict(
+            nr_lines=nr_lines,
+            line=np.array([], dtype=np.int64),
+            ts=np.array([], dtype=np.float64),
+            events={},
+            names=[],
+        )
+        if not matches:
+            return empty
+
+        # Any line that is not an event line has an empty event name
+        is_event = np.fromiter(map(bool, map(itemgetter(5), matches)), dtype=bool, count=nr_lines)
+        line = np.flatnonzero(is_event)
+        if len(line) != nr_lines:
+            if not len(line):
+                return empty
+            matches = [matches[i] for i in line]
+
+        comm, pid, cpu, ts, us, event, extra, data = zip(*matches)
+        ts = np.fromiter(map(float, ts), dtype=np.float64, count=len(ts))
+        # Timestamps without a decimal point are in nanoseconds
+        is_ns = np.fromiter(map(operator.not_, us), dtype=bool, count=len(us))
+        ts[is_ns] /= 1e9
+
+        # Lines with a chain of "word:" before the data can be matched by any
+        # of these words, e.g. "tracing_mark_write: rtapp_main: event=start"
+        event = np.array(event, dtype=object)
+        names = set(pd.unique(event))
+        for extra_ in set(extra):
+            names.update(extra_.replace(':', ' ').split())
+
+        if any(extra):
+            def resolve(event, extra):
+                names = {event, *extra.replace(':', ' ').split()}
+                for event in events:
+                    if event in names:
+                        return event
+                return None
+
+            event = np.array([
+                resolve(event_, extra_) if extra_ else event_
+                for event_, extra_ in zip(event, extra)
+            ], dtype=object)
+
+        columns = dict(
+            comm=comm,
+            pid=pid,
+            cpu=cpu,
+            data=data,
+        )
+        columns = {
+            name: np.array(col, dtype=object)
+            for name, col in columns.items()
+        }
+
+        events_cols = {}
+        for name in set(events).intersection(pd.unique(event)):
+            idx = np.flatnonzero(event == name)
+            events_cols[name] = dict(
+                idx=idx,
+                **{
+                    col_name: col[idx]
+                    for col_name, col in columns.items()
+                }
+            )
+
+        return dict(
+            nr_lines=nr_lines,
+            line=line,
+            ts=ts,
+            events=events_cols,
+            names=sorted(names),
+        )
+
+    def _iter_chunks(self, events):
+        """
+        Parse the trace block by block.
+
+        :returns: An iterator of mappings of event names to a dictionary of
+            columns, as expected by :meth:`_make_df`. Once exhausted,
+            ``_time_range`` attribute is set.
+
+        If an events index is available, only the blocks containing the
+        requested events are parsed. Otherwise, the index is built while
+        parsing the whole trace.
+        """
+        def make_chunk(parsed, ts, line):
+            chunk = {}
+            for event, cols in parsed['events'].items():
+                idx = cols.pop('idx')
+                chunk[event] = dict(
+                    ts=ts[idx],
+                    line=line[idx],
+                    **cols
+                )
+            return chunk
+
+        index = self._events_index
+        if index is not None:
+            names = set(events)
+            blocks = [
+                block
+                for block in index['blocks']
+                if names.intersection(block['events'])
+            ]
+            ranges = [
+                (block['start'], block['end'])
+                for block in blocks
+            ]
+            parsed_blocks = self._iter_parsed_blocks(events, ranges=ranges)
+            # The state at the beginning of each block is restored from the
+            # index, so the timestamps and line numbers are the same as when
+            # parsing the whole trace
+            for block, (range_, parsed) in zip(blocks, parsed_blocks):
+                ts, _ = self._fixup_timestamps(parsed['ts'], np.int64(block['ts']))
+                line = parsed['line'] + block['line']
+                yield make_chunk(parsed, ts, line)
+
+            self._time_range = tuple(index['time-range'])
+            return
+
+        # Bit representation of the last timestamp seen. The trace starts at 0
+        prev_ts = np.int64(0)
+        started = False
+        line_nr = 0
+        basetime = None
+        index_blocks = []
+
+        for range_, parsed in self._iter_parsed_blocks(events):
+            line = parsed['line']
+
+            # Lines are numbered from the first event line
+            if not started:
+                if not len(line):
+                    continue
+                started = True
+                line_nr = -line[0]
+
+            if range_ is not None:
+                index_blocks.append(dict(
+                    start=range_[0],
+                    end=range_[1],
+                    line=int(line_nr),
+                    ts=int(prev_ts),
+                    events=parsed['names'],
+                ))
+
+            ts, prev_ts = self._fixup_timestamps(parsed['ts'], prev_ts)
+            line = line + line_nr
+            line_nr += parsed['nr_lines']
+
+            if basetime is None and len(ts):
+                basetime = ts[0]
+
+            yield make_chunk(parsed, ts, line)
+
+        endtime = prev_ts.view(np.float64) if started else 0
+        self._time_range = (
+            0 if basetime is None else float(basetime),
+            float(endtime)
+        )
+
+        if not self.path.endswith('.dat'):
+            self._events_index = {
+                'time-range': list(self._time_range),
+                'blocks': index_blocks,
+            }
+
+    def _parse(self, events):
+        events = self._get_candidate_events(events)
+        chunks = {event: [] for event in events}
+
+        for chunk in self._iter_chunks(events):
+            for event, cols in chunk.items():
+                chunks[event].append(cols)
+
+        def concat(chunks, key):
+            return np.concatenate([chunk[key] for chunk in chunks])
+
+        self._event_columns = {
+            event: {
+                key: concat(event_chunks, key)
+                for key in ('ts', 'comm', 'pid', 'cpu', 'line', 'data')
+            }
+            for event, event_chunks in chunks.items()
+            if event_chunks
+        }
+
+    @staticmethod
+    def _fixup_timestamps(ts, prev):
+        """
+        Make sure each timestamp is strictly greater than the previous one.
+
+        When a timestamp is lower or equal to the previous one, it is replaced
+        by the next representable float after the previous timestamp, like
+        :func:`numpy.nextafter` would. That is done by working on the integer
+        representation of the positive floats, where the next representable
+        float is obtained by adding 1.
+
+        :param ts: Array of timestamps.
+        :type ts: numpy.ndarray
+
+        :param prev: Integer representation of the timestamp preceding ``ts``.
+        :type prev: numpy.int64
+
+        :returns: A tuple of the fixed up timestamps and the integer
+            representation of the last timestamp.
+        """
+        if not len(ts):
+            return (ts, prev)
+
+        bits = ts.view(np.int64)
+        offsets = np.arange(len(bits), dtype=np.int64)
+        # Each fixed up timestamp is max(ts[i], fixed[i-1] + 1), which is a
+        # running maximum once the index is subtracted.
+        bits = np.maximum(np.maximum.accumulate(bits - offsets), prev + 1)
+        bits += offsets
+        return (bits.view(np.float64), bits[-1])
+
+    def _make_df(self, event, ts, comm, pid, cpu, line, data):
+        data = data.tolist()
+
+        # Remove empty arrays from the trace
+        if any('={}' in x for x in data):
+            data = [
+                self._EMPTY_ARRAY_REGEX.sub('', x) if '={}' in x else x
+                for x in data
+            ]
+
+        if event == 'sched_switch':
+            data = [x.replace(' ==> ', ' ', 1) for x in data]
+
+        data = self._explode_arrays(data)
+
+        if event in self._CLK_EVENTS:
+            clk_name, data = zip(*(x.split(' ', 1) for x in data))
+            extra_columns = {'clk_name': np.array(clk_name, dtype=object)}
+        else:
+            extra_columns = {}
+
+        if event in self._FALLBACK_EVENTS:
+            columns = {'string': np.array(data, dtype=object)}
+        else:
+            columns = self._parse_fields(event, data)
+
+        columns.update(extra_columns)
+        df = pd.DataFrame(
+            {
+                '__comm': comm,
+                '__pid': np.fromiter(map(int, pid), dtype=np.int64, count=len(pid)),
+                '__cpu': np.fromiter(map(int, cpu), dtype=np.int64, count=len(cpu)),
+                '__line': line,
+                **columns,
+            },
+            index=pd.Index(ts, name='Time'),
+        )
+        df = df.infer_objects()
+        return self._finalize_df(event, df)
+
+    def _finalize_df(self, event, df):
+        """
+        Apply the event-specific changes done by :mod:`trappy` on the
+        dataframe.
+        """
+        try:
+            renames = self._EVENT_RENAMES[event]
+        except KeyError:
+            pass
+        else:
+            df.rename(columns=renames, inplace=True)
+
+        if event == 'cpu_idle':
+            uint32_max = (2 ** 32) - 1
+            df.replace(uint32_max, -1, inplace=True)
+        elif event == 'sched_load_avg_sg' and 'cpus' in df.columns:
+            df['cpus'] = df['cpus'].apply('{:0>8}'.format)
+
+        return df
+
+    @classmethod
+    def _explode_arrays(cls, data):
+        """
+        Turn ``load={1 2}`` into ``load0=1 load1=2``, padding with zeros to
+        the largest size of each array.
+
+        .. note:: Like :mod:`trappy`, arrays are only exploded if the first
+            line contains one.
+        """
+        if not (data and cls._ARRAY_REGEX.search(data[0])):
+            return data
+
+        lengths = {}
+        for x in data:
+            for name, elements in cls._ARRAY_REGEX.findall(x):
+                lengths[name] = max(lengths.get(name, 0), len(elements.split(' ')))
+
+        def explode(match):
+            to_explode = match.group()
+            name, values = to_explode.split('=', 1)
+            values = values[1:-1].split(' ')
+            values += ['0'] * (lengths[name] - len(values))
+            return ' '.join(
+                '{}{}={}'.format(name, i, val)
+                for i, val in enumerate(values)
+            )
+
+        return [cls._EXPLODE_ARRAY_REGEX.sub(explode, x) for x in data]
+
+    @staticmethod
+    def _cast_int(value):
+        # Let python figure out the base
+        try:
+            return int(value, base=0)
+        except ValueError:
+            return value
+
+    def _parse_fields(self, event, data):
+        """
+        Parse the ``field=value`` pairs of the given lines into columns.
+
+        :returns: A dictionary of column names to :class:`numpy.ndarray`.
+        """
+        template = self._get_template(data)
+        if template:
+            regex = re.compile(
+                r'^(?:[^\S\n]*{}[^\S\n]*|(.+))$'.format(
+                    r'[^\S\n]+'.join(
+                        r'{}=(\S*)'.format(re.escape(field))
+                        for field in template
+                    )
+                ),
+                re.MULTILINE,
+            )
+            fast_columns = list(zip(*regex.findall('\n'.join(data))))
+            slow_lines = np.array(fast_columns.pop(), dtype=object)
+            slow = slow_lines != ''
+            fast = ~slow
+            fast_columns = dict(zip(template, fast_columns))
+        else:
+            slow = np.ones(len(data), dtype=bool)
+            fast = ~slow
+            fast_columns = {}
+
+        if slow.all():
+            first_fast = None
+        else:
+            first_fast = int(np.argmax(fast))
+
+        slow_idx = np.flatnonzero(slow)
+        slow_dicts = [
+            self._parse_fields_line(event, data[i])
+            for i in slow_idx
+        ]
+
+        # Columns are created in order of appearance in the lines
+        field_pos = {}
+        if first_fast is not None:
+            for i, field in enumerate(template):
+                field_pos[field] = (first_fast, i)
+        for i, fields in zip(slow_idx, slow_dicts):
+            for j, field in enumerate(fields):
+                pos = (i, j)
+                if field_pos.get(field, pos) >= pos:
+                    field_pos[field] = pos
+        fields = sorted(field_pos.keys(), key=field_pos.__getitem__)
+
+        def make_col(field):
+            try:
+                values = fast_columns[field]
+            except KeyError:
+                col = None
+            else:
+                values = np.array(values, dtype=object)[fast]
+                if self._INT_COLUMN_REGEX.fullmatch('\n'.join(values)):
+                    col = np.fromiter(map(int, values), dtype=np.int64, count=len(values))
+                else:
+                    # Only values starting with a digit can be integers, which
+                    # avoids raising an exception for every string value
+                    maybe_int = self._MAYBE_INT_REGEX.match
+                    col = np.array(
+                        [
+                            self._cast_int(x) if maybe_int(x) else x
+                            for x in values
+                        ],
+                        dtype=object,
+                    )
+
+            if slow_dicts:
+                if col is None:
+                    fast_col = None
+                else:
+                    fast_col = col
+                col = np.full(len(data), np.nan, dtype=object)
+                if fast_col is not None:
+                    col[fast] = fast_col
+                for i, fields in zip(slow_idx, slow_dicts):
+                    try:
+                        col[i] = fields[field]
+                    except KeyError:
+                        pass
+
+            return col
+
+        return {
+            field: make_col(field)
+            for field in fields
+        }
+
+    @staticmethod
+    def _get_template(data, max_lines=1000):
+        """
+        Get the list of fields of the first line only made of ``field=value``
+        pairs with no duplicated field.
+        """
+        for line in itertools.islice(data, max_lines):
+            template = [
+                field.split('=', 1)[0]
+                for field in line.split()
+            ]
+            if all(
+                '=' in field
+                for field in line.split()
+            ) and len(set(template)) == len(template) and '' not in template:
+                return template
+
+        return None
+
+    def _parse_fields_line(self, event, line):
+        fields = {}
+        prev_field = None
+        for field in line.split():
+            if '=' not in field:
+                if not prev_field:
+                    if 'FAILED TO PARSE' in line:
+                        self.get_logger().warning('trace-cmd failed to parse the "{}" event. You may need to compile the latest trace-cmd and put it in your $PATH. Continuing, but some data may be missing'.format(event))
+                        continue
+                    else:
+                        raise ValueError('Could not parse the fields of "{}" event line: {}'.format(event, line))
+                # Concatenation is supported only for string values
+                if not isinstance(fields[prev_field], str):
+                    continue
+                fields[prev_field] += ' ' + field
+                continue
+
+            field, value = field.split('=', 1)
+            fields[field] = self._cast_int(value)
+            prev_field = field
+
+        return fields
+
+
+_DatEventFormat = namedtuple('_DatEventFormat', ('name', 'id', 'fields'))
+_DatEventField = namedtuple('_DatEventField', ('name', 'kind', 'offset', 'size', 'signed', 'count'))
+
+
+class _DatReader:
+    """
+    Sequential reader of the header sections of a ``trace.dat`` file.
+    """
+
+    def __init__(self, buf):
+        self.buf = buf
+        self.pos = 0
+        self.endianness = '<'
+
+    def read(self, size):
+        data = self.buf[self.pos:self.pos + size]
+        if len(data) != size:
+            raise ValueError('Unexpected end of trace.dat file')
+        self.pos += size
+        return bytes(data)
+
+    def read_int(self, fmt):
+        fmt = self.endianness + fmt
+        x, = struct.unpack_from(fmt, self.buf, self.pos)
+        self.pos += struct.calcsize(fmt)
+        return x
+
+    def read_cstr(self):
+        end = self.buf.find(b'\0', self.pos)
+        if end == -1:
+            raise ValueError('Unexpected end of trace.dat file')
+        s = bytes(self.buf[self.pos:end]).decode('utf-8')
+        self.pos = end + 1
+        return s
+
+    def read_section(self, fmt):
+        size = self.read_int(fmt)
+        return self.read(size).decode('utf-8', errors='replace')
+
+
+class DatTraceParser(TxtTraceParser):
+    """
+    Native parser for the binary ``trace.dat`` format of ``trace-cmd``.
+
+    :Variable keyword arguments: Forwarded to :class:`TraceParserBase`.
+
+    The per-CPU ring buffer pages are decoded straight from the file without
+    going through ``trace-cmd report``, so ``trace-cmd`` is not needed. All
+    the pages are walked at once, decoding one event of every page at each
+    step. The event fields are then decoded into typed columns using the
+    event formats stored in the file.
+
+    Events emitted from userspace using the ``print`` event, such as
+    ``rtapp_main: event=start``, are parsed like :class:`TxtTraceParser`
+    does.
+
+    .. note:: Event fields are decoded as they are stored in the ring buffer,
+        like ``trace-cmd report -R`` would print them. Events with a print
+        format that does more than printing each field along with its name
+        can therefore give different columns than :class:`TxtTraceParser`.
+        Character arrays are always decoded as strings. The binary arguments
+        of ``bprint`` events are not formatted, so events emitted from the
+        kernel using ``trace_printk()`` are not available.
+
+    .. note:: Only version 6 of the ``trace.dat`` format is supported, and
+        only the top-level ftrace buffer is parsed.
+    """
+
+    _DELEGATED_EVENTS = set()
+
+    _MAGIC = b'\x17\x08\x44tracing'
+
+    _FIELD_REGEX = re.compile(r'field:(?P<decl>[^;]*);\s*offset:(?P<offset>\d+);\s*size:(?P<size>\d+);(?:\s*signed:(?P<signed>\d+);)?')
+    _DECL_REGEX = re.compile(r'(?P<type>.*?)\s*(?P<name>\w+)\s*(?:\[(?P<count>[^\]]*)\])?\s*$')
+    _PRINT_REGEX = re.compile(r'^[^\S\n]*(?P<extra>(?:\w+:[^\S\n]+)*)(?P<data>.*\S)', re.DOTALL)
+
+    # Ring buffer event types, see include/linux/ring_buffer.h
+    _TYPE_PADDING = 29
+    _TYPE_TIME_EXTEND = 30
+    _TYPE_TIME_STAMP = 31
+    _TYPE_DATA_MAX = 28
+    _TS_SHIFT = 27
+    _COMMIT_MASK = (1 << 27) - 1
+    # Events are lost before the first event of pages with that flag
+    _MISSED_EVENTS = 1 << 31
+
+    # trace-cmd options, see lib/trace-cmd/include/trace-cmd.h
+    _OPTION_DATE = 1
+    _OPTION_OFFSET = 7
+
+    def __init__(self, path, events):
+        super().__init__(path=path, events=events)
+
+    def parse_event(self, event):
+        self._parse_all()
+        try:
+            make_df = self._event_columns.pop(event)
+        except KeyError:
+            raise MissingTraceEventError([event])
+        else:
+            return make_df()
+
+    # All the pages are walked at once, so there is nothing to gain from
+    # splitting the parsing in blocks.
+    iter_events_chunks = TraceParserBase.iter_events_chunks
+
+    @classmethod
+    def _parse_format(cls, text):
+        """
+        Parse an event format description, as found in
+        ``/sys/kernel/debug/tracing/events/*/*/format``.
+        """
+        name = re.search(r'^name:\s*(\S+)', text, re.MULTILINE).group(1)
+        id_ = int(re.search(r'^ID:\s*(\d+)', text, re.MULTILINE).group(1))
+
+        fields = []
+        for match in cls._FIELD_REGEX.finditer(text):
+            decl = cls._DECL_REGEX.match(match.group('decl').strip())
+            type_ = decl.group('type')
+            count = decl.group('count')
+            offset = int(match.group('offset'))
+            size = int(match.group('size'))
+            signed = bool(int(match.group('signed') or 0))
+            type_words = set(re.findall(r'\w+', type_))
+            # Array sizes can be simple expressions such as "[30+1]"
+            if count and re.fullmatch(r'[0-9+*\s]+', count):
+                count = str(sum(
+                    functools.reduce(operator.mul, map(int, term.split('*')))
+                    for term in count.split('+')
+                ))
+
+            if type_.startswith('__data_loc'):
+                kind = 'data_loc'
+            elif type_.startswith('__rel_loc'):
+                kind = 'rel_loc'
+            # Old kernels declare flexible arrays without brackets
+            elif count is not None or not size:
+                if 'char' in type_words:
+                    kind = 'str' if count else 'flex_str'
+                elif count and count.isdigit() and int(count) and size % int(count) == 0 and size // int(count) in (1, 2, 4, 8):
+                    kind = 'int_array'
+                    count = int(count)
+                else:
+                    kind = 'bytes' if count else 'flex_bytes'
+            elif size in (1, 2, 4, 8):
+                kind = 'int'
+            else:
+                kind = 'bytes'
+
+            fields.append(_DatEventField(
+                name=decl.group('name'),
+                kind=kind,
+                offset=offset,
+                size=size,
+                signed=signed,
+                count=count,
+            ))
+
+        return _DatEventFormat(name=name, id=id_, fields=fields)
+
+    def _read_header(self, buf):
+        reader = _DatReader(buf)
+        if reader.read(len(self._MAGIC)) != self._MAGIC:
+            raise ValueError('Not a trace.dat file: {}'.format(self.path))
+
+        version = reader.read_cstr()
+        if version != '6':
+            raise ValueError('Unsupported trace.dat version {}: {}'.format(version, self.path))
+
+        reader.endianness = '>' if reader.read(1)[0] else '<'
+        long_size = reader.read(1)[0]
+        page_size = reader.read_int('I')
+
+        if reader.read_cstr() != 'header_page':
+            raise ValueError('Could not find header_page section')
+        header_page = {
+            field.name: field
+            for field in self._parse_format('name: header_page\nID: 0\n' + reader.read_section('Q')).fields
+        }
+
+        if reader.read_cstr() != 'header_event':
+            raise ValueError('Could not find header_event section')
+        reader.read_section('Q')
+
+        formats = [
+            self._parse_format(reader.read_section('Q'))
+            for i in range(reader.read_int('I'))
+        ]
+        for i in range(reader.read_int('I')):
+            # Name of the system
+            reader.read_cstr()
+            formats.extend(
+                self._parse_format(reader.read_section('Q'))
+                for i in range(reader.read_int('I'))
+            )
+
+        # kallsyms
+        reader.read_section('I')
+        printk = {}
+        for line in reader.read_section('I').splitlines():
+            addr, sep, fmt = line.partition(' : ')
+            if sep:
+                printk[int(addr, base=16)] = fmt.strip().strip('"')
+
+        cmdlines = {}
+        for line in reader.read_section('Q').splitlines():
+            # Like trace-cmd, only keep the first word of the task name
+            line = line.split()
+            if len(line) >= 2 and line[0].isdigit():
+                cmdlines[int(line[0])] = line[1]
+
+        nr_cpus = reader.read_int('I')
+
+        ts_offset = 0
+        section = reader.read(10)
+        if section == b'options  \0':
+            while True:
+                option = reader.read_int('H')
+                if not option:
+                    break
+                data = reader.read(reader.read_int('I'))
+                if option in (self._OPTION_DATE, self._OPTION_OFFSET):
+                    ts_offset += int(data.rstrip(b'\0').decode('ascii'), base=0)
+
+            section = reader.read(10)
+
+        if section != b'flyrecord\0':
+            raise ValueError('Unsupported trace.dat data section: {}'.format(section))
+
+        cpus_data = [
+            (reader.read_int('Q'), reader.read_int('Q'))
+            for cpu in range(nr_cpus)
+        ]
+
+        return dict(
+            endianness=reader.endianness,
+            long_size=long_size,
+            page_size=page_size,
+            header_page=header_page,
+            formats={fmt.id: fmt for fmt in formats},
+            cmdlines=cmdlines,
+            printk=printk,
+            ts_offset=ts_offset,
+            cpus_data=cpus_data,
+        )
+
+    @staticmethod
+    def _read_ints(buf, offsets, size, signed, endianness):
+        """
+        Read one integer at each of the given ``offsets`` in ``buf``.
+        """
+        if not len(offsets):
+            return np.array([], dtype=np.int64)
+
+        idx = offsets[:, None] + np.arange(size)
+        dtype = np.dtype('{}{}{}'.format(endianness, 'i' if signed else 'u', size))
+        return buf[idx].view(dtype).reshape(-1).astype(dtype.newbyteorder('='))
+
+    def _walk_pages(self, buf, header):
+        """
+        Walk the ring buffer pages of all the CPUs and return the CPU, offset,
+        size and timestamp of all the data events, sorted by timestamp.
+        """
+        endianness = header['endianness']
+        header_page = header['header_page']
+        page_size = header['page_size']
+        read_ints = functools.partial(self._read_ints, buf, endianness=endianness)
+
+        pages = [
+            (cpu, np.arange(offset, offset + size - page_size + 1, page_size, dtype=np.int64))
+            for cpu, (offset, size) in enumerate(header['cpus_data'])
+        ]
+        page_cpu = np.concatenate([np.full(len(offsets), cpu) for cpu, offsets in pages])
+        page_offset = np.concatenate([offsets for cpu, offsets in pages])
+
+        ts_field = header_page['timestamp']
+        commit_field = header_page['commit']
+        ts = read_ints(page_offset + ts_field.offset, ts_field.size, False).astype(np.int64)
+        commit = read_ints(page_offset + commit_field.offset, commit_field.size, False).astype(np.int64)
+        missed = (commit & self._MISSED_EVENTS).astype(bool)
+        pos = page_offset + header_page['data'].offset
+        end = pos + (commit & self._COMMIT_MASK)
+
+        # All the events are 4 bytes aligned
+        words = buf[:len(buf) - len(buf) % 4].view(endianness + 'u4')
+        max_word = len(words) - 1
+
+        steps = []
+        step = 0
+        page = np.flatnonzero(pos < end)
+        while len(page):
+            _pos = pos[page]
+            header_word = words[_pos // 4].astype(np.int64)
+            array0 = words[np.minimum(_pos // 4 + 1, max_word)].astype(np.int64)
+            type_len = header_word & 0x1f
+            delta = header_word >> 5
+
+            is_ext = type_len >= self._TYPE_TIME_EXTEND
+            is_padding = type_len == self._TYPE_PADDING
+            is_data = type_len <= self._TYPE_DATA_MAX
+
+            delta[is_ext] += array0[is_ext] << self._TS_SHIFT
+            is_stamp = type_len == self._TYPE_TIME_STAMP
+            _ts = ts[page] + delta
+            _ts[is_stamp] = delta[is_stamp]
+            ts[page] = _ts
+
+            # Data events with type_len == 0 store their length in array[0]
+            data_offset = np.where((type_len == 0) | is_ext, _pos + 8, _pos + 4)
+            length = np.where(type_len == 0, array0 - 4, type_len * 4)
+            length[is_ext] = 0
+            length[is_padding] = array0[is_padding]
+            pos[page] = data_offset + np.maximum((length + 3) & ~3, 0)
+
+            steps.append(dict(
+                page=page[is_data],
+                step=np.full(is_data.sum(), step),
+                offset=data_offset[is_data],
+                size=length[is_data],
+                ts=_ts[is_data],
+            ))
+            step += 1
+            page = page[pos[page] < end[page]]
+
+        events = {
+            key: np.concatenate([x[key] for x in steps]) if steps else np.array([], dtype=np.int64)
+            for key in ('page', 'step', 'offset', 'size', 'ts')
+        }
+        cpu = page_cpu[events['page']]
+        # Like trace-cmd, events with the same timestamp are ordered by CPU
+        order = np.lexsort((events['step'], events['page'], cpu, events['ts']))
+        events = {
+            key: val[order]
+            for key, val in events.items()
+        }
+        events['cpu'] = cpu[order]
+
+        # trace-cmd report prints a line before the first event of pages
+        # where events were lost
+        first_in_page = events['step'] == 0
+        lost_line = first_in_page & missed[events['page']]
+        events['line'] = np.arange(len(order)) + np.cumsum(lost_line)
+        events['ts'] += header['ts_offset']
+        return events
+
+    def _parse(self, events):
+        with open(self.path, 'rb') as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            header = self._read_header(mm)
+
+        buf = np.memmap(self.path, dtype=np.uint8, mode='r')
+        endianness = header['endianness']
+        formats = header['formats']
+        records = self._walk_pages(buf, header)
+
+        ts = records['ts'] / 1e9
+        ts, last_ts = self._fixup_timestamps(ts, np.int64(0))
+        if len(ts):
+            self._time_range = (float(ts[0]), float(last_ts.view(np.float64)))
+        else:
+            self._time_range = (0, 0)
+
+        read_ints = functools.partial(self._read_ints, buf, endianness=endianness)
+        common_type = read_ints(records['offset'], 2, False)
+
+        ids = {
+            fmt.name: id_
+            for id_, fmt in formats.items()
+        }
+
+        line = records['line']
+        if len(line):
+            extra_lines = self._get_extra_lines(buf, records, common_type, ids, header)
+            line = line - line[0] + np.cumsum(extra_lines) - extra_lines
+        cmdlines = header['cmdlines']
+
+        def get_common(idx, fmt):
+            pid_field = {field.name: field for field in fmt.fields}['common_pid']
+            pid = read_ints(records['offset'][idx] + pid_field.offset, pid_field.size, pid_field.signed).astype(np.int64)
+            comm = np.array([
+                '<idle>' if pid_ == 0 else cmdlines.get(pid_, '<...>')
+                for pid_ in pid.tolist()
+            ], dtype=object)
+            return dict(
+                ts=ts[idx],
+                comm=comm,
+                pid=pid,
+                cpu=records['cpu'][idx].astype(np.int64),
+                line=line[idx],
+            )
+
+        def make_binary_df(event, idx):
+            fmt = formats[ids[event]]
+            common = get_common(idx, fmt)
+            offsets = records['offset'][idx]
+            sizes = records['size'][idx]
+            columns = {}
+            for field in fmt.fields:
+                if field.name.startswith('common_'):
+                    continue
+                columns.update(self._decode_field(buf, offsets, sizes, field, endianness))
+
+            df = pd.DataFrame(
+                {
+                    '__comm': common['comm'],
+                    '__pid': common['pid'],
+                    '__cpu': common['cpu'],
+                    '__line': common['line'],
+                    **columns,
+                },
+                index=pd.Index(common['ts'], name='Time'),
+            )
+            return self._finalize_df(event, df)
+
+        def make_print_df(event, idx, data):
+            fmt = formats[ids['print']]
+            common = get_common(idx, fmt)
+            return self._make_df(event, data=data, **common)
+
+        def make_df(makers):
+            dfs = [make() for make in makers]
+            if len(dfs) == 1:
+                return dfs[0]
+            else:
+                return pd.concat(dfs).sort_index(kind='mergesort')
+
+        makers = {}
+        binary_events = set(events) & ids.keys()
+        for event in binary_events:
+            idx = np.flatnonzero(common_type == ids[event])
+            if len(idx):
+                makers.setdefault(event, []).append(
+                    functools.partial(make_binary_df, event, idx)
+                )
+
+        # Userspace events are emitted through the print event, possibly
+        # using the same name as a kernel event
+        print_events = self._get_candidate_events(
+            sorted(set(events) | {'print'})
+        )
+        if 'print' in ids and print_events != ['print']:
+            idx = np.flatnonzero(common_type == ids['print'])
+            fmt = formats[ids['print']]
+            buf_field = {field.name: field for field in fmt.fields}['buf']
+            strings = self._decode_field(
+                buf,
+                records['offset'][idx],
+                records['size'][idx],
+                buf_field,
+                endianness,
+            )['buf']
+
+            resolved = []
+            data = []
+            for string in strings:
+                match = self._PRINT_REGEX.match(string)
+                if match:
+                    names = {'print', *match.group('extra').replace(':', ' ').split()}
+                    event = next(
+                        (event for event in print_events if event in names),
+                        None
+                    )
+                    data.append(match.group('data'))
+                else:
+                    event = None
+                    data.append(None)
+                resolved.append(event)
+
+            resolved = np.array(resolved, dtype=object)
+            data = np.array(data, dtype=object)
+            for event in set(print_events).intersection(pd.unique(resolved)):
+                if event == 'print' and 'print' in binary_events:
+                    continue
+                select = resolved == event
+                makers.setdefault(event, []).append(
+                    functools.partial(make_print_df, event, idx[select], data[select])
+                )
+
+        self._event_columns = {
+            event: functools.partial(make_df, event_makers)
+            for event, event_makers in makers.items()
+        }
+
+    @classmethod
+    def _get_extra_lines(cls, buf, records, common_type, ids, header):
+        """
+        Number of extra lines ``trace-cmd report`` prints for each event, when
+        the ``bprint`` format string or the ``print`` buffer contains
+        newlines.
+        """
+        extra_lines = np.zeros(len(common_type), dtype=np.int64)
+        formats = header['formats']
+        endianness = header['endianness']
+
+        def count_lines(string, newline):
+            string = string.rstrip()
+            if string.endswith(newline):
+                string = string[:-len(newline)]
+            return string.count(newline)
+
+        if 'bprint' in ids:
+            idx = np.flatnonzero(common_type == ids['bprint'])
+            fmt_field = {
+                field.name: field
+                for field in formats[ids['bprint']].fields
+            }['fmt']
+            addr = cls._read_ints(buf, records['offset'][idx] + fmt_field.offset, fmt_field.size, False, endianness)
+            nr_lines = {
+                addr_: count_lines(fmt, r'\n')
+                for addr_, fmt in header['printk'].items()
+            }
+            extra_lines[idx] = [
+                nr_lines.get(addr_, 0)
+                for addr_ in addr.tolist()
+            ]
+
+        if 'print' in ids:
+            idx = np.flatnonzero(common_type == ids['print'])
+            buf_field = {
+                field.name: field
+                for field in formats[ids['print']].fields
+            }['buf']
+            strings = cls._decode_field(buf, records['offset'][idx], records['size'][idx], buf_field, endianness)['buf']
+            extra_lines[idx] = [
+                count_lines(string, '\n')
+                for string in strings
+            ]
+
+        return extra_lines
+
+    @classmethod
+    def _decode_field(cls, buf, offsets, sizes, field, endianness):
+        """
+        Decode a field of a set of events.
+
+        :param buf: Content of the trace.dat file.
+        :type buf: numpy.ndarray
+
+        :param offsets: Offset of the data of each event.
+        :type offsets: numpy.ndarray
+
+        :param sizes: Size of the data of each event.
+        :type sizes: numpy.ndarray
+
+        :param field: Field to decode.
+        :type field: _DatEventField
+
+        :returns: A dictionary of column names to column values.
+        """
+        name = field.name
+        kind = field.kind
+        read_ints = functools.partial(cls._read_ints, buf, endianness=endianness)
+
+        def cast_ints(x):
+            if x.dtype == np.uint64 and (x >= 2 ** 63).any():
+                return x
+            else:
+                return x.astype(np.int64)
+
+        def decode_strings(starts, ends):
+            strings = []
+            for start, end in zip(starts.tolist(), ends.tolist()):
+                s = buf[start:max(start, end)].tobytes()
+                strings.append(s.split(b'\0', 1)[0].decode('utf-8', errors='replace'))
+            return np.array(strings, dtype=object)
+
+        if kind == 'int':
+            return {name: cast_ints(read_ints(offsets + field.offset, field.size, field.signed))}
+        elif kind == 'int_array':
+            size = field.size // field.count
+            return {
+                '{}{}'.format(name, i): cast_ints(read_ints(offsets + field.offset + i * size, size, field.signed))
+                for i in range(field.count)
+            }
+        elif kind == 'str':
+            if not len(offsets):
+                return {name: np.array([], dtype=object)}
+            raw = buf[(offsets + field.offset)[:, None] + np.arange(field.size)]
+            # Discard anything after the first NUL character
+            raw[np.cumsum(raw == 0, axis=1) > 0] = 0
+            raw = raw.view('S{}'.format(field.size)).reshape(-1)
+            uniq, inverse = np.unique(raw, return_inverse=True)
+            uniq = np.array(
+                [x.decode('utf-8', errors='replace') for x in uniq],
+                dtype=object,
+            )
+            return {name: uniq[inverse]}
+        elif kind in ('data_loc', 'rel_loc'):
+            loc = read_ints(offsets + field.offset, 4, False).astype(np.int64)
+            starts = offsets + (loc & 0xffff)
+            if kind == 'rel_loc':
+                starts += field.offset + field.size
+            return {name: decode_strings(starts, starts + (loc >> 16))}
+        elif kind == 'flex_str':
+            starts = offsets + field.offset
+            return {name: decode_strings(starts, offsets + sizes)}
+        else:
+            starts = offsets + field.offset
+            if kind == 'flex_bytes':
+                ends = offsets + sizes
+            else:
+                ends = starts + field.size
+            return {
+                name: np.array(
+                    [
+                        buf[start:end].tobytes()
+                        for start, end in zip(starts.tolist(), ends.tolist())
+                    ],
+                    dtype=object,
+                )
+            }
+
+
+class Trace(Loggable, TraceBase):
+    """
+    The Trace object is the LISA trace events parser.
+
+    :param trace_path: File containing the trace
+    :type trace_path: str
+
+    :param events: events to be parsed. Since events can be loaded on-demand,
+        that is optional but still recommended to improve trace parsing speed.
+    :type events: list(str) or None
+
+    :param strict_events: When ``True``, all the events specified in ``events``
+        have to be present, and any other events will be assumed to not be
+        present. This allows early failure and avoid the cost of lazy detection
+        of events in very large traces.
+    :type strict_events: bool
+
+    :param plat_info: Platform info describing the target that this trace was
+        collected on.
+    :type plat_info: lisa.platforms.platinfo.PlatformInfo
+
+    :param normalize_time: Make the first timestamp in the trace 0 instead
+        of the system timestamp that was captured when tracing.
+    :type normalize_time: bool
+
+    :param trace_format: format of the trace. Possible values are:
+        - FTrace
+        - SysTrace
+    :type trace_format: str or None
+
+    :param parser: Callable returning a :class:`TraceParserBase` when called
+        with ``path`` and ``events`` keyword arguments, such as
+        :class:`TxtTraceParser` or :class:`DatTraceParser`. When ``None``,
+        :class:`TrappyTraceParser` is used with the given ``trace_format``.
+    :type parser: collections.abc.Callable or None
+
+    :param plots_dir: directory where to save plots
+    :type plots_dir: str
+
+
+    :param max_mem_size: Maximum memory usage to be used for dataframe cache.
+        Note that the peak memory usage can exceed that, as the cache can not
+        forcefully evict an object from memory (it can only drop references to it).
+        When ``None``, use illimited amount of memory.
     :type max_mem_size: int or None
 
     :param swap_dir: Swap directory used to store dataframes evicted from the
@@ -1371,6 +3721,45 @@ class Trace(Loggable, TraceBase):
         parameter.
     :type write_swap: bool
 
+    :param shared_swap_dir: Host-wide swap directory shared between all the
+        traces, see :class:`SharedSwapStore`. Dataframes computed for a copy
+        of the same trace file can be reloaded from there.
+    :type shared_swap_dir: str or None
+
+    :param max_shared_swap_size: Maximum size of the shared swap directory.
+        When ``None``, its size is not limited.
+    :type max_shared_swap_size: int or None
+
+    :param fast_swap_validation: If ``True``, reuse the swap area if the size,
+        modification time, inode and some sampled blocks of the trace file did
+        not change, and check its MD5 checksum in the background. Otherwise,
+        the checksum is computed before using the swap area.
+    :type fast_swap_validation: bool
+
+    :param compact_dtypes: If ``True``, the columns of the dataframes of the
+        parsed events are converted to more compact dtypes using
+        :func:`lisa.datautils.df_compact`, which can substantially reduce the
+        memory usage of large traces:
+
+            * Task name columns such as ``comm``, ``prev_comm`` and
+              ``next_comm`` are converted to :class:`pandas.CategoricalDtype`.
+              Grouping on them will include all the categories unless
+              ``observed=True`` is passed to :meth:`pandas.DataFrame.groupby`,
+              and assigning a name that is not an existing category raises an
+              exception.
+            * Integer columns are downcast to the smallest integer type of at
+              least 32 bits able to hold their values, and floating point
+              columns to ``float32`` when no value is changed. Arithmetic on
+              them can therefore overflow or lose precision. Since this
+              depends on the values, the chunks yielded by
+              :meth:`iter_events` can get other dtypes than the complete
+              dataframes.
+
+        This changes the dtypes of the dataframes returned by
+        :meth:`df_events` and the analyses, and is therefore disabled by
+        default.
+    :type compact_dtypes: bool
+
     :ivar start: The timestamp of the first trace event in the trace
     :ivar end: The timestamp of the last trace event in the trace
     :ivar time_range: Maximum timespan for all collected events
@@ -1389,12 +3778,17 @@ class Trace(Loggable, TraceBase):
         trace_format=None,
         plots_dir=None,
         sanitization_functions=None,
+        parser=None,
 
         max_mem_size=None,
         swap_dir=None,
         enable_swap=True,
         max_swap_size=None,
         write_swap=True,
+        shared_swap_dir=None,
+        max_shared_swap_size=None,
+        fast_swap_validation=True,
+        compact_dtypes=False,
     ):
         super().__init__()
 
@@ -1423,11 +3817,18 @@ class Trace(Loggable, TraceBase):
             swap_dir = None
             max_swap_size = None
 
+        if shared_swap_dir is None:
+            shared_swap = None
+        else:
+            shared_swap = SharedSwapStore(shared_swap_dir, max_size=max_shared_swap_size)
+
         self._cache = TraceCache.from_swap_dir(
             trace_path=trace_path,
             swap_dir=swap_dir,
             max_swap_size=max_swap_size,
             max_mem_size=max_mem_size,
+            shared_swap=shared_swap,
+            fast_validation=fast_swap_validation,
         )
         # Initial scrub of the swap to discard unwanted data, honoring the
         # max_swap_size right from the beginning
@@ -1436,8 +3837,12 @@ class Trace(Loggable, TraceBase):
 
         self._write_swap = write_swap
         self.normalize_time = normalize_time
+        self.compact_dtypes = compact_dtypes
         self.trace_path = trace_path
-        self._trace_format = trace_format
+
+        if parser is None:
+            parser = functools.partial(TrappyTraceParser, trace_format=trace_format)
+        self._parser = parser
 
         # The platform information used to run the experiments
         if plat_info is None:
@@ -1466,7 +3871,7 @@ class Trace(Loggable, TraceBase):
 
     @property
     def trace_state(self):
-        return (self.normalize_time,)
+        return (self.normalize_time, self.compact_dtypes)
 
     @property
     @memoized
@@ -1563,52 +3968,41 @@ class Trace(Loggable, TraceBase):
 
         proxy.base_trace = trace
 
-    def _get_trace(self, events):
+    def _get_parser(self, events):
         logger = self.get_logger()
         path = self.trace_path
-        events = set(events)
-
-        if self._trace_format is None:
-            if path.endswith('html'):
-                trace_format = 'SySTrace'
-            else:
-                trace_format = 'FTrace'
-        else:
-            trace_format = self._trace_format
+        events = sorted(events)
 
-        # Trappy chokes on some events for some reason, so make the user aware
-        # of it and carry on
-        mishandled_events = {'thermal_power_cpu_limit'}
-        mishandled_events &= events
-        if mishandled_events:
-            logger.debug('A bug in Trappy prevents from loading these events: {}'.format(sorted(mishandled_events)))
-            events -= mishandled_events
+        logger.debug('Parsing events from {}: {}'.format(path, events))
+        parser = self._make_parser(events)
 
+        # Since we got a parser here, use it to get basetime/endtime as well
+        self._get_time_range(parser=parser)
 
-        logger.debug('Parsing {} events from {}: {}'.format(trace_format, path, sorted(events)))
-        if trace_format == 'Systems':
-            trace_class = trappy.SysTrace
-        elif trace_format == 'FTrace':
-            trace_class = trappy.FTrace
-        else:
-            raise ValueError('Unknown trace format: {}'.format(trace_format))
+        # Record the index of the events built while parsing the whole trace,
+        # so that later parsers can only read the relevant parts of it
+        try:
+            self._cache.get_metadata('events-index')
+        except KeyError:
+            try:
+                index = parser.get_metadata('events-index')
+            except KeyError:
+                pass
+            else:
+                self._cache.update_metadata({'events-index': index})
 
-        # Since we handle the cache in lisa.trace.Trace, we do not need to duplicate it
-        trace_class.disable_cache = True
-        internal_trace = trace_class(
-            path,
-            scope="custom",
-            events=sorted(events),
-            normalize_time=False,
-        )
+        return parser
 
-        # trappy sometimes decides to be "clever" and overrules the path to be
-        # used, even though it was specifically asked for a given file path
-        assert path == internal_trace.trace_path
+    def _make_parser(self, events):
+        parser = self._parser(path=self.trace_path, events=events)
+        try:
+            index = self._cache.get_metadata('events-index')
+        except KeyError:
+            pass
+        else:
+            parser.set_metadata('events-index', index)
 
-        # Since we got a trace here, use it to get basetime/endtime as well
-        self._get_time_range(internal_trace=internal_trace)
-        return internal_trace
+        return parser
 
     @property
     @memoized
@@ -1629,16 +4023,15 @@ class Trace(Loggable, TraceBase):
         """
         return self._get_time_range()[1]
 
-    def _get_time_range(self, internal_trace=None):
+    def _get_time_range(self, parser=None):
         try:
             basetime = self._cache.get_metadata('basetime')
             endtime = self._cache.get_metadata('endtime')
         except KeyError:
-            if internal_trace is None:
-                internal_trace = self._get_trace(events=[])
+            if parser is None:
+                parser = self._get_parser(events=[])
 
-            basetime = internal_trace.basetime
-            endtime = internal_trace.endtime
+            basetime, endtime = parser.get_metadata('time-range')
             self._cache.update_metadata({
                 'basetime': basetime,
                 'endtime': endtime,
@@ -1646,7 +4039,7 @@ class Trace(Loggable, TraceBase):
 
         return (basetime, endtime)
 
-    def df_events(self, event, raw=None, rename_cols=True, window=None, signals=None, signals_init=True, compress_signals_init=False, write_swap=None):
+    def df_events(self, event, raw=None, rename_cols=True, window=None, signals=None, signals_init=True, compress_signals_init=False, columns=None, write_swap=None):
         """
         Get a dataframe containing all occurrences of the specified trace event
         in the parsed trace.
@@ -1682,6 +4075,10 @@ class Trace(Loggable, TraceBase):
             without introducing duplicate indices.
         :type compress_signals_init: bool
 
+        :param columns: If not ``None``, only these columns are returned. For
+            raw dataframes, only these columns are read from the swap area.
+        :type columns: list(str)
+
         :param write_swap: If ``True``, the dataframe will be written to the
             swap area when meeting the following conditions:
 
@@ -1737,6 +4134,9 @@ class Trace(Loggable, TraceBase):
                 sanitization=sanitization_f.__qualname__ if sanitization_f else None,
             )
 
+        if columns is not None:
+            spec.update(columns=list(columns))
+
         pd_desc = PandasDataDesc(spec=spec)
 
         try:
@@ -1752,6 +4152,134 @@ class Trace(Loggable, TraceBase):
 
         return df
 
+    def iter_events(self, events, chunk_size=100000, window=None, raw=None):
+        """
+        Iterate over time-ordered chunks of the given events, without loading
+        the whole dataframes in memory.
+
+        :param events: Trace events names.
+        :type events: list(str)
+
+        :param chunk_size: Maximum number of rows of each event in a chunk.
+        :type chunk_size: int
+
+        :param window: Only yield the rows with a timestamp inside that window
+            (in seconds), boundaries included. Unlike :meth:`df_events`, no
+            row before the window is added to provide an initial value to
+            signals.
+        :type window: tuple(float, float) or None
+
+        :param raw: See :meth:`df_events`. Sanitization functions are applied
+            on each chunk.
+        :type raw: bool or None
+
+        :returns: An iterator of mappings of event names to
+            :class:`pandas.DataFrame`. All the rows of a chunk are later than
+            the rows of the previous chunk. Events without any row in a chunk
+            are not part of the mapping.
+
+        If the raw dataframes of all the events are available in the cache or
+        in the swap area, the chunks are loaded from there. Otherwise, the
+        trace is parsed again with :meth:`TraceParserBase.iter_events_chunks`.
+        Nothing is inserted in the cache, so that the memory usage is bounded
+        by the size of the chunks. This allows incremental processing of
+        traces that would not fit in memory, for example::
+
+            nr_wakeups = sum(
+                len(chunk.get('sched_wakeup', []))
+                for chunk in trace.iter_events(['sched_wakeup'])
+            )
+        """
+        events = sorted(set(events))
+
+        def get_sanitization_f(event):
+            sanitization_f = self._sanitization_functions.get(event)
+            if raw is False and not sanitization_f:
+                raise ValueError('Sanitized dataframe for {} does not exist, please pass raw=True or raw=None'.format(event))
+            return None if raw else sanitization_f
+
+        sanitization_fs = {
+            event: get_sanitization_f(event)
+            for event in events
+        }
+
+        def select(df, start, end, end_included):
+            index = df.index
+            first = 0 if start is None else index.searchsorted(start, side='left')
+            stop = len(index) if end is None else index.searchsorted(end, side='right' if end_included else 'left')
+            return df.iloc[first:stop]
+
+        def iter_stored(indices):
+            bounds = _get_chunks_bounds(indices.values(), chunk_size)
+            for i, start in enumerate(bounds):
+                end = bounds[i + 1] if i + 1 < len(bounds) else None
+                chunk = {}
+                for event in indices.keys():
+                    df = self._cache.fetch(
+                        self._make_raw_pd_desc(event),
+                        window=(start, end),
+                    )
+                    chunk[event] = select(df, start, end, end_included=False)
+                yield chunk
+
+        def iter_parsed():
+            parser = self._make_parser(events)
+            for chunk in parser.iter_events_chunks(chunk_size):
+                if self.normalize_time:
+                    for df in chunk.values():
+                        df.index -= self.basetime
+                # Give the same dtypes as the dataframes stored in the cache
+                yield {
+                    event: self._compact_df(event, df)
+                    for event, df in chunk.items()
+                }
+
+        # Only load the index to find the chunks boundaries. For memory mapped
+        # swap files, this does not even allocate memory.
+        try:
+            indices = {
+                event: self._cache.fetch(
+                    self._make_raw_pd_desc(event),
+                    columns=[],
+                    window=window,
+                ).index
+                for event in events
+                # Skip the events known to be missing from the trace
+                if self._parsed_events.get(event) is not False
+            }
+        except KeyError:
+            chunks = iter_parsed()
+        else:
+            chunks = iter_stored(indices)
+
+        start, end = window if window is not None else (None, None)
+        for chunk in chunks:
+            # Stop parsing the trace once past the end of the window. Some
+            # events may not have any row in that chunk.
+            if end is not None:
+                chunk_starts = [
+                    df.index[0]
+                    for df in chunk.values()
+                    if not df.empty
+                ]
+                if chunk_starts and min(chunk_starts) > end:
+                    break
+
+            sanitized = {}
+            for event, df in chunk.items():
+                df = select(df, start, end, end_included=True)
+                if df.empty:
+                    continue
+
+                sanitization_f = sanitization_fs[event]
+                if sanitization_f:
+                    # The chunk can be a view on data owned by the cache
+                    df = sanitization_f(self, event, df.copy(), aspects=dict(rename_cols=True))
+                sanitized[event] = df
+
+            if sanitized:
+                yield sanitized
+
     def _make_raw_pd_desc(self, event):
         spec = self._make_raw_pd_desc_spec(event)
         return PandasDataDesc(spec=spec)
@@ -1770,7 +4298,31 @@ class Trace(Loggable, TraceBase):
         if write_swap is None:
             write_swap = self._write_swap
 
-        df = self._load_raw_df_map([event], write_swap=True)[event]
+        window = pd_desc.get('window')
+        columns = pd_desc.get('columns')
+
+        # Only read from the swap the part of the raw dataframe that is
+        # actually needed. The initial value of signals can be anywhere before
+        # the window, and sanitization functions can use any column.
+        if window is not None and pd_desc['signals_init'] and pd_desc['signals']:
+            pushdown_window = None
+        else:
+            pushdown_window = window
+        pushdown_columns = None if sanitization_f else columns
+
+        df = None
+        if pushdown_window is not None or pushdown_columns is not None:
+            try:
+                df = self._cache.fetch(
+                    self._make_raw_pd_desc(event),
+                    window=pushdown_window,
+                    columns=pushdown_columns,
+                )
+            except KeyError:
+                pass
+
+        if df is None:
+            df = self._load_raw_df_map([event], write_swap=True)[event]
 
         if sanitization_f:
             # Evict the raw dataframe once we got the sanitized version, since
@@ -1790,7 +4342,6 @@ class Trace(Loggable, TraceBase):
         else:
             sanitization_time = 0
 
-        window = pd_desc.get('window')
         if window is not None:
             signals_init = pd_desc['signals_init']
             compress_signals_init = pd_desc['compress_signals_init']
@@ -1807,6 +4358,9 @@ class Trace(Loggable, TraceBase):
         else:
             windowing_time = 0
 
+        if columns is not None:
+            df = df[columns]
+
         compute_cost = sanitization_time + windowing_time
         self._cache.insert(pd_desc, df, compute_cost=compute_cost, write_swap=write_swap)
         return df
@@ -1865,64 +4419,65 @@ class Trace(Loggable, TraceBase):
         return df_map
 
     def _parse_raw_events_df(self, events):
-        internal_trace = self._get_trace(events)
+        parser = self._get_parser(events)
+        mapping = parser.parse_events(events)
 
-        mapping = {}
-        for event in events:
-            try:
-                df = getattr(internal_trace, event).data_frame
-            # If some events could not be parsed
-            except AttributeError:
-                continue
-            else:
-                # The dataframe cache will service future requests as needed, so we
-                # can release the memory here
-                delattr(internal_trace, event)
+        if self.normalize_time:
+            for df in mapping.values():
+                df.index -= self.basetime
 
-                # If the dataframe is empty, that event may not even exist at
-                # all
-                if df.empty:
-                    continue
-                else:
-                    if self.normalize_time:
-                        df.index -= self.basetime
+        return {
+            event: self._compact_df(event, df)
+            for event, df in mapping.items()
+        }
+
+    def _compact_df(self, event, df):
+        """
+        Convert the columns of a raw dataframe to more compact dtypes using
+        :func:`lisa.datautils.df_compact` if ``compact_dtypes=True`` was
+        passed to :class:`Trace`.
+        """
+        if not self.compact_dtypes:
+            return df
 
-                    mapping[event] = df
+        logger = self.get_logger()
+        # Task names are converted regardless of the number of unique values,
+        # so that dataframes parsed in chunks by iter_events() get the same
+        # dtypes as complete ones.
+        compact_df = df_compact(
+            df,
+            max_category_ratio=1,
+            category_columns=[
+                col
+                for col in df.columns
+                if col.endswith('comm')
+            ],
+            downcast=True,
+        )
 
-        return mapping
+        if logger.isEnabledFor(logging.DEBUG):
+            def mem_usage(df):
+                return df.memory_usage(deep=True).sum()
+
+            before = mem_usage(df)
+            after = mem_usage(compact_df)
+            logger.debug('Compacted {} dataframe from {:.1f} MB to {:.1f} MB ({:.1f}% saved)'.format(
+                event,
+                before / 1e6,
+                after / 1e6,
+                (1 - after / before) * 100 if before else 0,
+            ))
+
+        return compact_df
 
     def _parse_raw_events(self, events):
         if not events:
             return {}
 
-        def chunk_list(l, nr_chunks):
-            l_len = len(l)
-            n = l_len // nr_chunks
-            if not n:
-                return l
-            else:
-                return [
-                    l[i:i + n]
-                    for i in range(0, l_len, n)
-                ]
-
-        nr_processes = os.cpu_count()
-        parallel_parse = len(events) > 2
-        # Parallel parsing with Trappy just slows things down at the moment so
-        # disable it until we can experiment with other parsers which might
-        # exhibit different behaviors
-        parallel_parse = False
-        if parallel_parse:
-            chunked_events = chunk_list(events, nr_processes)
-            df_map = {}
-            with multiprocessing.Pool(processes=nr_processes) as pool:
-                for df_map_ in pool.map(self._parse_raw_events_df, chunked_events):
-                    df_map.update({
-                        event: df
-                        for event, df in df_map_.items()
-                    })
-        else:
-            df_map = self._parse_raw_events_df(events)
+        # Parsers such as TxtTraceParser parallelize the parsing of the trace
+        # file themselves, which scales better than parsing the whole file
+        # once per chunk of events in different processes.
+        df_map = self._parse_raw_events_df(events)
 
         # remember the events that we tried to parse and that turned out to not be available
         self._parsed_events.update({
@@ -1946,76 +4501,92 @@ class Trace(Loggable, TraceBase):
 
         return df_map
 
-    @memoized
-    def _get_task_maps(self):
+    def _get_task_ids_events(self):
         """
-        Give the mapping from PID to task names, and the opposite.
-
-        The names or PIDs are listed in appearance order.
+        Events with a task name and PID that are used to build the task
+        mapping, along with the name of their name and PID columns.
         """
-
-
-        # Keep only the values, in appearance order according to the timestamp
-        # index
-        def finalize(df, key_col, value_col, key_type, value_type):
-            # Aggregate the values for each key and convert to python types
-            mapping = {}
-            grouped = df.groupby([key_col])
-            for key, index in grouped.groups.items():
-                values = df.loc[index][value_col].apply(value_type)
-                values = list(values)
-                key = key_type(key)
-                mapping[key] = values
-
-            return mapping
-
-        mapping_df_list = []
-        def _load(event, name_col, pid_col):
-            df = self.df_events(event)
-
-            # Get a Time column
-            df = df.reset_index()
-            grouped = df.groupby([name_col, pid_col])
-
-            # Get timestamp of first occurrences of each key/value combinations
-            mapping_df = grouped.first()
-            mapping_df = mapping_df[['Time']]
-            mapping_df.rename_axis(index={name_col: 'name', pid_col: 'pid'}, inplace=True)
-            mapping_df_list.append(mapping_df)
-
-        def load(event, *args, **kwargs):
-            # All events have a __comm and __pid columns, so use it as well
-            _load(event, '__comm', '__pid')
-            _load(event, *args, **kwargs)
-
         # Import here to avoid circular dependency
         from lisa.analysis.load_tracking import LoadTrackingAnalysis
         # All events with a "comm" and "pid" column
         events = {
-            'sched_wakeup',
-            'sched_wakeup_new',
-            *LoadTrackingAnalysis._SCHED_PELT_SE_NAMES,
+            event: [('comm', 'pid')]
+            for event in (
+                'sched_wakeup',
+                'sched_wakeup_new',
+                *LoadTrackingAnalysis._SCHED_PELT_SE_NAMES,
+            )
+        }
+        events['sched_switch'] = [
+            ('prev_comm', 'prev_pid'),
+            ('next_comm', 'next_pid'),
+        ]
+
+        # All events have a __comm and __pid columns, so use it as well
+        return {
+            event: [('__comm', '__pid')] + cols
+            for event, cols in events.items()
         }
-        for event in events:
-            # Test each event independently, to make sure they will be parsed
-            # if necessary
-            if event in self.available_events:
-                load(event, 'comm', 'pid')
 
-        if 'sched_switch' in self.available_events:
-            load('sched_switch', 'prev_comm', 'prev_pid')
-            load('sched_switch', 'next_comm', 'next_pid')
+    def _load_task_ids(self):
+        """
+        Get the list of ``(pid, name, time)`` tuples of the first appearance
+        of each name/PID combination, sorted by order of appearance.
 
-        if not mapping_df_list:
-            raise MissingTraceEventError(sorted(events) + ['sched_switch'], available_events=self.available_events)
+        The list is stored in the ``task-ids`` metadata of the swap area, so
+        that it does not need to be computed again when the trace is reloaded.
+        The timestamps are absolute, regardless of :attr:`normalize_time`.
+        """
+        candidates = self._get_task_ids_events()
+        try:
+            cached = self._cache.get_metadata('task-ids')
+        except KeyError:
+            pass
+        else:
+            # A trace with strict events may have only looked at a subset of
+            # the events when the list was built
+            if cached['complete'] or (
+                self._strict_events and
+                {
+                    event
+                    for event in candidates.keys()
+                    if event in self.available_events
+                } <= set(cached['events'])
+            ):
+                return [tuple(task_id) for task_id in cached['task-ids']]
+
+        events = sorted(
+            event
+            for event in candidates.keys()
+            # Test each event independently, to make sure they will be parsed
+            # if necessary
+            if event in self.available_events
+        )
+        if not events:
+            raise MissingTraceEventError(sorted(candidates.keys()), available_events=self.available_events)
 
-        df = pd.concat(mapping_df_list)
+        offset = self.basetime if self.normalize_time else 0
+        mapping_df_list = []
+        for event in events:
+            df = self.df_events(event)
+            time = df.index.values + offset
+            for name_col, pid_col in candidates[event]:
+                # The dataframe is sorted by time, so the first row of each
+                # name/PID combination is its first appearance
+                mapping_df = pd.DataFrame({
+                    'name': df[name_col].values,
+                    'pid': df[pid_col].values,
+                    'time': time,
+                })
+                mapping_df = mapping_df.dropna(subset=['name', 'pid'])
+                mapping_df = mapping_df.drop_duplicates(['name', 'pid'])
+                mapping_df['name'] = mapping_df['name'].astype(str)
+                mapping_df_list.append(mapping_df)
+
+        df = pd.concat(mapping_df_list, ignore_index=True)
         # Sort by order of appearance
-        df.sort_values(by=['Time'], inplace=True)
-        # Remove duplicated name/pid mapping and only keep the first appearance
-        df = df.loc[~df.index.duplicated(keep='first')]
-        # explode the multindex into a "key" and "value" columns
-        df.reset_index(inplace=True)
+        df.sort_values(by='time', inplace=True, kind='mergesort')
+        df.drop_duplicates(['name', 'pid'], inplace=True)
 
         forbidden_names = {
             # <idle> is invented by trace-cmd, no event field contain this
@@ -2029,8 +4600,32 @@ class Trace(Loggable, TraceBase):
         }
         df = df[~df['name'].isin(forbidden_names)]
 
-        name_to_pid = finalize(df, 'name', 'pid', str, int)
-        pid_to_name = finalize(df, 'pid', 'name', int, str)
+        task_ids = list(zip(
+            df['pid'].astype(int).tolist(),
+            df['name'].tolist(),
+            df['time'].astype(float).tolist(),
+        ))
+        self._cache.update_metadata({
+            'task-ids': {
+                'task-ids': task_ids,
+                'events': events,
+                'complete': not self._strict_events,
+            },
+        })
+        return task_ids
+
+    @memoized
+    def _get_task_maps(self):
+        """
+        Give the mapping from PID to task names, and the opposite.
+
+        The names or PIDs are listed in appearance order.
+        """
+        name_to_pid = {}
+        pid_to_name = {}
+        for pid, name, time in self._load_task_ids():
+            name_to_pid.setdefault(name, []).append(pid)
+            pid_to_name.setdefault(pid, []).append(name)
 
         return (name_to_pid, pid_to_name)
 
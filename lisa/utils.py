@@ -1568,18 +1568,19 @@ def checksum(file_, method):
     The file is read block by block to avoid clogging the memory with a huge
     read.
     """
+    # Reading by blocks of the hash block size makes the Python overhead
+    # dominate, so use large blocks that are still reasonably small
+    chunk_size = 1 * 1024 * 1024
     if method in ('md5', 'sha256'):
         h = getattr(hashlib, method)()
         update = lambda data: h.update(data)
         result = lambda: h.hexdigest()
-        chunk_size = h.block_size
     elif method == 'crc32':
         crc32_state = 0
         def update(data):
             nonlocal crc32_state
             crc32_state = zlib.crc32(data, crc32_state) & 0xffffffff
         result = lambda: hex(crc32_state)
-        chunk_size = 1 * 1024 * 1024
     else:
         raise ValueError('Unsupported method: {}'.format(method))
 
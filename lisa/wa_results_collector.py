@@ -422,13 +422,20 @@ class WaResultsCollector(Loggable):
         for domain in domains:
             name = '-'.join(str(c) for c in domain)
 
-            df = trace.analysis.frequency.df_domain_frequency_residency(domain)
+            # The residency of all domains is computed and cached on the first
+            # call, but the coherency is only checked for that domain so that
+            # one domain with garbage data does not prevent getting the others
+            try:
+                df = trace.analysis.frequency.df_domain_frequency_residency(domain[0])
+            except ValueError:
+                df = None
+
             if df is None or df.empty:
                 logger.warning("Can't get cluster freq residency from %s",
                                trace.trace_path)
             else:
                 df = df.reset_index()
-                avg_freq = (df.frequency * df.time).sum() / df.time.sum()
+                avg_freq = (df.frequency * df.total_time).sum() / df.total_time.sum()
                 metric = 'avg_freq_cluster_{}'.format(name)
                 metrics.append((metric, avg_freq, 'MHz'))
 
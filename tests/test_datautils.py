@@ -17,6 +17,7 @@
 
 from unittest import TestCase
 
+import numpy as np
 import pandas as pd
 
 import lisa.datautils as du
@@ -36,3 +37,107 @@ class DfCheck(TestCase):
                 self.assertEqual(len(subdf), 3)
             else:
                 self.assertEqual(len(subdf), 2)
+
+    def test_df_compact(self):
+        df = pd.DataFrame(
+            {
+                'comm': ['foo', 'bar'] * 50,
+                'name': ['task{}'.format(i) for i in range(100)],
+                'pid': np.arange(100, dtype=np.int64),
+                'big': np.arange(100, dtype=np.int64) << 40,
+                'exact': np.arange(100, dtype=np.float64),
+                'inexact': np.arange(100, dtype=np.float64) / 3,
+            },
+            index=pd.Index(np.arange(100, dtype=np.float64), name='Time'),
+        )
+        compact = du.df_compact(df)
+        self.assertEqual(compact['comm'].dtype, 'category')
+        self.assertEqual(compact['name'].dtype, object)
+        # Numeric columns are only downcast on demand
+        pd.testing.assert_frame_equal(compact.drop(columns=['comm']), df.drop(columns=['comm']))
+
+        compact = du.df_compact(df, downcast=True)
+        self.assertEqual(compact['comm'].dtype, 'category')
+        self.assertEqual(compact['name'].dtype, object)
+        self.assertEqual(compact['pid'].dtype, np.int32)
+        self.assertEqual(compact['big'].dtype, np.int64)
+        self.assertEqual(compact['exact'].dtype, np.float32)
+        self.assertEqual(compact['inexact'].dtype, np.float64)
+        pd.testing.assert_frame_equal(compact.astype(df.dtypes.to_dict()), df)
+
+        compact = du.df_compact(df, max_category_ratio=1, category_columns=['name'])
+        self.assertEqual(compact['comm'].dtype, object)
+        self.assertEqual(compact['name'].dtype, 'category')
+
+    def test_step_signal(self):
+        a = du.StepSignal.from_series(
+            pd.Series([0, 1, 1, 0], index=[0., 1., 2., 4.]),
+            end=6,
+        )
+        b = du.StepSignal.from_series(
+            pd.Series([1, 0], index=[3., 5.]),
+        )
+
+        self.assertEqual(a.integrate(), 3)
+        self.assertEqual(len(a.simplify()), 3)
+        self.assertEqual(a.resample([0.5, 3, 7]).tolist()[:2], [0, 1])
+        self.assertTrue(np.isnan(a.resample([7]).iloc[0]))
+
+        # b is only defined in [3, 5)
+        both = a & b
+        self.assertEqual(both.start.tolist(), [3, 4])
+        self.assertEqual(both.end.tolist(), [4, 5])
+        self.assertEqual(both.value.tolist(), [True, False])
+
+        either = a | b
+        self.assertEqual(either.integrate(), 2)
+
+        residency = a.residency()
+        self.assertEqual(residency.loc[0], 3)
+        self.assertEqual(residency.loc[1], 3)
+
+        series = either.simplify().to_series()
+        self.assertEqual(series.index.tolist(), [3, 5])
+        self.assertEqual(series.tolist(), [True, True])
+
+    def test_accumulators(self):
+        df = pd.DataFrame(
+            {
+                'cpu': [0, 1, 0, 1, 0, 1],
+                'pid': [10, 20, 11, 20, 10, 21],
+                'lat': [1., 2., 3., 4., 5., 100.],
+            },
+            index=[0., 1., 2., 3., 4., 5.],
+        )
+
+        def make_accumulators():
+            return [
+                du.CountAccumulator('ev', by='cpu'),
+                du.SumAccumulator('ev', 'lat', by='cpu'),
+                du.LastAccumulator('ev', 'pid', by='cpu'),
+                du.ResidencyAccumulator('ev', 'pid', by='cpu', window=(0.5, 7)),
+                du.QuantileAccumulator('ev', 'lat', quantiles=[0.5, 1]),
+                du.CountAccumulator('other'),
+            ]
+
+        # Splitting the event in chunks must not change the result
+        chunked = du.accumulate(
+            [{'ev': df.iloc[:3]}, {'ev': df.iloc[3:]}],
+            make_accumulators(),
+        )
+        whole = du.accumulate([{'ev': df}], make_accumulators())
+
+        for results in (chunked, whole):
+            count, total, last, residency, quantiles, other = results
+            self.assertEqual(count.to_dict(), {0: 3, 1: 3})
+            self.assertEqual(total.to_dict(), {0: 9, 1: 106})
+            self.assertEqual(last.to_dict(), {0: 10, 1: 21})
+            self.assertEqual(residency.to_dict(), {
+                (0, 10): 4.5,
+                (0, 11): 2,
+                (1, 20): 4,
+                (1, 21): 2,
+            })
+            self.assertAlmostEqual(quantiles.loc[0.5], 3, delta=3 * 0.01)
+            self.assertAlmostEqual(quantiles.loc[1], 100, delta=100 * 0.01)
+            self.assertEqual(other, 0)
@@ -20,6 +20,9 @@ from unittest import TestCase
 import os
 import shutil
 import tempfile
+import itertools
+
+import numpy as np
 
 from devlib.target import KernelVersion
 
@@ -203,6 +206,29 @@ class TestOptimalPlacement(TestCase):
                           em.get_optimal_placements, tasks)
 
 
+    def test_brute_force(self):
+        for capacities in (
+            {'task0': 1},
+            {'task0': 350},
+            {'task0': 10, 'task1': 10, 'task2': 10},
+            {'task0': 150, 'task1': 100, 'task2': 50, 'task3': 300},
+            {'task0': 120, 'task1': 120, 'task2': 90, 'task3': 30, 'task4': 60},
+        ):
+            for margin in (0, 20):
+                with self.subTest(capacities=capacities, margin=margin):
+                    try:
+                        expected = em.get_optimal_placements(
+                            capacities, margin, brute_force=True)
+                    except EnergyModelCapacityError:
+                        self.assertRaises(EnergyModelCapacityError,
+                                          em.get_optimal_placements, capacities, margin)
+                    else:
+                        placements = em.get_optimal_placements(capacities, margin)
+                        self.assertPlacementListEqual(placements, expected)
+
+    def test_symmetric_cpu_groups(self):
+        self.assertEqual(em.symmetric_cpu_groups, [[0, 1], [2, 3]])
+
 class TestBiggestCpus(TestCase):
     def test_biggest_cpus(self):
         self.assertEqual(em.biggest_cpus, [2, 3])
@@ -451,6 +477,38 @@ class TestEstimateFromTrace(TestCase):
             self.assertAlmostEqual(row.name, exp_index, places=4)
             self.assertDictEqual(row.to_dict(), exp_values)
 
+    def test_estimate_from_states(self):
+        little_freqs = list(little_cpu_active_states.keys())
+        big_freqs = list(big_cpu_active_states.keys())
+        states = [
+            (idle, (little_freq, little_freq, big_freq, big_freq))
+            for idle in itertools.product([-1, 0, 1, 2], repeat=4)
+            for little_freq in little_freqs
+            for big_freq in big_freqs
+        ]
+        idle = np.array([idle for idle, freqs in states])
+        freqs = np.array([freqs for idle, freqs in states])
+
+        nrg = em._estimate_from_states(idle=idle, freqs=freqs)
+
+        # Compare with the estimation made one state at a time
+        for i, (idle_row, freqs_row) in enumerate(states):
+            cpus_active = [state == -1 for state in idle_row]
+            deepest_possible = em._deepest_idle_idxs(cpus_active)
+            idle_states = [
+                node.idle_state_by_idx(max(min(deepest, state), 0))
+                for node, deepest, state in zip(em.cpu_nodes, deepest_possible, idle_row)
+            ]
+            utils = [active * em.capacity_scale for active in cpus_active]
+            expected = em.estimate_from_cpu_util(
+                cpu_utils=utils,
+                idle_states=idle_states,
+                freqs=freqs_row,
+            )
+            self.assertEqual(set(expected.keys()), set(nrg.keys()))
+            for cpus, power in expected.items():
+                self.assertAlmostEqual(nrg[cpus][i], power)
+
 
 class TestSerialization(StorageTestCase):
     """
@@ -0,0 +1,153 @@
+# SPDX-License-Identifier: Apache-2.0
+#
+# Copyright (C) 2019, Arm Limited and contributors.
+#
+# Licensed under the Apache License, Version 2.0 (the "License"); you may
+# not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+# http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS, WITHOUT
+# WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#
+
+from unittest import TestCase
+
+import numpy as np
+import pandas as pd
+
+from lisa.pelt import simulate_pelt, PELT_WINDOW, PELT_HALF_LIFE, PELT_SCALE
+import lisa.pelt
+
+
+def simulate_pelt_reference(activations, init=0, index=None, clock=None, window=PELT_WINDOW, half_life=PELT_HALF_LIFE, scale=PELT_SCALE):
+    """
+    Original implementation of :func:`lisa.pelt.simulate_pelt`, processing
+    one row at a time. It is used as a reference.
+    """
+    if index is not None:
+        activations = activations.reindex(index, method='ffill')
+
+    df = pd.DataFrame({'activations': activations})
+    df['clock'] = clock if clock is not None else df.index
+    df['delta'] = df['clock'].diff()
+
+    # Compute the number of crossed PELT windows between each sample Since PELT
+    # windowing is not time invariant (windows are at "millisecond"
+    # boundaries), we need non-normalized timestamps
+    window_series = df['clock'] // window
+    df['crossed_windows'] = window_series.diff()
+
+    # First row of "delta" is NaN, and activations reindex may have produced
+    # some NaN at the beginning of the dataframe as well
+    df.dropna(inplace=True)
+
+    def make_pelt_sim(init, scale, window, half_life):
+        decay = (1 / 2)**(1 / half_life)
+        # Alpha as defined in https://en.wikipedia.org/wiki/Moving_average
+        alpha = 1 - decay
+
+        # Accumulator of running time within a PELT window
+        acc = 0
+        # Output signal
+        signal = init / scale
+        output = signal
+
+        def pelt(row):
+            nonlocal acc, signal, output
+
+            # 1=running 0=sleeping
+            running = row['activations']
+            clock = row['clock']
+            delta = row['delta']
+            windows = row['crossed_windows'].astype('int')
+
+            # We crossed one or more windows boundaries
+            if windows:
+                # Handle last piece of the window in which this activation started
+                first_window_fraction = window - ((clock - delta) % window)
+                first_window_fraction /= window
+
+                acc += running * first_window_fraction
+                signal = alpha * acc + (1 - alpha) * signal
+
+                # Handle the windows we fully crossed
+                for _ in range(windows - 1):
+                    signal = alpha * running + (1 - alpha) * signal
+
+                # Handle the current incomplete window
+                last_window_fraction = (clock % window) / window
+
+                # Extrapolate the signal as it would look with the same
+                # `running` state at the end of the current window
+                extrapolated = running * alpha + (1 - alpha) * signal
+                # Take an value between signal and extrapolated based on the
+                # current completion of the window. This implements the same
+                # idea as introduced by kernel commit:
+                #  sched/cfs: Make util/load_avg more stable 625ed2bf049d5a352c1bcca962d6e133454eaaff
+                output = signal + last_window_fraction * (extrapolated - signal)
+
+                signal += alpha * running * last_window_fraction
+                acc = 0
+            # If we are still in the same window, just accumulate the running
+            # time
+            else:
+                acc += running * delta / window
+
+            return output * scale
+
+        return pelt
+
+    sim = make_pelt_sim(
+        init=init,
+        window=window,
+        half_life=half_life,
+        scale=scale,
+    )
+    df['pelt'] = df.apply(sim, axis=1)
+    return df['pelt']
+
+
+def make_activations(nr_periods, seed=0):
+    """
+    Make a series of random periodic activations, with some long sleeps.
+    """
+    rng = np.random.RandomState(seed)
+    durations = rng.uniform(1e-4, 20e-3, size=nr_periods * 2)
+    # A few long sleeps of several seconds
+    durations[1::50] *= 500
+    index = 1 + np.cumsum(durations)
+    values = np.tile([1, 0], nr_periods)
+    return pd.Series(values, index=index)
+
+
+class TestSimulatePELT(TestCase):
+    def _check(self, activations, **kwargs):
+        expected = simulate_pelt_reference(activations, **kwargs)
+        for scan in (lisa.pelt._pelt_scan_python, lisa.pelt._pelt_scan_numpy):
+            with self.subTest(scan=scan.__name__):
+                orig_scan = lisa.pelt._pelt_scan
+                lisa.pelt._pelt_scan = scan
+                try:
+                    pelt = simulate_pelt(activations, **kwargs)
+                finally:
+                    lisa.pelt._pelt_scan = orig_scan
+
+                self.assertTrue(pelt.index.equals(expected.index))
+                np.testing.assert_allclose(pelt.values, expected.values, rtol=1e-9, atol=1e-9)
+
+    def test_simulate_pelt(self):
+        self._check(make_activations(500))
+
+    def test_simulate_pelt_init(self):
+        self._check(make_activations(100, seed=1), init=512, half_life=8)
+
+    def test_simulate_pelt_index(self):
+        activations = make_activations(100, seed=2)
+        index = np.linspace(activations.index[0], activations.index[-1], 5000)
+        self._check(activations, index=index)
+
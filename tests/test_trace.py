@@ -17,16 +17,20 @@
 
 import json
 import os
-from unittest import TestCase
+import shutil
+import functools
+from unittest import TestCase, skipUnless
 import numpy as np
 import pandas as pd
 import copy
 
 from devlib.target import KernelVersion
 
-from lisa.trace import Trace, TaskID
-from lisa.datautils import df_squash
+from lisa.trace import Trace, TaskID, TrappyTraceParser, TxtTraceParser, DatTraceParser, TraceCache, PandasDataDesc, SharedSwapStore
+from lisa.datautils import df_squash, df_window
 from lisa.platforms.platinfo import PlatformInfo
+from lisa.analysis.tasks import TaskState, TasksAnalysis
+from lisa.analysis.cpus import CpusAnalysis
 from .utils import StorageTestCase, ASSET_DIR
 
 
@@ -55,7 +59,7 @@ class TraceTestCase(StorageTestCase):
         self.trace_path = os.path.join(self.traces_dir, 'trace.txt')
         self.trace = Trace(self.trace_path, self.plat_info, self.events)
 
-    def make_trace(self, in_data):
+    def make_trace(self, in_data, events=None):
         """
         Get a trace from an embedded string of textual trace data
         """
@@ -63,7 +67,8 @@ class TraceTestCase(StorageTestCase):
         with open(trace_path, "w") as fout:
             fout.write(in_data)
 
-        return Trace(trace_path, self.plat_info, self.events,
+        events = self.events if events is None else events
+        return Trace(trace_path, self.plat_info, events,
                      normalize_time=False, plots_dir=self.res_dir)
 
     def get_trace(self, trace_name):
@@ -144,6 +149,61 @@ class TestTrace(TraceTestCase):
         self.assertEqual(trace.get_task_name_pids('father'), [1234])
         self.assertEqual(trace.get_task_name_pids('father', ignore_fork=False), [1234, 5678])
 
+    def test_task_ids_swap(self):
+        """TestTrace: the task name/PID mapping is reloaded from the swap"""
+        in_data = """
+          father-1234  [002] 18765.018235: sched_switch:          prev_comm=father prev_pid=1234 prev_prio=120 prev_state=0 next_comm=father next_pid=5678 next_prio=120
+           child-5678  [002] 18766.018236: sched_switch:          prev_comm=child prev_pid=5678 prev_prio=120 prev_state=1 next_comm=sh next_pid=3367 next_prio=120
+        """
+        trace = self.make_trace(in_data, events=['sched_switch'])
+        tasks = trace.get_tasks()
+
+        task_ids = trace._cache.get_metadata('task-ids')['task-ids']
+        self.assertEqual(
+            [tuple(task_id[:2]) for task_id in task_ids],
+            [(1234, 'father'), (5678, 'father'), (5678, 'child'), (3367, 'sh')],
+        )
+        self.assertEqual(task_ids[0][2], 18765.018235)
+
+        # Reloading the trace must not require parsing any event
+        trace = Trace(trace.trace_path, self.plat_info, normalize_time=False)
+        self.assertEqual(trace.get_tasks(), tasks)
+        self.assertEqual(len(trace._cache._cache), 0)
+
+    def test_signal_cluster_active(self):
+        """
+        TestTrace: signal_cluster_active() is the OR of the CPUs active signals
+        """
+        in_data = """
+          <idle>-0     [000]   100.000000: cpu_idle:             state=4294967295 cpu_id=0
+          <idle>-0     [001]   100.500000: cpu_idle:             state=0 cpu_id=1
+          <idle>-0     [000]   101.000000: cpu_idle:             state=1 cpu_id=0
+          <idle>-0     [001]   102.000000: cpu_idle:             state=4294967295 cpu_id=1
+          <idle>-0     [001]   103.000000: cpu_idle:             state=0 cpu_id=1
+          <idle>-0     [000]   104.000000: cpu_idle:             state=4294967295 cpu_id=0
+        """
+        trace = self.make_trace(in_data, events=['cpu_idle'])
+        active = trace.analysis.idle.signal_cluster_active([0, 1])
+        active = active[~active.index.duplicated(keep='last')]
+
+        # The signal starts when all CPUs have reported their state, and the
+        # last transition gives the final state of the cluster
+        self.assertEqual(active.index.tolist(), [100.5, 101, 102, 103, 104])
+        self.assertEqual(active.tolist(), [1, 0, 1, 0, 1])
+
+    def test_compact_dtypes(self):
+        """
+        TestTrace: compact_dtypes=True only changes the dtypes of the events
+        """
+        df = self.trace.df_events('sched_switch')
+        self.assertEqual(df['next_comm'].dtype, object)
+
+        trace = Trace(self.trace_path, self.plat_info, self.events, compact_dtypes=True)
+        compact_df = trace.df_events('sched_switch')
+        self.assertEqual(compact_df['next_comm'].dtype, 'category')
+        self.assertEqual(compact_df['next_pid'].dtype, np.int32)
+        pd.testing.assert_frame_equal(compact_df.astype(df.dtypes.to_dict()), df)
+
     def test_time_range(self):
         """
         TestTrace: time_range is the duration of the trace
@@ -253,6 +313,73 @@ class TestTrace(TraceTestCase):
 
         trace.analysis.idle.plot_cpu_idle_state_residency(0)
 
+    def test_df_frequency_residency_all(self):
+        in_data = """
+            <idle>-0  [001] 1.0: cpu_frequency: state=1000 cpu_id=1
+            <idle>-0  [001] 1.0: cpu_frequency: state=1000 cpu_id=2
+            <idle>-0  [001] 1.0: cpu_idle: state=4294967295 cpu_id=1
+            <idle>-0  [002] 1.0: cpu_idle: state=0 cpu_id=2
+            <idle>-0  [001] 2.0: cpu_idle: state=0 cpu_id=1
+            <idle>-0  [001] 3.0: cpu_frequency: state=2000 cpu_id=1
+            <idle>-0  [001] 3.0: cpu_frequency: state=2000 cpu_id=2
+            <idle>-0  [002] 3.5: cpu_idle: state=4294967295 cpu_id=2
+            <idle>-0  [002] 5.0: cpu_idle: state=0 cpu_id=2
+        """
+        # The frequency domains are needed to compute the residencies
+        if not self.plat_info or 'freq-domains' not in self.plat_info:
+            self.skipTest('No frequency domains in the platform info')
+
+        trace = self.make_trace(in_data, events=['cpu_frequency', 'cpu_idle'])
+        analysis = trace.analysis.frequency
+        df = analysis.df_frequency_residency_all()
+
+        # CPUs 1 and 2 are in the 2nd frequency domain
+        self.assertEqual(set(df.index.get_level_values('cpu')), {1, 2})
+        self.assertEqual(set(df.index.get_level_values('domain')), {1})
+
+        def assert_times(series, expected):
+            self.assertEqual(len(series), len(expected))
+            for time, expected_time in zip(series, expected):
+                self.assertAlmostEqual(time, expected_time)
+
+        cpu1 = analysis.df_cpu_frequency_residency(1)
+        assert_times(cpu1['total_time'], [2, 2])
+        assert_times(cpu1['active_time'], [1, 0])
+
+        cpu2 = analysis.df_cpu_frequency_residency(2)
+        assert_times(cpu2['active_time'], [0, 1.5])
+
+        domain = analysis.df_domain_frequency_residency(2)
+        self.assertEqual(domain.index.tolist(), [1000, 2000])
+        assert_times(domain['active_time'], [1, 1.5])
+
+    def test_df_frequency_residency_incoherent(self):
+        # CPUs 0 and 3 are in the same frequency domain
+        in_data = """
+            <idle>-0  [001] 1.0: cpu_frequency: state=1000 cpu_id=0
+            <idle>-0  [001] 1.1: cpu_frequency: state=2000 cpu_id=3
+            <idle>-0  [001] 1.2: cpu_frequency: state=1000 cpu_id=1
+            <idle>-0  [001] 1.3: cpu_frequency: state=1000 cpu_id=2
+            <idle>-0  [001] 1.4: cpu_idle: state=4294967295 cpu_id=1
+            <idle>-0  [001] 2.0: cpu_idle: state=0 cpu_id=1
+            <idle>-0  [001] 3.0: cpu_frequency: state=2000 cpu_id=1
+            <idle>-0  [001] 3.1: cpu_frequency: state=2000 cpu_id=2
+        """
+        if not self.plat_info or 'freq-domains' not in self.plat_info:
+            self.skipTest('No frequency domains in the platform info')
+
+        trace = self.make_trace(in_data, events=['cpu_frequency', 'cpu_idle'])
+        analysis = trace.analysis.frequency
+
+        with self.assertRaises(ValueError):
+            analysis.df_frequency_residency_all()
+
+        # Only the requested CPU or domain is checked
+        cpu1 = analysis.df_cpu_frequency_residency(1)
+        self.assertEqual(cpu1.index.tolist(), [1000, 2000])
+        domain = analysis.df_domain_frequency_residency(2)
+        self.assertEqual(domain.index.tolist(), [1000, 2000])
+
     def test_deriving_cpus_count(self):
         """Test that Trace derives cpus_count if it isn't provided"""
         in_data = """
@@ -358,6 +485,469 @@ class TestTrace(TraceTestCase):
         # Proxy check for detecting delta computation changes
         self.assertAlmostEqual(df.delta.sum(), 134.568219)
 
+    def test_df_task_states(self):
+        analysis = self.trace.analysis.tasks
+        all_df = analysis.df_tasks_states()
+
+        # PIDs shared by several task names such as PID 0 cannot be passed to
+        # df_task_states()
+        pids = [
+            pid
+            for pid in all_df['pid'].unique()
+            if len(self.trace.get_task_ids(pid)) == 1
+        ]
+        for pid in pids[:10]:
+            df = analysis.df_task_states(pid)
+            exp_df = all_df[all_df['pid'] == pid]
+
+            self.assertEqual(len(df), len(exp_df))
+            self.assertEqual(df['next_state'].tolist(), exp_df['next_state'].tolist())
+            # The last state of each task has an unknown duration
+            self.assertTrue(np.isnan(df['delta'].iloc[-1]))
+            self.assertEqual(df['next_state'].iloc[-1], TaskState.TASK_UNKNOWN)
+            self.assertAlmostEqual(df['delta'].sum(), exp_df['delta'].sum())
+
+    def test_df_tasks_cpu_residency(self):
+        analysis = self.trace.analysis.tasks
+        sw_df = self.trace.df_events('sched_switch', signals_init=False)
+        residency_df = analysis.df_tasks_cpu_residency()
+        runtime_df = analysis.df_tasks_runtime()
+
+        # The time before the first switch of each CPU is unknown
+        cpu_runtime = residency_df['runtime'].sum(level='cpu')
+        for cpu, first in sw_df.groupby('__cpu').apply(lambda df: df.index[0]).iteritems():
+            self.assertAlmostEqual(cpu_runtime.loc[cpu], self.trace.end - first)
+
+        self.assertAlmostEqual(runtime_df['runtime'].sum(), cpu_runtime.sum())
+        for pid, row in runtime_df.iloc[:10].iterrows():
+            # The idle tasks all have PID 0, so they are selected by name
+            task = (pid, row['comm']) if pid == 0 else pid
+            df = analysis.df_task_total_residency(task)
+            self.assertEqual(df.index.tolist(), list(range(self.trace.cpus_count)))
+            self.assertAlmostEqual(df['runtime'].sum(), row['runtime'])
+
+        # The idle task of each CPU only runs on that CPU
+        total_df = analysis.df_tasks_total_residency()
+        swapper = total_df.loc['[0:swapper/0]']
+        self.assertAlmostEqual(swapper[0], 6.180685)
+        self.assertAlmostEqual(swapper['Total'], swapper[0])
+        self.assertEqual(
+            sorted(runtime_df.loc[0, 'comm']),
+            ['swapper/{}'.format(cpu) for cpu in range(self.trace.cpus_count)],
+        )
+
+        ctx_sw_df = self.trace.analysis.cpus.df_context_switches()
+        self.assertEqual(ctx_sw_df['context_switch_cnt'].sum(), len(sw_df))
+
+    def test_run_batch(self):
+        trace = Trace(self.trace_path, self.plat_info, self.events, enable_swap=False)
+        runtime_df, ctx_sw_df, residency_df = trace.analysis.run_batch([
+            TasksAnalysis.df_tasks_runtime,
+            (CpusAnalysis.df_context_switches, {}),
+            (TasksAnalysis.df_task_total_residency, dict(task=1)),
+        ], jobs=2)
+
+        pd.testing.assert_frame_equal(runtime_df, self.trace.analysis.tasks.df_tasks_runtime())
+        pd.testing.assert_frame_equal(ctx_sw_df, self.trace.analysis.cpus.df_context_switches())
+        pd.testing.assert_frame_equal(residency_df, self.trace.analysis.tasks.df_task_total_residency(1))
+
+        # The results are inserted in the cache of the trace
+        self.assertIs(trace.analysis.tasks.df_tasks_runtime(), runtime_df)
+        self.assertIs(trace.analysis.tasks.df_task_total_residency(task=1), residency_df)
+
+    def test_df_latency_all(self):
+        analysis = self.trace.analysis.latency
+        all_df = analysis.df_latency_all()
+        stats = analysis.df_latency_stats(quantiles=[0.5])
+        hist = analysis.df_latency_histogram(bins=[0, 1e-3, 1])
+
+        # PIDs shared by several task names such as PID 0 cannot be passed to
+        # df_latency_wakeup()
+        pids = [
+            pid
+            for pid in all_df['pid'].unique()
+            if len(self.trace.get_task_ids(pid)) == 1
+        ]
+        for pid in pids[:10]:
+            df = analysis.df_latency_wakeup(pid)
+            exp_df = all_df[all_df['pid'] == pid]['wakeup_latency'].dropna()
+
+            self.assertEqual(len(df), len(exp_df))
+            self.assertAlmostEqual(df['wakeup_latency'].sum(), exp_df.sum())
+
+            if len(df):
+                self.assertEqual(stats.loc[pid, 'count'], len(df))
+                self.assertAlmostEqual(stats.loc[pid, 'p50'], df['wakeup_latency'].median())
+                self.assertEqual(hist.loc[pid].sum(), (df['wakeup_latency'] < 1).sum())
+
+
+class TestTxtTraceParser(StorageTestCase):
+    """
+    Check that :class:`lisa.trace.TxtTraceParser` gives the same dataframes as
+    :class:`lisa.trace.TrappyTraceParser`
+    """
+
+    def _check_parsers(self, trace_path, events, **kwargs):
+        trappy_parser = TrappyTraceParser(trace_path, events)
+        txt_parser = TxtTraceParser(trace_path, events, **kwargs)
+
+        self.assertEqual(
+            txt_parser.get_metadata('time-range'),
+            trappy_parser.get_metadata('time-range'),
+        )
+
+        for event in events:
+            expected = trappy_parser.parse_event(event)
+            df = txt_parser.parse_event(event)
+            pd.testing.assert_frame_equal(df, expected, check_exact=True)
+
+    def test_txt_trace(self):
+        trace_path = os.path.join(ASSET_DIR, 'trace.txt')
+        events = ['sched_switch', 'sched_wakeup', 'sched_overutilized', 'cpu_frequency_devlib']
+        self._check_parsers(trace_path, events)
+        # Small blocks to check the line numbering and timestamps across
+        # blocks boundaries
+        self._check_parsers(trace_path, events, block_size=1000)
+
+    def test_parallel(self):
+        trace_path = os.path.join(ASSET_DIR, 'trace.txt')
+        events = ['sched_switch', 'sched_wakeup', 'sched_overutilized', 'cpu_frequency_devlib']
+        # Small blocks so that the file is split in many ranges parsed by
+        # the worker processes
+        self._check_parsers(trace_path, events, block_size=1000, jobs=2)
+
+    def test_trace_parser(self):
+        trace_path = os.path.join(ASSET_DIR, 'trace.txt')
+        events = ['sched_switch', 'sched_wakeup']
+        trace = Trace(trace_path, events=events, enable_swap=False)
+        txt_trace = Trace(trace_path, events=events, enable_swap=False, parser=TxtTraceParser)
+
+        self.assertEqual(txt_trace.basetime, trace.basetime)
+        self.assertEqual(txt_trace.endtime, trace.endtime)
+        for event in events:
+            pd.testing.assert_frame_equal(
+                txt_trace.df_events(event),
+                trace.df_events(event),
+            )
+
+    def test_events_index(self):
+        trace_path = os.path.join(ASSET_DIR, 'trace.txt')
+        events = ['sched_switch', 'sched_wakeup', 'sched_overutilized', 'cpu_frequency_devlib']
+
+        # Build the index while parsing another event
+        parser = TxtTraceParser(trace_path, ['cpu_idle'], block_size=1000)
+        index = parser.get_metadata('events-index')
+        # It must survive being stored in the swap area metadata
+        index = json.loads(json.dumps(index))
+
+        full_parser = TxtTraceParser(trace_path, events, block_size=1000)
+        indexed_parser = TxtTraceParser(trace_path, events, block_size=1000)
+        indexed_parser.set_metadata('events-index', index)
+
+        self.assertEqual(
+            indexed_parser.get_metadata('time-range'),
+            full_parser.get_metadata('time-range'),
+        )
+        for event in events:
+            pd.testing.assert_frame_equal(
+                indexed_parser.parse_event(event),
+                full_parser.parse_event(event),
+                check_exact=True,
+            )
+
+    def _check_iter_events(self, trace, events, window=None):
+        chunks = list(trace.iter_events(events, chunk_size=50, window=window))
+        for event in events:
+            expected = trace.df_events(event)
+            if window is not None:
+                expected = expected[window[0]:window[1]]
+
+            event_chunks = [
+                chunk[event]
+                for chunk in chunks
+                if event in chunk
+            ]
+            self.assertEqual(sum(map(len, event_chunks)), len(expected))
+            for df in event_chunks:
+                # With compact_dtypes=True, the categories of chunks parsed
+                # from the trace only contain the values found in that chunk
+                pd.testing.assert_frame_equal(
+                    df,
+                    expected.loc[df.index[0]:df.index[-1]],
+                    check_categorical=False,
+                )
+
+        for prev, chunk in zip(chunks, chunks[1:]):
+            prev_end = max(df.index[-1] for df in prev.values())
+            start = min(df.index[0] for df in chunk.values())
+            self.assertLess(prev_end, start)
+
+    def test_iter_events(self):
+        trace_path = os.path.join(ASSET_DIR, 'trace.txt')
+        events = ['sched_switch', 'sched_wakeup']
+        parser = functools.partial(TxtTraceParser, block_size=1000)
+
+        # Streamed from the parser
+        trace = Trace(trace_path, enable_swap=False, parser=parser)
+        self._check_iter_events(trace, events)
+
+        # Loaded from the cache
+        trace = Trace(trace_path, events=events, enable_swap=False, parser=parser)
+        self._check_iter_events(trace, events)
+        window = (trace.start + 0.1, trace.end - 0.1)
+        self._check_iter_events(trace, events, window=window)
+
+    # Both parsers need trace-cmd to convert the trace to text
+    @skipUnless(shutil.which('trace-cmd'), 'trace-cmd is not installed')
+    def test_dat_trace(self):
+        trace_path = os.path.join(ASSET_DIR, 'sched_load', 'trace.dat')
+        events = [
+            'cpu_frequency',
+            'cpu_idle',
+            'sched_load_cfs_rq',
+            'sched_load_se',
+            'sched_migrate_task',
+            'sched_switch',
+        ]
+        self._check_parsers(trace_path, events)
+
+    def test_quirks(self):
+        in_data = """version = 6
+cpus=2
+          <idle>-0     [001]    10.000000: cpu_frequency:        state=450000 cpu_id=1
+          <idle>-0     [000]    10.000000: cpu_idle:             state=4294967295 cpu_id=0
+CPU 1 is empty
+            task-12    [000] 10000001000: sched_switch:         prev_comm=task prev_pid=12 prev_prio=120 prev_state=S ==> next_comm=my task next_pid=13 next_prio=120
+            task-13    [001]    10.000001: sched_load_avg_cpu:   cpu=1 load={1 2 3} util=0x10
+            task-13    [001]    10.000002: sched_load_avg_cpu:   cpu=1 load={1 2} util=8 empty={} flag=1
+            task-13    [001]    10.000002: clock_set_rate:       bus_clk state=1000 cpu_id=0
+            task-13    [001]    10.000003: tracing_mark_write:   hello world
+            task-13    [001]    10.000003: tracing_mark_write:   rtapp_main: event=start
+          <idle>-0     [000]    10.000004: cpu_idle:             state=1 cpu_id=0
+"""
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        with open(trace_path, 'w') as f:
+            f.write(in_data)
+
+        events = [
+            'clock_set_rate',
+            'cpu_frequency',
+            'cpu_idle',
+            'rtapp_main',
+            'sched_load_avg_cpu',
+            'sched_switch',
+            'tracing_mark_write',
+        ]
+        self._check_parsers(trace_path, events)
+        self._check_parsers(trace_path, events, block_size=100)
+
+        parser = TxtTraceParser(trace_path, ['cpu_idle', 'sched_switch'])
+        df = parser.parse_event('sched_switch')
+        self.assertEqual(df['next_comm'].iloc[0], 'my task')
+        self.assertEqual(df.index[0], 10.000001)
+
+        df = parser.parse_event('cpu_idle')
+        self.assertEqual(df['state'].iloc[0], -1)
+        self.assertEqual(df.index[0], np.nextafter(10, np.inf))
+
+
+class TestDatTraceParser(StorageTestCase):
+    """
+    Check that :class:`lisa.trace.DatTraceParser` gives the same dataframes as
+    :class:`lisa.trace.TxtTraceParser`
+    """
+
+    def _skip_reference(self):
+        # The reference parsers need trace-cmd to convert the trace to text,
+        # which DatTraceParser does not need.
+        if not shutil.which('trace-cmd'):
+            self.skipTest('trace-cmd is not installed')
+
+    def test_dat_trace(self):
+        trace_path = os.path.join(ASSET_DIR, 'sched_load', 'trace.dat')
+        events = [
+            'cpu_frequency',
+            'cpu_frequency_devlib',
+            'cpu_idle',
+            'sched_load_cfs_rq',
+            'sched_load_se',
+            'sched_migrate_task',
+            'sched_switch',
+        ]
+        dat_parser = DatTraceParser(trace_path, events)
+        start, end = dat_parser.get_metadata('time-range')
+        dfs = {
+            event: dat_parser.parse_event(event)
+            for event in events
+        }
+        for event, df in dfs.items():
+            self.assertTrue(len(df))
+            self.assertTrue(df.index.is_monotonic_increasing)
+            self.assertGreaterEqual(df.index[0], start)
+            self.assertLessEqual(df.index[-1], end)
+
+        self._skip_reference()
+        txt_parser = TxtTraceParser(trace_path, events)
+
+        self.assertEqual(
+            (start, end),
+            txt_parser.get_metadata('time-range'),
+        )
+
+        for event, df in dfs.items():
+            expected = txt_parser.parse_event(event)
+            pd.testing.assert_frame_equal(df, expected, check_exact=True)
+
+    def test_trace_parser(self):
+        trace_path = os.path.join(ASSET_DIR, 'sched_load', 'trace.dat')
+        events = ['sched_switch', 'cpu_idle']
+        dat_trace = Trace(trace_path, events=events, enable_swap=False, parser=DatTraceParser)
+        dfs = {
+            event: dat_trace.df_events(event)
+            for event in events
+        }
+        for df in dfs.values():
+            self.assertGreaterEqual(df.index[0], dat_trace.start)
+            self.assertLessEqual(df.index[-1], dat_trace.end)
+
+        self._skip_reference()
+        trace = Trace(trace_path, events=events, enable_swap=False)
+
+        self.assertEqual(dat_trace.basetime, trace.basetime)
+        self.assertEqual(dat_trace.endtime, trace.endtime)
+        for event, df in dfs.items():
+            pd.testing.assert_frame_equal(df, trace.df_events(event))
+
+
+class TestTraceCache(StorageTestCase):
+    """
+    Check that data written to the swap area by :class:`lisa.trace.TraceCache`
+    can be reloaded with all the supported formats.
+    """
+
+    def _check_swap(self, fmt):
+        class Cache(TraceCache):
+            DATAFRAME_SWAP_FORMAT = fmt
+            # Make sure the window only selects some of the row groups
+            PARQUET_ROW_GROUP_SIZE = 10
+
+        cache = Cache(
+            trace_path=os.path.join(self.res_dir, 'trace.dat'),
+            swap_dir=self.res_dir,
+        )
+        df = pd.DataFrame(
+            {
+                'cpu': np.arange(100, dtype='uint32'),
+                'comm': ['task{}'.format(i % 3) for i in range(100)],
+            },
+            index=pd.Index(np.linspace(0, 1, 100), name='Time'),
+        )
+        pd_desc = PandasDataDesc(spec=dict(event='test', fmt=fmt))
+
+        cache.insert(pd_desc, df, write_swap=True, force_write_swap=True)
+        cache.evict(pd_desc)
+        self.assertTrue(any(
+            name.endswith('.' + fmt)
+            for name in os.listdir(self.res_dir)
+        ))
+
+        window = (0.25, 0.5)
+        reloaded = cache.fetch(pd_desc, window=window, columns=['cpu'])
+        pd.testing.assert_frame_equal(reloaded, df_window(df[['cpu']], window, method='pre'))
+
+        reloaded = cache.fetch(pd_desc)
+        pd.testing.assert_frame_equal(reloaded, df)
+
+    def test_swap_parquet(self):
+        self._check_swap('parquet')
+
+    def test_swap_feather(self):
+        self._check_swap('feather')
+
+    def test_swap_writable(self):
+        # Dataframes reloaded from the default swap format can be modified
+        cache = TraceCache(
+            trace_path=os.path.join(self.res_dir, 'trace.dat'),
+            swap_dir=self.res_dir,
+        )
+        df = pd.DataFrame(
+            {'cpu': np.arange(10, dtype='uint32')},
+            index=pd.Index(np.linspace(0, 1, 10), name='Time'),
+        )
+        pd_desc = PandasDataDesc(spec=dict(event='test'))
+
+        cache.insert(pd_desc, df, write_swap=True, force_write_swap=True)
+        cache.evict(pd_desc)
+        reloaded = cache.fetch(pd_desc)
+        reloaded.loc[reloaded.index[0], 'cpu'] = 3
+        self.assertEqual(reloaded['cpu'].iloc[0], 3)
+
+    def test_fast_validation(self):
+        trace_path = os.path.join(self.res_dir, 'trace.txt')
+        swap_dir = os.path.join(self.res_dir, 'swap')
+        os.makedirs(swap_dir)
+        content = bytearray(b'a' * (TraceCache.TRACE_ID_BLOCK_SIZE * 100))
+        with open(trace_path, 'wb') as f:
+            f.write(content)
+
+        def make_cache():
+            cache = TraceCache.from_swap_dir(swap_dir=swap_dir, trace_path=trace_path)
+            # Wait for the MD5 checksum computed in the background
+            if cache._md5_thread:
+                cache._md5_thread.join()
+            return cache
+
+        df = pd.DataFrame(
+            {'cpu': np.arange(100, dtype='uint32')},
+            index=pd.Index(np.linspace(0, 1, 100), name='Time'),
+        )
+        pd_desc = PandasDataDesc(spec=dict(event='test'))
+
+        cache = make_cache()
+        cache.insert(pd_desc, df, write_swap=True, force_write_swap=True)
+        cache.to_swap_dir()
+        pd.testing.assert_frame_equal(make_cache().fetch(pd_desc), df)
+
+        # Change a byte that is not sampled by the trace ID, so that only the
+        # MD5 checksum can detect it
+        stat = os.stat(trace_path)
+        content[TraceCache.TRACE_ID_BLOCK_SIZE + 1] = ord('b')
+        with open(trace_path, 'r+b') as f:
+            f.write(content)
+        os.utime(trace_path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+
+        with self.assertRaises(KeyError):
+            make_cache().fetch(pd_desc)
+
+    def test_shared_swap(self):
+        shared_swap = SharedSwapStore(os.path.join(self.res_dir, 'shared'))
+
+        def make_cache(name):
+            swap_dir = os.path.join(self.res_dir, name)
+            os.makedirs(swap_dir)
+            return TraceCache(
+                # Copies of the same trace
+                trace_path=os.path.join(swap_dir, 'trace.dat'),
+                trace_md5='0123',
+                swap_dir=swap_dir,
+                shared_swap=shared_swap,
+            )
+
+        df = pd.DataFrame(
+            {'cpu': np.arange(100, dtype='uint32')},
+            index=pd.Index(np.linspace(0, 1, 100), name='Time'),
+        )
+        pd_desc = PandasDataDesc(spec=dict(event='test'))
+
+        make_cache('swap1').insert(pd_desc, df, write_swap=True, force_write_swap=True)
+        pd.testing.assert_frame_equal(make_cache('swap2').fetch(pd_desc), df)
+
+        # Exceeding the size limit discards the least recently used entries
+        shared_swap.max_size = 0
+        shared_swap.scrub()
+        with self.assertRaises(KeyError):
+            make_cache('swap3').fetch(pd_desc)
+
 
 class TestTraceView(TraceTestCase):
 
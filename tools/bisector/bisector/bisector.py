@@ -32,6 +32,7 @@ import gzip
 import hashlib
 import importlib
 import inspect
+import io
 import itertools
 import json
 import logging
@@ -51,6 +52,7 @@ import shlex
 import shutil
 import signal
 import statistics
+import struct
 import subprocess
 import sys
 import textwrap
@@ -1905,6 +1907,15 @@ class LISATestStep(ShellStep):
                     )
                 db = db.prune_by_predicate(prune_predicate)
 
+            # The values of the DB are lazily loaded from the artifact
+            # directory, so make sure they are all loaded before it gets
+            # archived or deleted.
+            try:
+                db.load_values()
+            except Exception as e:
+                warn('Could not load values of DB at {}: {}'.format(db_path, e))
+                db = None
+
         # Compress artifact directory
         if self.compress_artifact:
             try:
@@ -3668,14 +3679,69 @@ def disable_gc(f):
     return wrapper
 
 
+def iter_steps(step):
+    """
+    Iterate over the given step and all its nested steps, depth first.
+    """
+    yield step
+    if isinstance(step, MacroStep):
+        for substep in step.steps_list:
+            yield from iter_steps(substep)
+
+
+class _JournalPickler(pickle.Pickler):
+    """
+    Pickle steps results while referring to the steps stored in the header of
+    a journal, so that they are shared with the report once reloaded.
+    """
+
+    def __init__(self, f, steps):
+        super().__init__(f, protocol=4)
+        self._steps_id = {
+            id(step): i
+            for i, step in enumerate(steps)
+        }
+
+    def persistent_id(self, obj):
+        if isinstance(obj, StepABC):
+            return self._steps_id.get(id(obj))
+        else:
+            return None
+
+
+class _JournalUnpickler(pickle.Unpickler):
+    def __init__(self, f, steps):
+        super().__init__(f)
+        self._steps = steps
+
+    def persistent_load(self, pid):
+        return self._steps[pid]
+
+
 class Report(Serializable):
     """
     Report body containg the result of the top level :class:`MacroStep` .
+
+    Reports with a ``.journal`` extension are saved as a sequence of
+    independently compressed records: the preamble, the report without its
+    iterations, and then one record per :class:`StepSeqResult`. Saving the
+    report again only appends the iterations that were not saved already,
+    so the cost does not grow with the number of iterations.
     """
 
     yaml_tag = '!report'
     # The preamble is saved separately
-    dont_save = ['preamble', 'path']
+    dont_save = ['preamble', 'path', '_journal']
+
+    JOURNAL_EXTENSION = '.journal'
+    """
+    Extension of the journaled report files.
+    """
+
+    JOURNAL_RECORD_HEADER = struct.Struct('<Q')
+    """
+    Header of each record of a journal, containing the size of the record.
+    """
 
     yaml = ruamel.yaml.YAML(typ='unsafe')
 
@@ -3746,18 +3812,131 @@ class Report(Serializable):
 
         yaml.representer.add_representer(str, str_presenter)
 
-    def save(self, path=None, upload_service=None):
+    @classmethod
+    def _is_journal(cls, path):
+        return pathlib.Path(path).suffix == cls.JOURNAL_EXTENSION
+
+    @classmethod
+    def _make_journal_record(cls, data):
+        data = gzip.compress(data, compresslevel=6)
+        return cls.JOURNAL_RECORD_HEADER.pack(len(data)) + data
+
+    @classmethod
+    def _read_journal(cls, f):
+        """
+        Read the records of a journal.
+
+        :returns: A tuple ``(records, size)`` where ``size`` is the size of
+            the valid part of the file. A record that was only partially
+            written is ignored.
+        """
+        header_size = cls.JOURNAL_RECORD_HEADER.size
+        records = []
+        size = 0
+        while True:
+            header = f.read(header_size)
+            if not header:
+                break
+
+            data = b''
+            if len(header) == header_size:
+                record_size, = cls.JOURNAL_RECORD_HEADER.unpack(header)
+                data = f.read(record_size)
+
+            if len(header) < header_size or len(data) < record_size:
+                warn('Ignoring truncated record at the end of the journal at offset {}'.format(size))
+                break
+
+            records.append(gzip.decompress(data))
+            size += header_size + record_size
+
+        return (records, size)
+
+    def _save_journal(self, path, compact):
+        """
+        Save the report as a journal, appending the new iterations if the
+        file was already written by this instance.
+        """
+        res_list = self.result.res_list
+        steps = list(iter_steps(self.result.step))
+        state = getattr(self, '_journal', None)
+
+        def same_steps(steps1, steps2):
+            return len(steps1) == len(steps2) and all(
+                step1 is step2
+                for step1, step2 in zip(steps1, steps2)
+            )
+
+        def dump_res(res):
+            f = io.BytesIO()
+            _JournalPickler(f, steps).dump(res)
+            return self._make_journal_record(f.getvalue())
+
+        try:
+            size = os.path.getsize(path)
+        except FileNotFoundError:
+            size = None
+
+        # Only append to a journal we know the content of
+        if (
+            not compact and
+            state is not None and
+            state['path'] == path and
+            state['size'] == size and
+            state['nr_res'] <= len(res_list) and
+            same_steps(state['steps'], steps)
+        ):
+            with open(path, 'r+b') as f:
+                f.seek(size)
+                for res in res_list[state['nr_res']:]:
+                    f.write(dump_res(res))
+                size = f.tell()
+        else:
+            # Save the report without its results, which are recorded
+            # separately
+            report = copy.copy(self)
+            report.result = copy.copy(self.result)
+            report.result.res_list = []
+
+            temp_path = os.path.join(
+                os.path.dirname(path),
+                '.{filename}.temp'.format(filename=os.path.basename(path))
+            )
+            with open(temp_path, 'wb') as f:
+                f.write(self._make_journal_record(pickle.dumps(self.preamble, protocol=4)))
+                f.write(self._make_journal_record(pickle.dumps(report, protocol=4)))
+                for res in res_list:
+                    f.write(dump_res(res))
+                size = f.tell()
+
+            os.replace(temp_path, path)
+
+        self._journal = dict(
+            path=path,
+            size=size,
+            nr_res=len(res_list),
+            steps=steps,
+        )
+
+    def save(self, path=None, upload_service=None, compact=False):
         """Save the report to the specified path.
 
         :param path: Used to save the report is not None, otherwise use the
              existing ``path`` attribute.
 
+        :param compact: If ``True``, journaled reports are written again from
+            scratch instead of only appending the new iterations. This is
+            needed if anything else than the list of iterations was modified.
         """
         if path:
             self.path = path
 
         ensure_dir(self.path)
 
+        if self._is_journal(self.path):
+            self._save_journal(self.path, compact=compact)
+            return self._upload(path, upload_service)
+
         open_f, is_yaml = check_report_path(self.path, probe_file=False)
         # File in which the report is written, before being renamed to its
         # final name
@@ -3789,6 +3968,9 @@ class Report(Serializable):
         # report completed with success
         os.replace(temp_path, self.path)
 
+        return self._upload(path, upload_service)
+
+    def _upload(self, path, upload_service):
         # Upload if needed
         url = None
         if upload_service:
@@ -3842,8 +4024,42 @@ class Report(Serializable):
                 excep = import_files(src_files)
             return excep
 
+        journal = None
+        if cls._is_journal(path):
+            with open(path, 'rb') as f:
+                records, size = cls._read_journal(f)
+
+            if len(records) < 2:
+                raise ValueError('Could not load the preamble and report in journal: {path}'.format(
+                    path=path
+                ))
+
+            preamble = pickle.loads(records[0])
+            excep = import_modules(steps_path, preamble.src_files)
+            try:
+                report = pickle.loads(records[1])
+                # Replay the iterations on top of the report
+                steps = list(iter_steps(report.result.step))
+                res_list = report.result.res_list
+                for record in records[2:]:
+                    res_list.append(
+                        _JournalUnpickler(io.BytesIO(record), steps).load()
+                    )
+            except Exception as e:
+                if excep is not None:
+                    error(excep)
+                raise
+
+            # Allow appending to the journal when saving the report again
+            journal = dict(
+                path=path,
+                size=size,
+                nr_res=len(res_list),
+                steps=steps,
+            )
+
         # Read as YAML or Pickle depending on the filename.
-        if is_yaml:
+        elif is_yaml:
             # Get the generator that will parse the YAML documents
             with open_f(path, 'rt', encoding='utf-8') as f:
                 documents = cls.yaml.load_all(f)
@@ -3894,6 +4110,7 @@ class Report(Serializable):
 
         # Update the path so it can be saved again
         report.path = path
+        report._journal = journal
 
         if report.preamble.tool_sha1 != TOOL_SHA1:
             debug('Loading a report generated with an earlier version of the tool.')
@@ -4979,7 +5196,11 @@ command line""")
         slow to generate and load, Pickle format cannot expected to be backward
         compatible with different versions of the tool but can be faster to read
         and write. CAVEAT: Pickle format will not handle references to modules
-        that are not in sys.path.""")
+        that are not in sys.path. If the file name ends with .journal, the
+        report is saved as Pickle records, and only the new iterations are
+        appended when the report is saved at every iteration. It can be
+        compacted in another format using the --export option of the report
+        subcommand.""")
 
     run_parser.add_argument('--overwrite', action='store_true',
         help="""Overwrite existing report files.""")
@@ -5021,7 +5242,8 @@ command line""")
     report_parser.add_argument('--export',
         help="""Export the report as a Pickle or YAML file. File format is
         infered from the filename. If it ends with .pickle, a Pickle file is
-        created, otherwise YAML format is used.""")
+        created, if it ends with .journal, a journaled report is created,
+        otherwise YAML format is used.""")
 
     report_parser.add_argument('--cache', action='store_true',
         help="""When loading a report, create a cache file named "{template}"
@@ -5137,7 +5359,7 @@ command line""")
         report = Report.load(report_path, steps_path)
         # Partially reinitialize the steps, with the updated command line options
         report.result.step.reinit(step_options=step_options)
-        report.save()
+        report.save(compact=True)
 
         return 0
 
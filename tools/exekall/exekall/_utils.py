@@ -230,6 +230,23 @@ def get_src_loc(obj, shorten=True):
     return (str(src_file), src_line)
 
 
+def impure(callable_):
+    """
+    Decorator marking a callable as impure, i.e. its result does not only
+    depend on its parameters. Results of such callables are never reused from
+    a :class:`exekall.engine.ResultCache`.
+    """
+    callable_._exekall_impure = True
+    return callable_
+
+
+def is_impure(callable_):
+    """
+    Check if a callable was marked with :func:`impure`.
+    """
+    return bool(getattr(callable_, '_exekall_impure', False))
+
+
 def is_serializable(obj, raise_excep=False):
     """
     Try to Pickle the object to see if that raises any exception.
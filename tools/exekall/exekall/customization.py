@@ -50,6 +50,16 @@ class AdaptorBase:
         """
         return set()
 
+    def get_exclusive_type_set(self):
+        """
+        Return a set of types that can only be computed in the main process
+        when running with multiple jobs, along with everything sharing a
+        subexpression with them.
+
+        Defaults to an empty set.
+        """
+        return set()
+
     @staticmethod
     def get_tags(value):
         """
@@ -195,6 +205,24 @@ class AdaptorBase:
         """
         return db
 
+    @classmethod
+    def reload_value(cls, value, path=None):
+        """
+        Hook called when reloading a value of a serialized
+        :class:`exekall.engine.ValueDB` from a file. The returned value will be
+        used.
+
+        With databases stored in indexed format, this is called when the value
+        is first accessed rather than when the database is loaded.
+
+        :param value: Value that has just been deserialized.
+        :type value: object
+
+        :param path: Path of the file of the serialized database.
+        :type path: str or pathlib.Path
+        """
+        return value
+
     def finalize_expr(self, expr):
         """
         Finalize an :class:`exekall.engine.ComputableExpression` right after
@@ -23,8 +23,14 @@ import copy
 import itertools
 import functools
 import lzma
+import multiprocessing
 import pathlib
 import contextlib
+import copyreg
+import fcntl
+import hashlib
+import json
+import os
 import pickle
 import pprint
 import pickletools
@@ -32,6 +38,8 @@ import re
 import importlib
 import sys
 import io
+import struct
+import tempfile
 import datetime
 from operator import attrgetter
 
@@ -66,6 +74,103 @@ class IndentationManager:
         return str(self.style) * self.level
 
 
+def _materialize(value):
+    return value
+
+
+class _LazyValue:
+    """
+    Placeholder for a value of a :class:`FrozenExprVal` that has not been
+    loaded yet from an indexed :class:`ValueDB` file.
+
+    :param store: Store to load the value from.
+    :type store: _ValueChunkStore
+
+    :param chunk_idx: Index of the chunk containing the value.
+    :type chunk_idx: int
+
+    :param idx: Index of the value in the chunk.
+    :type idx: int
+    """
+
+    def __init__(self, store, chunk_idx, idx):
+        self.store = store
+        self.chunk_idx = chunk_idx
+        self.idx = idx
+
+    def load(self):
+        return self.store.get_chunk(self.chunk_idx)[self.idx]
+
+    # Copying the graph of FrozenExprVal (e.g. when pruning the DB) must not
+    # load the values.
+    def __copy__(self):
+        return self
+
+    def __deepcopy__(self, memo):
+        return self
+
+    def __reduce_ex__(self, protocol):
+        """
+        Pickle the actual value, so that the pickle does not depend on the
+        file the value is lazily loaded from.
+        """
+        return (_materialize, (self.load(),))
+
+
+class _ValueChunkStore:
+    """
+    Load on demand the chunks of values of an indexed :class:`ValueDB` file.
+
+    :param path: Path to the file.
+    :type path: str
+
+    :param token: Random token written in the header of the file when it was
+        created, used to detect a file that has been overwritten.
+    :type token: bytes
+
+    :param chunk_table: List of ``(offset, size)`` of each chunk in the file.
+    :type chunk_table: list(tuple(int, int))
+
+    :param value_hook: Callable applied to each value when it is loaded.
+    :type value_hook: collections.abc.Callable or None
+    """
+
+    def __init__(self, path, token, chunk_table, value_hook=None):
+        self.path = path
+        self.token = token
+        self.chunk_table = chunk_table
+        self.value_hook = value_hook
+        self._chunks = {}
+
+    def get_raw_chunk(self, chunk_idx):
+        """
+        Get the compressed bytes of a chunk, as stored in the file.
+        """
+        offset, size = self.chunk_table[chunk_idx]
+        with open(self.path, 'rb') as f:
+            header = ValueDB._read_indexed_header(f)
+            if header is None or header[0] != self.token:
+                raise ValueError('{} has been modified since it was opened'.format(self.path))
+            f.seek(offset)
+            return f.read(size)
+
+    def get_chunk(self, chunk_idx):
+        try:
+            return self._chunks[chunk_idx]
+        except KeyError:
+            pass
+
+        bytes_ = lzma.decompress(self.get_raw_chunk(chunk_idx))
+        with utils.disable_gc():
+            chunk = pickle.loads(bytes_)
+
+        if self.value_hook:
+            chunk = [self.value_hook(value) for value in chunk]
+
+        self._chunks[chunk_idx] = chunk
+        return chunk
+
+
 class ValueDB:
     """
     Serializable object that contains a graph of :class:`FrozenExprVal`.
@@ -92,6 +197,18 @@ class ValueDB:
     # dumping speed.
     PICKLE_PROTOCOL = 4
 
+    INDEXED_MAGIC = b'EXEKALL-INDEXED-VALUEDB\n'
+    """
+    Magic string at the beginning of files in indexed format.
+    """
+
+    _INDEXED_HEADER = struct.Struct('<16sQ')
+
+    INDEXED_CHUNK_SIZE = 16
+    """
+    Number of values stored in each chunk of the indexed format.
+    """
+
     def __init__(self, froz_val_seq_list, adaptor_cls=None):
         # Avoid storing duplicate FrozenExprVal sharing the same value/excep
         # UUID
@@ -213,12 +330,63 @@ class ValueDB:
 
         return db
 
+    @classmethod
+    def merge_paths(cls, path_list, output_path, roots_from=None):
+        """
+        Merge multiple database files together into ``output_path``, in
+        indexed format.
+
+        :param path_list: Lists of paths of DB to merge
+        :type path_list: list(str or pathlib.Path)
+
+        :param output_path: Path of the merged DB.
+        :type output_path: str or pathlib.Path
+
+        :param roots_from: Path of a DB to take the roots from, see
+            :meth:`merge`. It can be the same as ``output_path``.
+        :type roots_from: str or pathlib.Path
+
+        Contrary to :meth:`merge`, the databases are loaded one at a time and
+        only their graph of :class:`FrozenExprVal` is kept in memory: the
+        values are copied chunk by chunk to the output file without being
+        deserialized. Databases that are not in indexed format are converted
+        to a temporary indexed file first, so that the peak memory consumption
+        is bounded by the largest input rather than by the sum of all of them.
+        """
+        output_path = pathlib.Path(output_path)
+
+        with tempfile.TemporaryDirectory(dir=str(output_path.parent)) as tmp_dir:
+            tmp_path_gen = (
+                os.path.join(tmp_dir, str(i))
+                for i in itertools.count()
+            )
+
+            def load(path):
+                with open(str(path), 'rb') as f:
+                    indexed = cls._read_indexed_header(f) is not None
+                db = cls.from_path(path)
+                if not indexed:
+                    tmp_path = next(tmp_path_gen)
+                    db.to_path(tmp_path, indexed=True)
+                    db = cls.from_path(tmp_path)
+                return db
+
+            db_list = [load(path) for path in path_list]
+            if roots_from is not None:
+                roots_from = load(roots_from)
+
+            merged_db = cls.merge(db_list, roots_from=roots_from)
+            # The input files must not be removed before the values are copied
+            merged_db.to_path(output_path, indexed=True)
+
     @classmethod
     def from_path(cls, path, relative_to=None):
         """
         Deserialize a :class:`ValueDB` from a file.
 
-        At the moment, it is assumed to be an LZMA compressed Pickle file.
+        The file is either an LZMA compressed Pickle file, or a file in the
+        indexed format written by :meth:`to_path`. In the latter case, the
+        values are only loaded when they are first accessed.
 
         :param path: Path to the file containing the serialized
             :class:`ValueDB`.
@@ -237,12 +405,49 @@ class ValueDB:
                 relative_to = pathlib.Path(relative_to).parent
             path = pathlib.Path(relative_to, path)
 
-        with lzma.open(str(path), 'rb') as f:
-            # Disabling garbage collection while loading result in significant
-            # speed improvement, since it creates a lot of new objects in a
-            # very short amount of time.
+        with open(str(path), 'rb') as f:
+            header = cls._read_indexed_header(f)
+            if header is None:
+                f.seek(0)
+                with lzma.open(f, 'rb') as xz_f:
+                    # Disabling garbage collection while loading result in
+                    # significant speed improvement, since it creates a lot of
+                    # new objects in a very short amount of time.
+                    with utils.disable_gc():
+                        db = pickle.load(xz_f)
+                indexed = False
+            else:
+                token, index_offset = header
+                f.seek(index_offset)
+                index = io.BytesIO(lzma.decompress(f.read()))
+                indexed = True
+
+        if indexed:
+            chunk_table = pickle.load(index)
+            adaptor_cls = pickle.load(index)
+            if adaptor_cls:
+                value_hook = functools.partial(adaptor_cls.reload_value, path=path)
+            else:
+                value_hook = None
+
+            store = _ValueChunkStore(
+                path=str(path),
+                token=token,
+                chunk_table=chunk_table,
+                value_hook=value_hook,
+            )
+
+            unpickler = pickle.Unpickler(index)
+            unpickler.persistent_load = lambda pid: _LazyValue(store, *pid)
             with utils.disable_gc():
-                db = pickle.load(f)
+                db = unpickler.load()
+        else:
+            adaptor_cls = db.adaptor_cls
+            if adaptor_cls:
+                for froz_val in db.get_all():
+                    if froz_val.value is not NoValue:
+                        froz_val.value = adaptor_cls.reload_value(froz_val.value, path=path)
+
         assert isinstance(db, cls)
 
         # Apply some post-processing on the DB with a known path
@@ -250,6 +455,19 @@ class ValueDB:
 
         return db
 
+    @classmethod
+    def _read_indexed_header(cls, f):
+        """
+        Read the header of an indexed file.
+
+        :return: A tuple ``(token, index_offset)``, or ``None`` if the file is
+            not in indexed format.
+        """
+        magic = f.read(len(cls.INDEXED_MAGIC))
+        if magic != cls.INDEXED_MAGIC:
+            return None
+        return cls._INDEXED_HEADER.unpack(f.read(cls._INDEXED_HEADER.size))
+
     @classmethod
     def _reload_serialized(cls, dct):
         db = cls.__new__(cls)
@@ -275,7 +493,7 @@ class ValueDB:
             db = adaptor_cls.reload_db(db, path=path)
         return db
 
-    def to_path(self, path, optimize=True):
+    def to_path(self, path, optimize=True, indexed=False):
         """
         Write the DB to the given file.
 
@@ -286,7 +504,21 @@ class ValueDB:
             increase the dump time and memory consumption, but should speed-up
             loading/file size.
         :type optimize: bool
-        """
+
+        :param indexed: If True, the values are stored in separately
+            compressed chunks of :attr:`INDEXED_CHUNK_SIZE` values, and the
+            rest of the graph of :class:`FrozenExprVal` (UUIDs, IDs, tags,
+            exceptions etc.) is stored in a separate index. Reloading such
+            file with :meth:`from_path` only loads the index, and values are
+            loaded on first access. Object identity between values is only
+            preserved inside a chunk. Values that have not been loaded yet
+            from another indexed file are copied without being deserialized.
+        :type indexed: bool
+        """
+        if indexed:
+            self._to_indexed_path(path, optimize=optimize)
+            return
+
         if optimize:
             bytes_ = pickle.dumps(self, protocol=self.PICKLE_PROTOCOL)
             bytes_ = pickletools.optimize(bytes_)
@@ -297,6 +529,125 @@ class ValueDB:
         with lzma.open(str(path), 'wb') as f:
             dumper(f)
 
+    def _to_indexed_path(self, path, optimize):
+        def dumps(obj, pickler_cls=pickle.Pickler, **kwargs):
+            f = io.BytesIO()
+            pickler = pickler_cls(f, protocol=self.PICKLE_PROTOCOL)
+            for attr, val in kwargs.items():
+                setattr(pickler, attr, val)
+            pickler.dump(obj)
+            bytes_ = f.getvalue()
+            if optimize:
+                bytes_ = pickletools.optimize(bytes_)
+            return bytes_
+
+        froz_val_refs = {}
+
+        def reduce_froz_val(froz_val):
+            state = froz_val.__dict__.copy()
+            state['_value'] = froz_val_refs[id(froz_val)]
+            return (copyreg.__newobj__, (type(froz_val),), state)
+
+        dispatch_table = copyreg.dispatch_table.copy()
+        dispatch_table.update(
+            (cls, reduce_froz_val)
+            for cls in utils.get_subclasses(FrozenExprVal)
+        )
+
+        def persistent_id(obj):
+            if isinstance(obj, _LazyValue):
+                return (obj.chunk_idx, obj.idx)
+            else:
+                return None
+
+        token = os.urandom(16)
+        header_offset = len(self.INDEXED_MAGIC)
+        # Write to a temporary file and atomically replace the destination, so
+        # that existing hardlinks to the destination are left untouched. This
+        # also allows lazily loading values from the file being overwritten
+        # until the very end.
+        tmp_path = '{}.{}.tmp'.format(path, token.hex())
+        with open(tmp_path, 'wb') as f:
+            f.write(self.INDEXED_MAGIC)
+            f.write(self._INDEXED_HEADER.pack(token, 0))
+
+            chunk_table = []
+
+            def write_chunk(bytes_):
+                chunk_table.append((f.tell(), len(bytes_)))
+                f.write(bytes_)
+                return len(chunk_table) - 1
+
+            # Values that have not been loaded yet from another indexed file
+            # are copied chunk by chunk without being deserialized. Each
+            # source chunk is only copied once.
+            raw_chunk_map = {}
+            # Other values are gathered in DFS order, so that related values
+            # tend to end up in the same chunk. Values shared by multiple
+            # FrozenExprVal are only stored once. The chunk index of a ref is
+            # only known when the chunk is written.
+            value_refs = {}
+            pending = []
+            pending_refs = []
+
+            def flush_pending():
+                if pending:
+                    chunk_idx = write_chunk(lzma.compress(dumps(pending)))
+                    for ref in pending_refs:
+                        ref.chunk_idx = chunk_idx
+                    pending.clear()
+                    pending_refs.clear()
+
+            def add_value(froz_val):
+                if id(froz_val) in froz_val_refs:
+                    return froz_val
+
+                value = froz_val._value
+                if value is NoValue:
+                    ref = NoValue
+                elif isinstance(value, _LazyValue):
+                    store = value.store
+                    key = (id(store), value.chunk_idx)
+                    try:
+                        _, chunk_idx = raw_chunk_map[key]
+                    except KeyError:
+                        chunk_idx = write_chunk(store.get_raw_chunk(value.chunk_idx))
+                        # Keep a reference on the store so its id() cannot be
+                        # reused
+                        raw_chunk_map[key] = (store, chunk_idx)
+                    ref = _LazyValue(None, chunk_idx, value.idx)
+                else:
+                    # The value is kept alive by the graph of FrozenExprVal,
+                    # so its id() cannot be reused by another object
+                    try:
+                        ref = value_refs[id(value)]
+                    except KeyError:
+                        ref = _LazyValue(None, None, len(pending))
+                        pending.append(value)
+                        pending_refs.append(ref)
+                        value_refs[id(value)] = ref
+                        if len(pending) >= self.INDEXED_CHUNK_SIZE:
+                            flush_pending()
+
+                froz_val_refs[id(froz_val)] = ref
+                return froz_val
+
+            self._froz_val_dfs(self.froz_val_seq_list, add_value)
+            flush_pending()
+
+            index_offset = f.tell()
+            index = dumps(chunk_table) + dumps(self.adaptor_cls) + dumps(
+                self,
+                dispatch_table=dispatch_table,
+                persistent_id=persistent_id,
+            )
+            f.write(lzma.compress(index))
+
+            f.seek(header_offset)
+            f.write(self._INDEXED_HEADER.pack(token, index_offset))
+
+        os.replace(tmp_path, str(path))
+
     @property
     @utils.once
     def _uuid_map(self):
@@ -502,6 +853,17 @@ class ValueDB:
         """
         return self.get_by_predicate(lambda froz_val: True, **kwargs)
 
+    def load_values(self):
+        """
+        Load all the values that have not been loaded yet from the indexed
+        file this :class:`ValueDB` was created from.
+
+        Once done, the database does not depend on that file anymore, so it
+        can be deleted or moved.
+        """
+        for froz_val in self.get_all():
+            froz_val.value
+
     def get_by_type(self, cls, include_subclasses=True, **kwargs):
         """
         Get all :class:`FrozenExprVal` contained in this database which value
@@ -555,6 +917,240 @@ class ValueDB:
         return self.get_by_predicate(predicate, **kwargs)
 
 
+class ResultCache:
+    """
+    Persistent cache of the values computed by :class:`Operator`, shared
+    across sessions.
+
+    :param path: Folder of the cache.
+    :type path: str or pathlib.Path
+
+    :param max_size: Maximum size of the cache in bytes. When exceeded, the
+        least recently used entries are discarded. If ``None``, the size is
+        not limited.
+    :type max_size: int or None
+
+    Entries are content addressed: the key is made of the qualified name and
+    source code of the callable, and of the UUID of each parameter value.
+    When an entry is reused, the values get the UUID they were given when they
+    were first computed, so that the values computed from them can be found
+    in the cache as well.
+
+    Only the results of reusable callables with parameters that did not raise
+    any exception are cached. Callables marked with
+    :func:`exekall._utils.impure` are never cached. Values added during the
+    session are not reused within that same session, so that repeated
+    computations (e.g. iterations) behave as if there was no cache.
+
+    The size of the cache is only computed once, and then updated with the
+    entries added by this instance. The least recently used entries are only
+    discarded when that size exceeds ``max_size``. Entries added by other
+    processes are accounted for when the cache is scrubbed.
+
+    .. note:: Only the source of the callable itself is taken into account,
+        not the source of what it calls. The cache should be cleared when
+        such dependencies change.
+    """
+
+    FORMAT_VERSION = 1
+    """
+    Version of the format of the entries, included in the keys.
+    """
+
+    LOCK_FILENAME = '.lock'
+    """
+    Name of the lock file in the cache folder.
+    """
+
+    TMP_EXTENSION = '.tmp'
+    """
+    Extension of the entries being added to the cache.
+    """
+
+    def __init__(self, path, max_size=None):
+        self.path = pathlib.Path(path).resolve()
+        self.max_size = max_size
+        self.path.mkdir(parents=True, exist_ok=True)
+        self._src_hash_map = {}
+        self._added_key_set = set()
+        self._size = None
+
+    @contextlib.contextmanager
+    def _lock(self):
+        with (self.path / self.LOCK_FILENAME).open('a') as f:
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+    def _get_src_hash(self, op):
+        try:
+            return self._src_hash_map[op]
+        except KeyError:
+            pass
+
+        try:
+            src = inspect.getsource(op.unwrapped_callable)
+        # The source is not always available, e.g. for builtins
+        except (OSError, TypeError):
+            src_hash = None
+        else:
+            src_hash = hashlib.sha256(src.encode('utf-8')).hexdigest()
+
+        self._src_hash_map[op] = src_hash
+        return src_hash
+
+    def make_key(self, op, param_map):
+        """
+        Make the key of the values computed by an :class:`Operator` with the
+        given parameters.
+
+        :param op: Operator computing the values.
+        :type op: Operator
+
+        :param param_map: Parameters the operator is called with.
+        :type param_map: ExprValParamMap
+
+        :return: The key as a string, or ``None`` if the result of that
+            operator cannot be cached.
+        """
+        if (
+            not param_map
+            or not op.reusable
+            or isinstance(op, PrebuiltOperator)
+            or utils.is_impure(op.callable_)
+            or utils.is_impure(op.unwrapped_callable)
+        ):
+            return None
+
+        src_hash = self._get_src_hash(op)
+        if src_hash is None:
+            return None
+
+        mapping = {
+            'format-version': self.FORMAT_VERSION,
+            'callable': op.get_name(full_qual=True),
+            'src-hash': src_hash,
+            'params': {
+                param: expr_val.uuid
+                for param, expr_val in param_map.items()
+            },
+        }
+        data = json.dumps(mapping, sort_keys=True).encode('utf-8')
+        return hashlib.sha256(data).hexdigest()
+
+    def _path_of(self, key):
+        # Spread the files in sub-folders to keep the folders small
+        return self.path / key[:2] / '{}.pickle.xz'.format(key)
+
+    def get(self, key):
+        """
+        Get the entry of the given key, and mark it as recently used.
+
+        :return: A list of tuples ``(uuid, value, duration, log)``, one for
+            each value computed by the operator.
+
+        :raises KeyError: If there is no such entry in the cache.
+        """
+        if key in self._added_key_set:
+            raise KeyError(key)
+
+        path = self._path_of(key)
+        try:
+            with lzma.open(str(path), 'rb') as f:
+                entry = pickle.load(f)
+            os.utime(str(path))
+        except FileNotFoundError:
+            raise KeyError(key)
+        # A corrupted entry is just ignored
+        except (EOFError, lzma.LZMAError, pickle.UnpicklingError):
+            raise KeyError(key)
+
+        return entry
+
+    def add(self, key, entry):
+        """
+        Add an entry to the cache.
+
+        :param key: Key of the entry, see :meth:`make_key`.
+        :type key: str
+
+        :param entry: List of ``(uuid, value, duration, log)`` tuples.
+        :type entry: list(tuple)
+
+        :return: ``True`` if the entry was added, ``False`` if it could not be
+            serialized.
+        """
+        try:
+            bytes_ = pickle.dumps(entry, protocol=ValueDB.PICKLE_PROTOCOL)
+        except Exception:
+            return False
+
+        path = self._path_of(key)
+        path.parent.mkdir(exist_ok=True)
+        tmp_path = path.with_name('{}.{}{}'.format(
+            path.name, utils.create_uuid(), self.TMP_EXTENSION
+        ))
+        with lzma.open(str(tmp_path), 'wb') as f:
+            f.write(bytes_)
+        os.replace(str(tmp_path), str(path))
+        self._added_key_set.add(key)
+
+        if self._size is not None:
+            self._size += os.stat(str(path)).st_size
+
+        self.scrub()
+        return True
+
+    def _get_stats(self):
+        return {
+            dir_entry.path: dir_entry.stat()
+            for subdir in os.scandir(str(self.path))
+            if subdir.is_dir()
+            for dir_entry in os.scandir(subdir.path)
+            if not dir_entry.name.endswith(self.TMP_EXTENSION)
+        }
+
+    def scrub(self):
+        """
+        Discard the least recently used entries until the size of the cache is
+        below ``max_size``.
+
+        This is a no-op until the size of the cache exceeds ``max_size``.
+        """
+        if self.max_size is None:
+            return
+
+        if self._size is None:
+            self._size = sum(
+                stat.st_size
+                for stat in self._get_stats().values()
+            )
+
+        if self._size <= self.max_size:
+            return
+
+        with self._lock():
+            stats = self._get_stats()
+
+            def by_mtime(path_stat):
+                path, stat = path_stat
+                return stat.st_mtime
+
+            total_size = sum(stat.st_size for stat in stats.values())
+            for path, stat in sorted(stats.items(), key=by_mtime):
+                if total_size <= self.max_size:
+                    break
+
+                # Processes that already opened the file are not impacted
+                with contextlib.suppress(FileNotFoundError):
+                    os.unlink(path)
+                total_size -= stat.st_size
+
+            self._size = total_size
+
+
 class ScriptValueDB:
     """
     Class tying together a generated script and a :class:`ValueDB`.
@@ -1721,7 +2317,7 @@ class ComputableExpression(ExpressionBase):
         self._clone_expr_data(self.data)
         return self
 
-    def execute(self, post_compute_cb=None):
+    def execute(self, post_compute_cb=None, result_cache=None):
         """
         Execute the expression and yield its :class:`ExprVal`.
 
@@ -1731,13 +2327,17 @@ class ComputableExpression(ExpressionBase):
             was merely reused and ``False`` if it was actually computed.
         :type post_compute_cb: collections.abc.Callable
 
+        :param result_cache: Persistent cache used to reuse values computed in
+            previous sessions.
+        :type result_cache: ResultCache or None
+
         .. note:: The :meth:`prepare_execute` is called prior to executing.
         """
         # Call it in case it was not already done.
         self.prepare_execute()
-        return self._execute(post_compute_cb)
+        return self._execute(post_compute_cb, result_cache=result_cache)
 
-    def _execute(self, post_compute_cb):
+    def _execute(self, post_compute_cb, result_cache=None):
         # Lazily compute the values of the Expression, trying to use
         # already computed values when possible
 
@@ -1749,6 +2349,7 @@ class ComputableExpression(ExpressionBase):
             return OrderedDict(
                 ((param, param_expr), param_expr._execute(
                     post_compute_cb=post_compute_cb,
+                    result_cache=result_cache,
                 ))
                 for param, param_expr in param_map.items()
                 if param_expr.op.reusable == reusable
@@ -1798,7 +2399,8 @@ class ComputableExpression(ExpressionBase):
             expr_val_seq = ExprValSeq.from_expr(
                 expr=self,
                 param_map=param_map,
-                post_compute_cb=post_compute_cb
+                post_compute_cb=post_compute_cb,
+                result_cache=result_cache,
             )
             self.expr_val_seq_list.append(expr_val_seq)
             yield from expr_val_seq.iter_expr_val()
@@ -1823,6 +2425,336 @@ class ComputableExpression(ExpressionBase):
         ))
 
 
+# ExpressionScheduler executing groups of expressions in worker processes. It
+# is inherited by the workers when they are forked.
+_worker_scheduler = None
+
+
+def _execute_scheduled_group(group_idx):
+    scheduler = _worker_scheduler
+    group, async_result = scheduler._async_result_list[group_idx]
+    return scheduler._execute_group(group)
+
+
+class ExpressionScheduler:
+    """
+    Execute :class:`ComputableExpression` while computing ahead of time the
+    independent ones in worker processes.
+
+    :param expr_list: List of root expressions that will be executed. They
+        must already be prepared with
+        :meth:`ComputableExpression.prepare_execute`.
+    :type expr_list: list(ComputableExpression)
+
+    :param jobs: Number of worker processes. If ``1``, all the expressions are
+        executed in the current process.
+    :type jobs: int
+
+    :param exclusive_type_set: Set of types that can only be computed in the
+        current process, such as a handle on a single physical resource.
+    :type exclusive_type_set: set(type)
+
+    :param result_cache: See :meth:`ComputableExpression.execute`
+    :type result_cache: ResultCache or None
+
+    The expressions are split in groups that do not share any subexpression.
+    Groups that contain no expression producing an instance of a type of
+    ``exclusive_type_set`` are executed in worker processes forked when
+    :meth:`start` is called. The computed values are then rebuilt on the
+    expressions of the current process, so the resulting :class:`ExprVal`
+    (including their UUIDs and logs) are the same as if they had been computed
+    by :meth:`ComputableExpression.execute`. If a value or an exception of a
+    group cannot be pickled, that group is executed again in the current
+    process.
+
+    .. note:: Changes made by the callables to the state of the worker
+        processes (e.g. to :class:`ExprData`) are not visible in the current
+        process.
+    """
+
+    def __init__(self, expr_list, jobs=1, exclusive_type_set=None, result_cache=None):
+        self.expr_list = list(expr_list)
+        self.jobs = jobs
+        self.exclusive_type_set = set(exclusive_type_set or set())
+        self.result_cache = result_cache
+        self._pool = None
+        # Map of root expressions to (group index, index in the group)
+        self._scheduled_map = {}
+        self._async_result_list = []
+        self._group_events_map = {}
+        self._expr_val_map = {}
+
+    @staticmethod
+    def _get_nodes(expr_list):
+        def add_node(node_list, expr):
+            node_list.append(expr)
+            return node_list
+
+        node_list = []
+        visited = set()
+        for expr in expr_list:
+            with contextlib.suppress(AlreadyVisitedException):
+                expr._fold(add_node, node_list, visited)
+        return node_list
+
+    def _get_group_list(self):
+        # Union-find of the root expressions sharing some subexpressions
+        parent_list = list(range(len(self.expr_list)))
+
+        def find(i):
+            while parent_list[i] != i:
+                parent_list[i] = parent_list[parent_list[i]]
+                i = parent_list[i]
+            return i
+
+        owner_map = {}
+        for i, expr in enumerate(self.expr_list):
+            for node in self._get_nodes([expr]):
+                j = owner_map.setdefault(node, i)
+                parent_list[find(j)] = find(i)
+
+        group_map = OrderedDict()
+        for i, expr in enumerate(self.expr_list):
+            group_map.setdefault(find(i), []).append(expr)
+
+        return list(group_map.values())
+
+    def _is_exclusive(self, group):
+        exclusive_types = tuple(self.exclusive_type_set)
+        return any(
+            issubclass(node.op.value_type, exclusive_types)
+            for node in self._get_nodes(group)
+        )
+
+    def start(self):
+        """
+        Start executing the independent groups of expressions in worker
+        processes.
+        """
+        if self.jobs <= 1:
+            return
+
+        group_list = [
+            group
+            for group in self._get_group_list()
+            if not self._is_exclusive(group)
+        ]
+        if not group_list:
+            return
+
+        self._async_result_list = [
+            (group, None)
+            for group in group_list
+        ]
+
+        global _worker_scheduler
+        _worker_scheduler = self
+        ctx = multiprocessing.get_context('fork')
+        try:
+            self._pool = ctx.Pool(processes=self.jobs)
+        finally:
+            _worker_scheduler = None
+
+        for group_idx, group in enumerate(group_list):
+            self._async_result_list[group_idx] = (
+                group,
+                self._pool.apply_async(_execute_scheduled_group, (group_idx,)),
+            )
+            for i, expr in enumerate(group):
+                self._scheduled_map[expr] = (group_idx, i)
+
+    def close(self):
+        """
+        Wait for the worker processes to finish.
+        """
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    @classmethod
+    def _prepare_expr(cls, expr, node_list, node_idx_map):
+        """
+        Call :meth:`ComputableExpression.prepare_execute` like
+        :meth:`ComputableExpression.execute` does, and number the nodes of the
+        resulting graph that were not seen before. Since the cloning done when
+        preparing is deterministic, the numbering is the same in the worker
+        process and in the current process.
+        """
+        expr.prepare_execute()
+        for node in cls._get_nodes([expr]):
+            if node not in node_idx_map:
+                node_idx_map[node] = len(node_list)
+                node_list.append(node)
+
+    def _execute_group(self, group):
+        node_list = []
+        node_idx_map = {}
+        event_list_list = []
+        for expr in group:
+            event_list = []
+
+            def post_compute_cb(expr_val, reused, event_list=event_list):
+                event_list.append(('reused' if reused else 'computed', expr_val.uuid))
+
+            self._prepare_expr(expr, node_list, node_idx_map)
+            for expr_val in expr._execute(post_compute_cb, result_cache=self.result_cache):
+                event_list.append(('result', expr_val.uuid))
+            event_list_list.append(event_list)
+
+        def make_ref(expr_val):
+            if isinstance(expr_val, UnEvaluatedExprVal):
+                return (None, node_idx_map[expr_val.expr])
+            else:
+                return (expr_val.uuid, None)
+
+        def make_val_spec(expr_val):
+            # Prebuilt values are already available in the parent process
+            if isinstance(expr_val.expr.op, PrebuiltOperator):
+                value = NoValue
+            else:
+                value = expr_val.value
+
+            return (expr_val.uuid, value, expr_val.excep, expr_val.duration, expr_val.log)
+
+        seq_spec_list_list = [
+            [
+                (
+                    [
+                        (param, make_ref(param_expr_val))
+                        for param, param_expr_val in expr_val_seq.param_map.items()
+                    ],
+                    [
+                        make_val_spec(expr_val)
+                        for expr_val in expr_val_seq.expr_val_list
+                    ],
+                )
+                for expr_val_seq in node.expr_val_seq_list
+            ]
+            for node in node_list
+        ]
+
+        try:
+            return pickle.dumps(
+                (event_list_list, seq_spec_list_list),
+                protocol=ValueDB.PICKLE_PROTOCOL,
+            )
+        except Exception:
+            return None
+
+    def _install_group(self, group, bytes_):
+        event_list_list, seq_spec_list_list = pickle.loads(bytes_)
+
+        # The expressions are prepared here once and for all, so they will not
+        # be prepared again when replaying their execution.
+        node_list = []
+        node_idx_map = {}
+        for expr in group:
+            self._prepare_expr(expr, node_list, node_idx_map)
+
+        # First create all the ExprVal, then rebuild their parameters since they
+        # can refer to ExprVal of any other node.
+        seq_list = []
+        for node, seq_spec_list in zip(node_list, seq_spec_list_list):
+            if isinstance(node.op, PrebuiltOperator):
+                prebuilt_map = {
+                    info['uuid']: info['value']
+                    for info in node.op.values_info
+                }
+            else:
+                prebuilt_map = {}
+
+            for param_spec, val_spec_list in seq_spec_list:
+                expr_val_list = []
+                for uuid_, value, excep, duration, log in val_spec_list:
+                    expr_val = ExprVal(
+                        expr=node,
+                        param_map=ExprValParamMap(),
+                        value=prebuilt_map.get(uuid_, value),
+                        excep=excep,
+                        uuid=uuid_,
+                        duration=duration,
+                        log=log,
+                    )
+                    self._expr_val_map[uuid_] = expr_val
+                    expr_val_list.append(expr_val)
+                seq_list.append((node, param_spec, expr_val_list))
+
+        for node, param_spec, expr_val_list in seq_list:
+            param_map = ExprValParamMap(
+                (
+                    param,
+                    UnEvaluatedExprVal(node_list[node_idx])
+                    if uuid_ is None else
+                    self._expr_val_map[uuid_]
+                )
+                for param, (uuid_, node_idx) in param_spec
+            )
+            for expr_val in expr_val_list:
+                expr_val.param_map = param_map
+
+            expr_val_seq = ExprValSeq(
+                expr=node,
+                iterator=iter(expr_val_list),
+                param_map=param_map,
+            )
+            # Consume the iterator so the values are recorded
+            for _ in expr_val_seq.iter_expr_val():
+                pass
+            node.expr_val_seq_list.append(expr_val_seq)
+
+        return event_list_list
+
+    def _get_event_list_list(self, group_idx):
+        try:
+            return self._group_events_map[group_idx]
+        except KeyError:
+            group, async_result = self._async_result_list[group_idx]
+            bytes_ = async_result.get()
+            if bytes_ is None:
+                event_list_list = None
+            else:
+                event_list_list = self._install_group(group, bytes_)
+            self._group_events_map[group_idx] = event_list_list
+            return event_list_list
+
+    def _replay(self, event_list, post_compute_cb):
+        for kind, uuid_ in event_list:
+            expr_val = self._expr_val_map[uuid_]
+            if kind == 'result':
+                yield expr_val
+            elif post_compute_cb:
+                post_compute_cb(expr_val, reused=(kind == 'reused'))
+
+    def execute(self, expr, post_compute_cb=None):
+        """
+        Execute the expression and yield its :class:`ExprVal`.
+
+        If the expression was computed by a worker process, this waits for it
+        to finish and replays the calls to ``post_compute_cb``.
+
+        .. seealso:: :meth:`ComputableExpression.execute`
+        """
+        try:
+            group_idx, i = self._scheduled_map[expr]
+        except KeyError:
+            event_list_list = None
+        else:
+            event_list_list = self._get_event_list_list(group_idx)
+
+        if event_list_list is None:
+            return expr.execute(post_compute_cb, result_cache=self.result_cache)
+        else:
+            return self._replay(event_list_list[i], post_compute_cb)
+
+
 class ClassContext:
     """
     Collect callables and types that put together will be used to create
@@ -2698,10 +3630,39 @@ class Operator:
         """
         return self.is_cls_method and issubclass(self.unwrapped_callable.__self__, self.value_type)
 
-    def make_expr_val_iter(self, expr, param_map):
+    def make_expr_val_iter(self, expr, param_map, result_cache=None):
         """
         Make an iterator that will yield the computed :class:`ExprVal`.
+
+        :param result_cache: If provided, values are reused from that cache
+            when available, and added to it otherwise.
+        :type result_cache: ResultCache or None
         """
+        if result_cache is None:
+            key = None
+        else:
+            key = result_cache.make_key(self, param_map)
+
+        if key is not None:
+            try:
+                entry = result_cache.get(key)
+            except KeyError:
+                pass
+            else:
+                for uuid_, value, duration, log in entry:
+                    expr_val = ExprVal(
+                        expr=expr,
+                        param_map=param_map,
+                        value=value,
+                        excep=NoValue,
+                        uuid=uuid_,
+                        duration=duration,
+                        log=log,
+                    )
+                    expr_val.from_result_cache = True
+                    yield expr_val
+                return
+
         if self.is_genfunc:
             @functools.wraps(self.callable_)
             def genf(**kwargs):
@@ -2737,9 +3698,10 @@ class Operator:
             (param, param_expr_val.value)
             for param, param_expr_val in param_map.items()
         )
+        entry = []
         for utc, log_map, (duration, (value, excep)) in utils.capture_log(utils.measure_time(genf(**kwargs))):
             log = ExprValLog(log_map=log_map, utc_datetime=utc)
-            yield ExprVal(
+            expr_val = ExprVal(
                 expr=expr,
                 param_map=param_map,
                 value=value,
@@ -2748,6 +3710,15 @@ class Operator:
                 duration=duration,
                 log=log,
             )
+            if excep is NoValue:
+                entry.append((expr_val.uuid, value, duration, log))
+            else:
+                key = None
+            yield expr_val
+
+        # Only cache complete results, without any exception
+        if key is not None:
+            result_cache.add(key, entry)
 
     def get_prototype(self):
         """
@@ -2914,7 +3885,7 @@ class PrebuiltOperator(Operator):
     def is_method(self):
         return False
 
-    def make_expr_val_iter(self, expr, param_map):
+    def make_expr_val_iter(self, expr, param_map, result_cache=None):
         assert not param_map
 
         for kwargs in self.values_info:
@@ -3039,13 +4010,16 @@ class ExprValSeq:
 
 
     @classmethod
-    def from_expr(cls, expr, param_map, **kwargs):
+    def from_expr(cls, expr, param_map, result_cache=None, **kwargs):
         """
         Build an :class:`ExprValSeq` out of a single :class:`ComputableExpression`.
 
+        :param result_cache: See :meth:`ComputableExpression.execute`
+        :type result_cache: ResultCache or None
+
         .. seealso:: :class:`ExprValSeq` for parameters description.
         """
-        iterator = expr.op.make_expr_val_iter(expr, param_map)
+        iterator = expr.op.make_expr_val_iter(expr, param_map, result_cache=result_cache)
         return cls(
             expr=expr,
             iterator=iterator,
@@ -3074,7 +4048,7 @@ class ExprValSeq:
         # Then compute the remaining ones
         if self.iterator:
             for expr_val in self.iterator:
-                callback(expr_val, reused=False)
+                callback(expr_val, reused=expr_val.from_result_cache)
 
                 self.expr_val_list.append(expr_val)
                 expr_val_list_len = len(self.expr_val_list)
@@ -3477,6 +4451,26 @@ class FrozenExprVal(ExprValBase):
         else:
             self.excep_tb = None
 
+    @property
+    def value(self):
+        value = self._value
+        # Values reloaded from an indexed ValueDB file are loaded on first
+        # access
+        if isinstance(value, _LazyValue):
+            value = value.load()
+            self._value = value
+        return value
+
+    @value.setter
+    def value(self, value):
+        self._value = value
+
+    def __setstate__(self, state):
+        # Older versions stored the value directly in the "value" attribute
+        with contextlib.suppress(KeyError):
+            state['_value'] = state.pop('value')
+        self.__dict__.update(state)
+
     @property
     def callable_(self):
         """
@@ -3774,6 +4768,12 @@ class ExprVal(ExprValBase):
     .. seealso:: :class:`ExprValBase` for the other parameters.
     """
 
+    from_result_cache = False
+    """
+    ``True`` if the value was reused from a :class:`ResultCache` rather than
+    computed.
+    """
+
     def __init__(self, expr, param_map,
         value=NoValue,
         excep=NoValue,
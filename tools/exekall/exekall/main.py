@@ -18,6 +18,7 @@
 
 import argparse
 import collections
+import concurrent.futures
 import contextlib
 import copy
 import datetime
@@ -306,6 +307,26 @@ please run ``exekall run YOUR_SOURCES_OR_MODULES --help``.
     add_argument(run_parser, '--random-order', action='store_true',
         help="""Run the expressions in a random order, instead of sorting by name.""")
 
+    add_argument(run_parser, '--result-cache',
+        default=os.getenv('EXEKALL_RESULT_CACHE'),
+        metavar='FOLDER',
+        help="""Folder of a persistent cache of the values computed by the
+        callables, shared across sessions. Values computed from the same
+        parameters values (e.g. reloaded with --load-db) by the same code are
+        reused instead of being computed again. Defaults to
+        EXEKALL_RESULT_CACHE env var.""")
+
+    add_argument(run_parser, '--result-cache-max-size', type=int,
+        default=1024 ** 3,
+        metavar='BYTES',
+        help="""Maximum size of the folder given to --result-cache. The least
+        recently used values are discarded when exceeded.""")
+
+    add_argument(run_parser, '-j', '--jobs', type=int, default=1,
+        help="""Number of worker processes used to compute ahead of time the
+        expressions that do not share any subexpression with others, and that
+        do not use any of the exclusive types of the adaptor.""")
+
     add_argument(artifact_dir_group, '--artifact-root',
         default=os.getenv('EXEKALL_ARTIFACT_ROOT', 'artifacts'),
         help="Root folder under which the artifact folders will be created. Defaults to EXEKALL_ARTIFACT_ROOT env var.")
@@ -386,6 +407,9 @@ contains subexpression's values.
     add_argument(merge_parser, '--copy', action='store_true',
         help="""Force copying files, instead of using hardlinks.""")
 
+    add_argument(merge_parser, '-j', '--jobs', type=int,
+        help="""Number of threads used to create the links or copies of the files.""")
+
     compare_parser = subparsers.add_parser('compare',
     description="""
 Compare two DBs produced by exekall run.
@@ -460,6 +484,7 @@ arguments.
             artifact_dirs=args.artifact_dirs,
             output_dir=args.output,
             use_hardlink=(not args.copy),
+            jobs=args.jobs,
         )
 
     elif args.subcommand == 'compare':
@@ -530,7 +555,7 @@ def do_compare(parser, compare_parser, argv, db_path_list):
     return adaptor.compare_db_list(db_list)
 
 
-def do_merge(artifact_dirs, output_dir, use_hardlink=True, output_exist=False):
+def do_merge(artifact_dirs, output_dir, use_hardlink=True, output_exist=False, jobs=None):
     output_dir = pathlib.Path(output_dir)
 
     artifact_dirs = [pathlib.Path(path) for path in artifact_dirs]
@@ -548,6 +573,7 @@ def do_merge(artifact_dirs, output_dir, use_hardlink=True, output_exist=False):
         merged_db_path = output_dir / utils.DB_FILENAME
 
     testsession_uuid_list = []
+    link_task_list = []
     for artifact_dir in artifact_dirs:
         with (artifact_dir / 'UUID').open(encoding='utf-8') as f:
             testsession_uuid = f.read().strip()
@@ -571,52 +597,66 @@ def do_merge(artifact_dirs, output_dir, use_hardlink=True, output_exist=False):
             dirpath = pathlib.Path(dirpath)
             for name in filenames:
                 path = dirpath / name
-                rel_path = pathlib.Path(os.path.relpath(str(path), str(artifact_dir)))
-                link_path = output_dir / link_base_path / rel_path
-
-                levels = pathlib.Path(*(['..'] * (
-                    len(rel_path.parents)
-                    + len(link_base_path.parents)
-                    - 1
-                )))
-                src_link_path = levels / rel_path
-
-                # top-level files are relocated under a ORIGIN instead of having
-                # a symlink, otherwise they would clash
-                if dirpath == artifact_dir:
-                    dst_path = link_path
-                    create_link = False
-                # Otherwise, UUIDs will ensure that there is no clash
-                else:
-                    dst_path = output_dir / rel_path
-                    create_link = True
-
-                # Create the folder and make sure that all its parents get the
-                # same stats as the original one, in order to preserve creation
-                # date.
-                os.makedirs(str(dst_path.parent), exist_ok=True)
-                # We do not do copystat on the topmost parent, as it is shared
-                # by all original artifact_dir
-                for parent in list(rel_path.parents)[:-2]:
-                    stat_src = artifact_dir / parent
-                    stat_dst = output_dir / parent
-                    shutil.copystat(str(stat_src), str(stat_dst))
-
-                # Create a mirror of the original hierarchy
-                if create_link:
-                    os.makedirs(str(link_path.parent), exist_ok=True)
-                    link_path.symlink_to(src_link_path)
-
-                if use_hardlink:
-                    os.link(str(path), str(dst_path))
-                    # Preserve the original creation date
-                    shutil.copystat(str(path), str(dst_path), follow_symlinks=False)
-                else:
-                    shutil.copy2(str(path), str(dst_path))
+                link_task_list.append((artifact_dir, link_base_path, path))
 
                 if dirpath == artifact_dir and name == utils.DB_FILENAME:
                     db_path_list.append(path)
 
+    def link_file(artifact_dir, link_base_path, path):
+        rel_path = pathlib.Path(os.path.relpath(str(path), str(artifact_dir)))
+        link_path = output_dir / link_base_path / rel_path
+
+        levels = pathlib.Path(*(['..'] * (
+            len(rel_path.parents)
+            + len(link_base_path.parents)
+            - 1
+        )))
+        src_link_path = levels / rel_path
+
+        # top-level files are relocated under a ORIGIN instead of having
+        # a symlink, otherwise they would clash
+        if path.parent == artifact_dir:
+            dst_path = link_path
+            create_link = False
+        # Otherwise, UUIDs will ensure that there is no clash
+        else:
+            dst_path = output_dir / rel_path
+            create_link = True
+
+        # Create the folder and make sure that all its parents get the
+        # same stats as the original one, in order to preserve creation
+        # date.
+        os.makedirs(str(dst_path.parent), exist_ok=True)
+        # We do not do copystat on the topmost parent, as it is shared
+        # by all original artifact_dir
+        for parent in list(rel_path.parents)[:-2]:
+            stat_src = artifact_dir / parent
+            stat_dst = output_dir / parent
+            shutil.copystat(str(stat_src), str(stat_dst))
+
+        # Create a mirror of the original hierarchy
+        if create_link:
+            os.makedirs(str(link_path.parent), exist_ok=True)
+            link_path.symlink_to(src_link_path)
+
+        if use_hardlink:
+            os.link(str(path), str(dst_path))
+            # Preserve the original creation date
+            shutil.copystat(str(path), str(dst_path), follow_symlinks=False)
+        else:
+            shutil.copy2(str(path), str(dst_path))
+
+    # Creating the links is dominated by filesystem latency, so it is spread
+    # over a pool of threads
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs) as executor:
+        future_list = [
+            executor.submit(link_file, *task)
+            for task in link_task_list
+        ]
+        # Raise the first exception, if any
+        for future in future_list:
+            future.result()
+
     if artifact_dirs:
         # Combine the origin UUIDs to have a stable UUID for the merged
         # artifacts
@@ -629,17 +669,11 @@ def do_merge(artifact_dirs, output_dir, use_hardlink=True, output_exist=False):
         with (output_dir / 'UUID').open('wt') as f:
             f.write(combined_uuid + '\n')
 
-    if output_exist:
-        root_db = engine.ValueDB.from_path(merged_db_path)
-    else:
-        root_db = None
-
-    db_list = [
-        engine.ValueDB.from_path(path)
-        for path in db_path_list
-    ]
-    merged_db = engine.ValueDB.merge(db_list, roots_from=root_db)
-    merged_db.to_path(merged_db_path)
+    engine.ValueDB.merge_paths(
+        db_path_list,
+        merged_db_path,
+        roots_from=merged_db_path if output_exist else None,
+    )
 
 
 def do_run(args, parser, run_parser, argv):
@@ -683,6 +717,15 @@ def do_run(args, parser, run_parser, argv):
     iteration_nr = args.n
     shared_pattern_set = set(args.share)
     random_order = args.random_order
+    jobs = args.jobs
+
+    if args.result_cache:
+        result_cache = engine.ResultCache(
+            args.result_cache,
+            max_size=args.result_cache_max_size,
+        )
+    else:
+        result_cache = None
 
     adaptor = adaptor_cls(args)
 
@@ -957,6 +1000,8 @@ def do_run(args, parser, run_parser, argv):
         adaptor_cls=adaptor_cls,
         verbose=verbose,
         save_db=save_db,
+        jobs=jobs,
+        result_cache=result_cache,
     )
 
     # If we reloaded a DB, merge it with the current DB so the outcome is a
@@ -972,7 +1017,8 @@ def do_run(args, parser, run_parser, argv):
 
 
 def exec_expr_list(iteration_expr_list, adaptor, artifact_dir, testsession_uuid,
-                   hidden_callable_set, only_template_scripts, adaptor_cls, verbose, save_db):
+                   hidden_callable_set, only_template_scripts, adaptor_cls, verbose, save_db,
+                   jobs=1, result_cache=None):
 
     if not only_template_scripts:
         with (artifact_dir / 'UUID').open('wt') as f:
@@ -1039,6 +1085,15 @@ def exec_expr_list(iteration_expr_list, adaptor, artifact_dir, testsession_uuid,
     if only_template_scripts:
         return 0
 
+    # Independent expressions are computed ahead of time in worker processes
+    scheduler = engine.ExpressionScheduler(
+        utils.flatten_seq(iteration_expr_list),
+        jobs=jobs,
+        exclusive_type_set=adaptor.get_exclusive_type_set(),
+        result_cache=result_cache,
+    )
+    scheduler.start()
+
     # Preserve the execution order, so the summary is displayed in the same
     # order
     result_map = collections.OrderedDict()
@@ -1127,7 +1182,7 @@ def exec_expr_list(iteration_expr_list, adaptor, artifact_dir, testsession_uuid,
                 return '{}{}'.format(duration, cumulative)
 
             # This returns an iterator
-            executor = expr.execute(log_expr_val)
+            executor = scheduler.execute(expr, log_expr_val)
 
             out('')
             for result in utils.iterate_cb(executor, pre_line, flush_std_streams):
@@ -1201,6 +1256,8 @@ def exec_expr_list(iteration_expr_list, adaptor, artifact_dir, testsession_uuid,
             for uuid_ in computed_uuid_set:
                 (artifact_dir / 'BY_UUID' / uuid_).symlink_to(expr_artifact_dir)
 
+    scheduler.close()
+
     if save_db:
         db = engine.ValueDB(
             engine.FrozenExprValSeq.from_expr_list(
@@ -1211,7 +1268,7 @@ def exec_expr_list(iteration_expr_list, adaptor, artifact_dir, testsession_uuid,
         )
 
         db_path = artifact_dir / utils.DB_FILENAME
-        db.to_path(db_path)
+        db.to_path(db_path, indexed=True)
         relative_db_path = db_path.relative_to(artifact_dir)
     else:
         relative_db_path = None
@@ -18,7 +18,7 @@
 
 from exekall.utils import flatten_seq
 from exekall.customization import AdaptorBase
-from exekall.tests.suite import TestCaseABC, TestResult, TestResultStatus
+from exekall.tests.suite import TestCaseABC, TestResult, TestResultStatus, SchedulerTestCase
 
 
 class SelfTestAdaptor(AdaptorBase):
@@ -34,6 +34,11 @@ class SelfTestAdaptor(AdaptorBase):
         )
         return filtered_op_set
 
+    def get_exclusive_type_set(self):
+        # SchedulerTestCase starts its own worker processes, which cannot be
+        # done from a worker process
+        return {SchedulerTestCase}
+
     @staticmethod
     def get_default_type_goal_pattern_set():
         """
@@ -22,9 +22,14 @@ import functools
 import operator
 import contextlib
 import shutil
+import pickle
+import os
+import time
+import logging
 
 import exekall.utils as utils
 import exekall.engine as engine
+from exekall.customization import AdaptorBase
 from exekall.tests.utils import indent
 
 
@@ -99,10 +104,10 @@ class TestCaseABC(abc.ABC):
         return dict()
 
     @classmethod
-    def make_expressions(cls, callable_set, goal_type, tags_getter=None, non_reusable_type_set=None):
+    def make_expressions(cls, callable_set, goal_type, tags_getter=None, non_reusable_type_set=None, prebuilt_op_set=None):
         """
         Create a list of :class:`exekall.engine.Expression` out of
-        the given ``callable_set``.
+        the given ``callable_set``, and of the optional ``prebuilt_op_set``.
         """
 
         op_set = {
@@ -113,6 +118,7 @@ class TestCaseABC(abc.ABC):
             )
             for callable_ in callable_set
         }
+        op_set.update(prebuilt_op_set or set())
 
         root_op_set = {
             op
@@ -149,11 +155,12 @@ class TestCaseABC(abc.ABC):
         self.dump_expr_layout()
 
     def dump_expr_layout(self):
-        folder = self.artifact_dir / 'tested_expr'
+        # Use a folder per test case, since they may be executed concurrently
+        folder = self.artifact_dir / 'tested_expr' / self.__class__.__qualname__
         # Wipe if already exists
         with contextlib.suppress(FileNotFoundError):
             shutil.rmtree(str(folder))
-        folder.mkdir()
+        folder.mkdir(parents=True)
 
         for expr in self.expr_list:
             id_ = expr.get_id(qual=False)
@@ -386,6 +393,196 @@ class NoExcepTestCase(TestCaseBase):
             for ref, new in zip(ref_list, new_list):
                 compare_expr_val(ref, new)
 
+    @TestCaseABC.test
+    def test_indexed_db(self):
+        """
+        Test that a :class:`exekall.engine.ValueDB` written in indexed format
+        can be reloaded, and that its values are only loaded when accessed.
+        """
+        expr_list = [
+            computable_expr
+            for computable_expr, expr_val_list in self.execute()
+        ]
+        db = engine.ValueDB(
+            engine.FrozenExprValSeq.from_expr_list(expr_list)
+        )
+        db_path = self.artifact_dir / 'INDEXED_VALUE_DB'
+        db.to_path(db_path, indexed=True)
+        reloaded_db = engine.ValueDB.from_path(db_path)
+
+        def get_id_map(db):
+            return {
+                froz_val.uuid: froz_val.get_id()
+                for froz_val in db.get_all()
+            }
+
+        TestResult.fail_if(
+            get_id_map(db) != get_id_map(reloaded_db),
+            'Different IDs after reloading the indexed DB'
+        )
+
+        TestResult.fail_if(
+            any(
+                not isinstance(froz_val.__dict__['_value'], engine._LazyValue)
+                for froz_val in reloaded_db.get_roots()
+            ),
+            'Root values loaded before being accessed'
+        )
+
+        for froz_val in reloaded_db.get_roots():
+            TestResult.fail_if(
+                not isinstance(froz_val.value, Final),
+                'Wrong value type after reloading: expected {} but got {}'.format(
+                    utils.get_name(Final),
+                    utils.get_name(type(froz_val.value))
+                ),
+            )
+
+    @TestCaseABC.test
+    def test_indexed_db_load_values(self):
+        """
+        Test that a :class:`exekall.engine.ValueDB` reloaded from an indexed
+        file does not depend on that file anymore once its values are loaded.
+        """
+        expr_list = [
+            computable_expr
+            for computable_expr, expr_val_list in self.execute()
+        ]
+        db = engine.ValueDB(
+            engine.FrozenExprValSeq.from_expr_list(expr_list)
+        )
+        db_path = self.artifact_dir / 'INDEXED_VALUE_DB_LOAD'
+        db.to_path(db_path, indexed=True)
+        reloaded_db = engine.ValueDB.from_path(db_path)
+        reloaded_db.load_values()
+        db_path.unlink()
+
+        TestResult.fail_if(
+            any(
+                isinstance(froz_val.__dict__['_value'], engine._LazyValue)
+                for froz_val in reloaded_db.get_all()
+            ),
+            'Values still lazily loaded after ValueDB.load_values()'
+        )
+
+        for froz_val in reloaded_db.get_roots():
+            TestResult.fail_if(
+                not isinstance(froz_val.value, Final),
+                'Wrong value type after deleting the DB file: expected {} but got {}'.format(
+                    utils.get_name(Final),
+                    utils.get_name(type(froz_val.value))
+                ),
+            )
+
+        # Pickling the DB must not try to read the deleted file
+        pickled_db = pickle.loads(pickle.dumps(reloaded_db))
+        TestResult.fail_if(
+            {froz_val.uuid for froz_val in pickled_db.get_all()} !=
+            {froz_val.uuid for froz_val in reloaded_db.get_all()},
+            'Different values after pickling the loaded DB'
+        )
+
+    @TestCaseABC.test
+    def test_merge_paths(self):
+        """
+        Test that :meth:`exekall.engine.ValueDB.merge_paths` gives the same
+        result as :meth:`exekall.engine.ValueDB.merge`, and copies the values
+        of indexed files without deserializing them.
+        """
+        def make_db():
+            expr_list = [
+                computable_expr
+                for computable_expr, expr_val_list in self.execute()
+            ]
+            return engine.ValueDB(
+                engine.FrozenExprValSeq.from_expr_list(expr_list),
+                # Databases can only be merged if they have an adaptor
+                adaptor_cls=AdaptorBase,
+            )
+
+        folder = self.artifact_dir / 'merge_paths' / utils.create_uuid()
+        folder.mkdir(parents=True)
+        legacy_path = folder / 'LEGACY_VALUE_DB'
+        indexed_path = folder / 'INDEXED_VALUE_DB'
+        merged_path = folder / 'MERGED_VALUE_DB'
+        make_db().to_path(legacy_path)
+        make_db().to_path(indexed_path, indexed=True)
+
+        # Count the chunks that are deserialized while merging
+        get_chunk = engine._ValueChunkStore.get_chunk
+        loaded_chunk_list = []
+
+        def counting_get_chunk(self, chunk_idx):
+            loaded_chunk_list.append((self.path, chunk_idx))
+            return get_chunk(self, chunk_idx)
+
+        engine._ValueChunkStore.get_chunk = counting_get_chunk
+        try:
+            engine.ValueDB.merge_paths([legacy_path, indexed_path], merged_path)
+        finally:
+            engine._ValueChunkStore.get_chunk = get_chunk
+
+        TestResult.fail_if(
+            loaded_chunk_list,
+            'Values deserialized while merging: {}'.format(loaded_chunk_list)
+        )
+
+        # The chunks of the indexed file are copied as-is
+        indexed_db = engine.ValueDB.from_path(indexed_path)
+        store_set = {
+            froz_val.__dict__['_value'].store
+            for froz_val in indexed_db.get_all()
+            if isinstance(froz_val.__dict__['_value'], engine._LazyValue)
+        }
+        merged_bytes = merged_path.read_bytes()
+        TestResult.fail_if(
+            not all(
+                store.get_raw_chunk(chunk_idx) in merged_bytes
+                for store in store_set
+                for chunk_idx in range(len(store.chunk_table))
+            ),
+            'Chunks of the indexed DB not copied as-is to the merged DB'
+        )
+
+        ref_db_list = [
+            engine.ValueDB.from_path(legacy_path),
+            engine.ValueDB.from_path(indexed_path),
+        ]
+        for db in ref_db_list:
+            db.load_values()
+        ref_db = engine.ValueDB.merge(ref_db_list)
+        merged_db = engine.ValueDB.from_path(merged_path)
+
+        def get_uuids(froz_val_set):
+            return {froz_val.uuid for froz_val in froz_val_set}
+
+        TestResult.fail_if(
+            get_uuids(ref_db.get_roots()) != get_uuids(merged_db.get_roots()),
+            'Different roots in the merged DB'
+        )
+
+        ref_id_set = {
+            froz_val.get_id(full_qual=True, with_tags=True)
+            for froz_val in ref_db.get_all()
+        }
+        for id_ in ref_id_set:
+            TestResult.fail_if(
+                get_uuids(ref_db.get_by_id(id_, full_qual=True)) !=
+                get_uuids(merged_db.get_by_id(id_, full_qual=True)),
+                'Different values with ID {} in the merged DB'.format(id_)
+            )
+
+        def get_type_map(db):
+            return {
+                froz_val.uuid: type(froz_val.value)
+                for froz_val in db.get_all()
+            }
+
+        TestResult.fail_if(
+            get_type_map(ref_db) != get_type_map(merged_db),
+            'Different values in the merged DB'
+        )
+
     VALUES_RELATIONS = []
     """
     Relations to be satisfied between values inside an expressions.
@@ -624,3 +821,491 @@ class CloneTestCase(NoExcepTestCase):
             expr.clone_by_predicate(predicate)
             for expr in super().get_computable_expr_list()
         ]
+
+
+@utils.impure
+def middle3_impure(b2: B2) -> B3:
+    assert type(b2) is B2
+    return B3()
+
+
+class ResultCacheTestCase(NoExcepTestCase):
+    CALLABLES = {init, middle, middle2, middle3_impure, final}
+
+    EXPR_ID = {
+        (('qual', True),): 'exekall.tests.suite.init:exekall.tests.suite.middle:exekall.tests.suite.final(b2=exekall.tests.suite.init:exekall.tests.suite.middle2,b3=exekall.tests.suite.init:exekall.tests.suite.middle2:exekall.tests.suite.middle3_impure)',
+        (('qual', False),): 'init:middle:final(b2=init:middle2,b3=init:middle2:middle3_impure)',
+    }
+    # no tags used
+    EXPR_VAL_ID = EXPR_ID
+
+    def make_cache_path(self):
+        # Use a folder per test, since they may be executed concurrently
+        return self.artifact_dir / 'result_cache' / utils.create_uuid()
+
+    @staticmethod
+    def get_expr_val_map(expr_val):
+        """
+        Map callables of the expression to the :class:`exekall.engine.ExprVal`
+        they computed.
+        """
+        expr_val_map = {}
+
+        def visit(expr_val):
+            expr_val_map[expr_val.expr.op.callable_] = expr_val
+            for param_expr_val in expr_val.param_map.values():
+                visit(param_expr_val)
+
+        visit(expr_val)
+        return expr_val_map
+
+    def execute_cached(self, result_cache, prebuilt_op_set=None):
+        if prebuilt_op_set:
+            # The prebuilt operators replace the callables producing the same
+            # types, like when loading values with --load-db/--load-type
+            prebuilt_type_set = {op.value_type for op in prebuilt_op_set}
+            expr_list = self.make_expressions(
+                {
+                    callable_
+                    for callable_ in self.CALLABLES
+                    if engine.Operator(callable_).value_type not in prebuilt_type_set
+                },
+                goal_type=self.GOAL_TYPE,
+                prebuilt_op_set=prebuilt_op_set,
+            )
+        else:
+            expr_list = self.expr_list
+
+        computable_expr_list = engine.ComputableExpression.from_expr_list(expr_list)
+        expr_val_list = [
+            expr_val
+            for computable_expr in computable_expr_list
+            for expr_val in computable_expr.execute(result_cache=result_cache)
+        ]
+        self.check_excep(expr_val_list)
+        return computable_expr_list, expr_val_list
+
+    @TestCaseABC.test
+    def test_result_cache_key(self):
+        """
+        Test that :meth:`exekall.engine.ResultCache.make_key` gives stable keys
+        that only depend on the operator and the UUID of the parameters.
+        """
+        result_cache = engine.ResultCache(self.make_cache_path())
+        other_cache = engine.ResultCache(self.make_cache_path())
+        computable_expr_list, expr_val_list = self.execute_cached(result_cache)
+
+        for expr_val in expr_val_list:
+            for callable_, sub_expr_val in self.get_expr_val_map(expr_val).items():
+                op = sub_expr_val.expr.op
+                param_map = sub_expr_val.param_map
+                key = result_cache.make_key(op, param_map)
+
+                if callable_ in (init, middle3_impure):
+                    TestResult.fail_if(
+                        key is not None,
+                        'Result of {} should not be cached'.format(
+                            utils.get_name(callable_)
+                        ),
+                    )
+                    continue
+
+                TestResult.fail_if(
+                    key is None,
+                    'Result of {} should be cached'.format(utils.get_name(callable_)),
+                )
+                TestResult.fail_if(
+                    key != result_cache.make_key(op, param_map) or
+                    key != other_cache.make_key(op, param_map),
+                    'Unstable key for {}'.format(utils.get_name(callable_)),
+                )
+
+                # The key depends on the UUID of the parameters
+                other_param_map = engine.ExprValParamMap(
+                    (param, engine.ExprVal(
+                        expr=param_expr_val.expr,
+                        param_map=param_expr_val.param_map,
+                        value=param_expr_val.value,
+                        excep=param_expr_val.excep,
+                        uuid=utils.create_uuid(),
+                    ))
+                    for param, param_expr_val in param_map.items()
+                )
+                TestResult.fail_if(
+                    key == result_cache.make_key(op, other_param_map),
+                    'Key of {} does not depend on the UUID of its parameters'.format(
+                        utils.get_name(callable_)
+                    ),
+                )
+
+    @TestCaseABC.test
+    def test_result_cache_reuse(self):
+        """
+        Test that values are reused from the cache when re-executing the
+        expressions on values reloaded from a :class:`exekall.engine.ValueDB`,
+        except for impure callables.
+        """
+        cache_path = self.make_cache_path()
+        computable_expr_list, expr_val_list = self.execute_cached(
+            engine.ResultCache(cache_path)
+        )
+
+        TestResult.fail_if(
+            any(
+                sub_expr_val.from_result_cache
+                for expr_val in expr_val_list
+                for sub_expr_val in self.get_expr_val_map(expr_val).values()
+            ),
+            'Values reused from an empty cache'
+        )
+
+        db = engine.ValueDB(
+            engine.FrozenExprValSeq.from_expr_list(computable_expr_list)
+        )
+        db_path = self.artifact_dir / 'result_cache' / '{}.VALUE_DB.pickle.xz'.format(
+            utils.create_uuid()
+        )
+        db.to_path(db_path)
+        db = engine.ValueDB.from_path(db_path)
+
+        # Equivalent of --load-db with --load-type on the root type
+        prebuilt_op_set = {
+            engine.PrebuiltOperator(A, list(db.get_by_type(A)))
+        }
+        # New cache instance, as in another exekall session
+        new_computable_expr_list, new_expr_val_list = self.execute_cached(
+            engine.ResultCache(cache_path),
+            prebuilt_op_set=prebuilt_op_set,
+        )
+
+        TestResult.fail_if(
+            len(new_expr_val_list) != len(expr_val_list),
+            'Different number of values when re-executing'
+        )
+
+        for ref, new in zip(expr_val_list, new_expr_val_list):
+            ref_map = self.get_expr_val_map(ref)
+            new_map = self.get_expr_val_map(new)
+            for callable_ in (middle, middle2):
+                TestResult.fail_if(
+                    not new_map[callable_].from_result_cache,
+                    'Value of {} not reused from the cache'.format(
+                        utils.get_name(callable_)
+                    ),
+                )
+                TestResult.fail_if(
+                    new_map[callable_].uuid != ref_map[callable_].uuid,
+                    'Value of {} reused from the cache with a different UUID'.format(
+                        utils.get_name(callable_)
+                    ),
+                )
+
+            # final depends on an impure callable, so none of them can be
+            # reused
+            for callable_ in (middle3_impure, final):
+                TestResult.fail_if(
+                    new_map[callable_].from_result_cache,
+                    'Value of {} reused from the cache'.format(
+                        utils.get_name(callable_)
+                    ),
+                )
+
+    @TestCaseABC.test
+    def test_result_cache_lru(self):
+        """
+        Test that the least recently used entries of a
+        :class:`exekall.engine.ResultCache` are discarded when its size
+        exceeds ``max_size``, and only then.
+        """
+        cache_path = self.make_cache_path()
+        key_list = [
+            '{:064x}'.format(i)
+            for i in range(4)
+        ]
+
+        def make_entry():
+            # Random data so that all entries have about the same compressed
+            # size
+            return [(utils.create_uuid(), os.urandom(4096), None, None)]
+
+        result_cache = engine.ResultCache(cache_path)
+        for key in key_list[:3]:
+            result_cache.add(key, make_entry())
+
+        # Make the entries look like they were used in that order
+        now = time.time()
+        for i, key in enumerate(key_list[:3]):
+            mtime = now - 100 + i
+            os.utime(str(result_cache._path_of(key)), (mtime, mtime))
+
+        def get_size(key):
+            return result_cache._path_of(key).stat().st_size
+
+        size = sum(map(get_size, key_list[:3]))
+        # Room for the 3 entries, but not for a 4th one
+        max_size = size + get_size(key_list[0]) // 2
+        result_cache = engine.ResultCache(cache_path, max_size=max_size)
+
+        scan_count = 0
+        get_stats = result_cache._get_stats
+
+        def counting_get_stats():
+            nonlocal scan_count
+            scan_count += 1
+            return get_stats()
+
+        result_cache._get_stats = counting_get_stats
+
+        # Scrubbing a cache within its budget only needs to compute its size
+        # once
+        result_cache.scrub()
+        result_cache.scrub()
+        TestResult.fail_if(
+            scan_count != 1,
+            'Cache within budget scanned {} times'.format(scan_count)
+        )
+
+        # Using the oldest entry makes it the most recently used
+        result_cache.get(key_list[0])
+        result_cache.add(key_list[3], make_entry())
+
+        def exists(key):
+            return result_cache._path_of(key).exists()
+
+        TestResult.fail_if(
+            exists(key_list[1]),
+            'Least recently used entry was not discarded'
+        )
+        TestResult.fail_if(
+            not all(map(exists, (key_list[0], key_list[2], key_list[3]))),
+            'Recently used entries were discarded'
+        )
+
+        total_size = sum(
+            get_size(key)
+            for key in key_list
+            if exists(key)
+        )
+        TestResult.fail_if(
+            total_size > max_size,
+            'Cache size {} exceeds max_size={}'.format(total_size, max_size)
+        )
+
+
+class SchedVal:
+    """
+    Value recording the process it was computed in.
+    """
+
+    def __init__(self, name):
+        self.name = name
+        self.pid = os.getpid()
+
+
+class SchedA(SchedVal):
+    pass
+
+
+class SchedAUnpicklable(SchedA):
+    def __reduce_ex__(self, protocol):
+        raise TypeError('cannot pickle {}'.format(utils.get_name(type(self))))
+
+
+class SchedAExclusive(SchedA):
+    pass
+
+
+class SchedB(SchedVal):
+    pass
+
+
+def sched_init() -> SchedA:
+    return SchedA('init')
+
+
+def sched_init_unpicklable() -> SchedAUnpicklable:
+    return SchedAUnpicklable('unpicklable')
+
+
+def sched_init_exclusive() -> SchedAExclusive:
+    return SchedAExclusive('exclusive')
+
+
+def sched_middle(a: SchedA) -> SchedB:
+    logging.getLogger('exekall.tests').info('computing from %s', a.name)
+    return SchedB(a.name)
+
+
+def sched_final(b: SchedB) -> Final:
+    return Final()
+
+
+class SchedulerTestCase(TestCaseBase):
+    """
+    Check that :class:`exekall.engine.ExpressionScheduler` gives the same
+    results with multiple jobs as when executing sequentially.
+
+    .. note:: Some values cannot be pickled, so the generic tests of
+        :class:`NoExcepTestCase` do not apply.
+    """
+    CALLABLES = {
+        sched_init,
+        sched_init_unpicklable,
+        sched_init_exclusive,
+        sched_middle,
+        sched_final,
+    }
+
+    EXCLUSIVE_TYPES = {SchedAExclusive}
+
+    JOBS = 4
+
+    def execute_scheduled(self, jobs):
+        """
+        Execute the expressions using an
+        :class:`exekall.engine.ExpressionScheduler`, like ``exekall run``.
+
+        :return: A tuple ``(db, event_list)`` with the
+            :class:`exekall.engine.ValueDB` of the computed values and the
+            list of calls to ``post_compute_cb``.
+        """
+        expr_list = self.get_computable_expr_list()
+        for expr in expr_list:
+            expr.prepare_execute()
+
+        event_list = []
+
+        def post_compute_cb(expr_val, reused):
+            event_list.append((expr_val.uuid, reused))
+
+        scheduler = engine.ExpressionScheduler(
+            expr_list,
+            jobs=jobs,
+            exclusive_type_set=self.EXCLUSIVE_TYPES,
+        )
+        with scheduler:
+            expr_val_list = [
+                expr_val
+                for expr in expr_list
+                for expr_val in scheduler.execute(expr, post_compute_cb)
+            ]
+
+        self.check_excep(expr_val_list)
+        db = engine.ValueDB(engine.FrozenExprValSeq.from_expr_list(expr_list))
+        return (db, event_list)
+
+    @staticmethod
+    def describe_run(db, event_list):
+        """
+        Describe the graph of values of a run, independently from the actual
+        UUIDs and from the process they were computed in.
+        """
+        # Number the UUIDs in the order they are found, so that two runs with
+        # the same UUID structure get the same numbers
+        uuid_map = {}
+
+        def describe_uuid(uuid_):
+            return uuid_map.setdefault(uuid_, len(uuid_map))
+
+        def describe_value(value):
+            return (
+                utils.get_name(type(value)),
+                {
+                    attr: val
+                    for attr, val in getattr(value, '__dict__', {}).items()
+                    if attr != 'pid'
+                }
+            )
+
+        def describe_log(log):
+            if log is None:
+                return None
+            else:
+                # Remove the timestamp from each line
+                return {
+                    level: [
+                        line.split(']', 1)[-1]
+                        for line in content.splitlines()
+                    ]
+                    for level, content in log.log_map.items()
+                }
+
+        def describe_param_map(param_map):
+            return [
+                (param, describe(froz_val))
+                for param, froz_val in param_map.items()
+            ]
+
+        def describe(froz_val):
+            return (
+                describe_uuid(froz_val.uuid),
+                froz_val.get_id(full_qual=True, with_tags=True),
+                describe_value(froz_val.value),
+                utils.get_name(type(froz_val.excep)),
+                describe_log(froz_val.log),
+                describe_param_map(froz_val.param_map),
+            )
+
+        db_desc = [
+            (
+                [describe(froz_val) for froz_val in froz_val_seq],
+                describe_param_map(froz_val_seq.param_map),
+            )
+            for froz_val_seq in db.froz_val_seq_list
+        ]
+        event_desc = [
+            (describe_uuid(uuid_), reused)
+            for uuid_, reused in event_list
+        ]
+        return (db_desc, event_desc)
+
+    @TestCaseABC.test
+    def test_scheduler_sequential(self):
+        """
+        Test that executing the expressions with multiple jobs gives the same
+        values, UUID structure and logs as executing them sequentially.
+        """
+        ref = self.describe_run(*self.execute_scheduled(jobs=1))
+        new = self.describe_run(*self.execute_scheduled(jobs=self.JOBS))
+
+        TestResult.fail_if(
+            not ref[0],
+            'No value computed'
+        )
+        TestResult.fail_if(
+            ref[0] != new[0],
+            'Different values with jobs={} than when executing sequentially'.format(self.JOBS)
+        )
+        TestResult.fail_if(
+            ref[1] != new[1],
+            'Different post_compute_cb calls with jobs={} than when executing sequentially'.format(self.JOBS)
+        )
+
+    @TestCaseABC.test
+    def test_scheduler_process(self):
+        """
+        Test that expressions are executed in worker processes, except the ones
+        involving exclusive types or unpicklable values.
+        """
+        db, event_list = self.execute_scheduled(jobs=self.JOBS)
+        pid_map = {
+            froz_val.value.name: froz_val.value.pid
+            for froz_val in db.get_by_type(SchedB)
+        }
+
+        TestResult.fail_if(
+            set(pid_map.keys()) != {'init', 'unpicklable', 'exclusive'},
+            'Unexpected values: {}'.format(sorted(pid_map.keys()))
+        )
+        TestResult.fail_if(
+            pid_map['init'] == os.getpid(),
+            'Independent expression was not executed in a worker process'
+        )
+        TestResult.fail_if(
+            pid_map['unpicklable'] != os.getpid(),
+            'Expression with unpicklable values did not fall back to the current process'
+        )
+        TestResult.fail_if(
+            pid_map['exclusive'] != os.getpid(),
+            'Expression with an exclusive type was executed in a worker process'
+        )